@@ -1,22 +1,55 @@
-from typing import Dict, List, Optional
+import json
+import re
+from typing import Dict, List, Optional, Tuple
 from agents.base_agent import BaseAgent
 from agents.weather_agent import WeatherAgent
 from agents.news_agent import NewsAgent
+from agents.intent_router import IntentRouter, NaiveBayesIntentClassifier, RouteCandidate
 from interfaces.llm_interface import ILLMService
+from config.settings import RoutingConfig
+from services.metrics import ROUTES
+from services.tracing import BatchSpanProcessor, span
+
+INTENT_SEPARATOR = re.compile(r"\s*(?:;|\?|,?\s*\band (?:also|then)\b|,?\s*\balso\b|,?\s*\bplus\b|,?\s*\band\b)\s*", re.IGNORECASE)
+
+class RoutingLogWriter:
+    """Appends routing decisions to a JSONL file, in the batches a BatchSpanProcessor hands it"""
+    
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def export(self, records: List[dict]):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+    
+    def shutdown(self):
+        self._file.close()
 
 class AgentManager:
     """Manager for handling multiple specialized agents"""
     
-    def __init__(self, llm_service: ILLMService):
+    def __init__(self, llm_service: ILLMService, router: Optional[IntentRouter] = None,
+                 routing_log_path: str = ""):
         self.llm_service = llm_service
         self.agents: Dict[str, BaseAgent] = {}
         self.default_agent_name = None
+        self.router = router or IntentRouter()
+        self.routing_log_path = routing_log_path
+        self._router_dirty = True
+        # Written in batches from a background thread, keeping file I/O off the routing path
+        self._routing_log: Optional[BatchSpanProcessor] = None
+        if routing_log_path:
+            try:
+                self._routing_log = BatchSpanProcessor(RoutingLogWriter(routing_log_path))
+            except OSError as e:
+                print(f"⚠️ Could not open routing log: {e}")
     
     def register_agent(self, agent: BaseAgent, is_default: bool = False):
         """Register a new agent"""
         self.agents[agent.name] = agent
         if is_default or not self.default_agent_name:
             self.default_agent_name = agent.name
+        self._router_dirty = True
         print(f"✅ Registered agent: {agent.name}")
     
     def get_agent(self, name: str) -> Optional[BaseAgent]:
@@ -29,32 +62,88 @@ class AgentManager:
             return self.agents.get(self.default_agent_name)
         return None
     
+    def rank_agents(self, query: str) -> List[RouteCandidate]:
+        """Score all registered agents for a query, best first"""
+        if self._router_dirty:
+            self.router.compile(self.agents)
+            self._router_dirty = False
+        return self.router.rank(query)
+    
     def route_query(self, query: str) -> BaseAgent:
         """Route query to the most appropriate agent"""
-        query_lower = query.lower()
-        
-        # Check weather agent
-        if 'weather_agent' in self.agents:
-            weather_agent = self.agents['weather_agent']
-            if hasattr(weather_agent, 'is_weather_query') and weather_agent.is_weather_query(query):
-                return weather_agent
-        
-        # Check news agent
-        if 'news_agent' in self.agents:
-            news_agent = self.agents['news_agent']
-            if hasattr(news_agent, 'is_news_query') and news_agent.is_news_query(query):
-                return news_agent
-        
-        # Return default agent or first available
-        default_agent = self.get_default_agent()
-        if default_agent:
-            return default_agent
+        with span("agent.route", {"query_chars": len(query)}) as current:
+            candidates = self.rank_agents(query)
+            if candidates and candidates[0].agent_name in self.agents:
+                best = candidates[0]
+                current.set_attributes({"agent": best.agent_name, "confidence": round(best.confidence, 4),
+                                        "source": best.source})
+                ROUTES.labels(best.agent_name, best.source).inc()
+                self._log_route(query, best)
+                return self.agents[best.agent_name]
+            
+            # Return default agent or first available
+            default_agent = self.get_default_agent()
+            if default_agent:
+                current.set_attributes({"agent": default_agent.name, "source": "default"})
+                ROUTES.labels(default_agent.name, "default").inc()
+                return default_agent
+            
+            # Return first available agent as fallback
+            if self.agents:
+                fallback = next(iter(self.agents.values()))
+                current.set_attributes({"agent": fallback.name, "source": "fallback"})
+                ROUTES.labels(fallback.name, "fallback").inc()
+                return fallback
+            
+            raise ValueError("No agents available")
+    
+    def split_intents(self, query: str, min_confidence: float = 0.5) -> List[Tuple[BaseAgent, str]]:
+        """Split a multi-intent query into (agent, sub-query) pairs; a single intent comes back routed as a whole"""
+        # Clauses without a confident agent of their own stay attached to the
+        # preceding clause, so "news about rock and roll" is not split apart
+        clauses = [clause for clause in INTENT_SEPARATOR.split(query) if clause.strip()]
+        groups: List[List] = []
+        for clause in clauses:
+            candidates = self.rank_agents(clause)
+            agent_name = None
+            if candidates and candidates[0].confidence >= min_confidence and candidates[0].agent_name in self.agents:
+                agent_name = candidates[0].agent_name
+            if groups and (agent_name is None or agent_name == groups[-1][0] or groups[-1][0] is None):
+                groups[-1][0] = groups[-1][0] or agent_name
+                groups[-1][1].append(clause)
+            else:
+                groups.append([agent_name, [clause]])
         
-        # Return first available agent as fallback
-        if self.agents:
-            return next(iter(self.agents.values()))
+        if len([name for name, _ in groups if name]) < 2:
+            return [(self.route_query(query), query)]
         
-        raise ValueError("No agents available")
+        intents = []
+        whole_query_agent = None  # routed at most once, so each query logs and counts one routing decision
+        for agent_name, group_clauses in groups:
+            if agent_name:
+                agent = self.agents[agent_name]
+            else:
+                whole_query_agent = whole_query_agent or self.route_query(query)
+                agent = whole_query_agent
+            intents.append((agent, " and ".join(group_clauses)))
+        return intents
+    
+    def _log_route(self, query: str, candidate: RouteCandidate):
+        """Queue a routing decision for the JSONL log used to train the classifier"""
+        if self._routing_log is None:
+            return
+        self._routing_log.on_end({
+            "query": query,
+            "agent": candidate.agent_name,
+            "confidence": round(candidate.confidence, 4),
+            "source": candidate.source
+        })
+    
+    def close(self):
+        """Write out queued routing decisions and close the log"""
+        if self._routing_log is not None:
+            self._routing_log.shutdown()
+            self._routing_log = None
     
     def list_agents(self) -> List[str]:
         """List all registered agents"""
@@ -68,9 +157,19 @@ class AgentFactory:
     """Factory for creating specialized agents"""
     
     @staticmethod
-    def create_agent_manager(llm_service: ILLMService, default_llm: str = None) -> AgentManager:
+    def create_agent_manager(llm_service: ILLMService, default_llm: str = None,
+                             routing: Optional[RoutingConfig] = None) -> AgentManager:
         """Create and populate agent manager with default agents"""
-        manager = AgentManager(llm_service)
+        routing = routing or RoutingConfig()
+        classifier = None
+        if routing.classifier_training_path:
+            try:
+                classifier = NaiveBayesIntentClassifier.from_jsonl(routing.classifier_training_path)
+                print(f"✅ Trained routing classifier from {routing.classifier_training_path}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Routing classifier unavailable: {e}")
+        router = IntentRouter(classifier, routing.classifier_threshold)
+        manager = AgentManager(llm_service, router, routing.log_path)
         
         # Get default LLM provider
         if not default_llm:
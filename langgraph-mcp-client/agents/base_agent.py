@@ -1,8 +1,33 @@
+import time
+import zlib
 from abc import ABC, abstractmethod
-from typing import Any, List, Dict, Optional
+from contextlib import nullcontext
+from functools import wraps
+from typing import Any, List, Dict, Optional, Tuple
 from models.conversation import Conversation
 from models.message import Message
+from models.context_window import ContextWindowManager, ContextBudgetReport
+from models.stream_event import emit, is_streaming, streaming_to
 from interfaces.llm_interface import ILLMProvider
+from services.llm_service import TieredLLMProvider
+from services.metrics import record_cache
+from services.tracing import current_span, span
+
+try:
+    from langgraph.graph import StateGraph, MessagesState, START
+    from langgraph.prebuilt import ToolNode, tools_condition
+except ImportError:
+    StateGraph = None
+
+def traced_query(process_query):
+    """Record an agent's process_query as a tracing span"""
+    @wraps(process_query)
+    async def wrapper(self, conversation: Conversation, query: str) -> str:
+        with span("agent.process_query", {"agent": self.name, "query_chars": len(query)}) as current:
+            response = await process_query(self, conversation, query)
+            current.set_attribute("response_chars", len(response))
+            return response
+    return wrapper
 
 class BaseAgent(ABC):
     """Base class for all agents"""
@@ -13,6 +38,16 @@ class BaseAgent(ABC):
         self.description = description
         self.tools: List[Any] = []
         self.system_prompt = self._get_default_system_prompt()
+        self.context_manager = ContextWindowManager(
+            budget_tokens=llm_provider.get_model_info().get("context_budget_tokens", 8000),
+            summarizer=self._summarize_messages
+        )
+        self._graph = None
+        self._graph_tools_key: Optional[Tuple[str, ...]] = None
+        self.graph_checkpointer = None
+        self.speculator = None
+        self.graph_stats = {"compiles": 0, "build_ms": 0.0, "compile_ms": 0.0, "queries": 0, "query_ms": 0.0,
+                            "resumed": 0}
     
     def _get_default_system_prompt(self) -> str:
         """Get default system prompt for the agent"""
@@ -29,17 +64,197 @@ Always be helpful, accurate, and provide clear responses."""
         # Update system prompt with new tools
         self.system_prompt = self._get_default_system_prompt()
         print(f"🔧 Agent '{self.name}' loaded {len(tools)} tools")
+        self._refresh_graph()
     
     def add_tool(self, tool: Any):
         """Add a single tool to the agent"""
         self.tools.append(tool)
         self.system_prompt = self._get_default_system_prompt()
+        self._refresh_graph()
+    
+    def get_agent_tools(self) -> List[Any]:
+        """Tool subset this agent works with"""
+        # Override in subclasses to narrow tools to the agent's domain
+        return self.tools
     
     def get_relevant_tools(self, query: str) -> List[Any]:
         """Filter tools relevant to the query"""
-        # Base implementation returns all tools
-        # Override in subclasses for more sophisticated filtering
-        return self.tools
+        return self.get_agent_tools()
+    
+    def set_graph_checkpointer(self, checkpointer: Any):
+        """Persist graph runs with a LangGraph checkpointer so interrupted runs can resume"""
+        self.graph_checkpointer = checkpointer
+        self._graph_tools_key = None
+        self._refresh_graph()
+    
+    def _refresh_graph(self):
+        """Recompile the tool-calling graph only if the agent's tool subset changed"""
+        tools = self.get_agent_tools()
+        key = tuple(tool.name for tool in tools)
+        reuse = key == self._graph_tools_key and self._graph is not None
+        record_cache("agent_graph", reuse)
+        if reuse:
+            return
+        self._graph = None
+        self._graph_tools_key = key
+        if tools and StateGraph is not None:
+            self._graph = self._compile_graph(tools)
+    
+    def _compile_graph(self, tools: List[Any]):
+        """Build and compile a LangGraph tool-calling loop over the given tools"""
+        llm_provider = self.llm_provider
+        
+        async def call_model(state: MessagesState):
+            response = await llm_provider.generate_with_tools(state["messages"], tools)
+            return {"messages": [response]}
+        
+        start = time.perf_counter()
+        builder = StateGraph(MessagesState)
+        builder.add_node("agent", call_model)
+        builder.add_node("tools", ToolNode(tools))
+        builder.add_edge(START, "agent")
+        builder.add_conditional_edges("agent", tools_condition)
+        builder.add_edge("tools", "agent")
+        build_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        graph = builder.compile(checkpointer=self.graph_checkpointer)
+        compile_ms = (time.perf_counter() - start) * 1000
+        
+        self.graph_stats["compiles"] += 1
+        self.graph_stats["build_ms"] += build_ms
+        self.graph_stats["compile_ms"] += compile_ms
+        print(f"🧩 Agent '{self.name}' graph compiled for {len(tools)} tools "
+              f"(build {build_ms:.1f}ms, compile {compile_ms:.1f}ms)")
+        return graph
+    
+    def get_routing_keywords(self) -> List[str]:
+        """Keywords that route queries to this agent"""
+        return []
+    
+    def get_routing_patterns(self) -> List[str]:
+        """Regex patterns (without named groups) that route queries to this agent"""
+        return []
+    
+    def predict_tool_calls(self, query: str, tools: List[Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Tool calls (name, arguments) the model will very likely make for the query, among read-only tools"""
+        # Override in subclasses to enable speculative prefetch
+        return []
+    
+    @staticmethod
+    def _string_argument(tool: Any, value: str, names: Tuple[str, ...] = ()) -> Optional[Dict[str, Any]]:
+        """Arguments for a tool whose only required parameter is a string, optionally with one of the given names"""
+        schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+        required = schema.get("required", [])
+        if len(required) != 1:
+            return None
+        name = required[0]
+        spec = schema.get("properties", {}).get(name, {})
+        if spec.get("type", "string") != "string" or (names and name.lower() not in names):
+            return None
+        if "enum" in spec and value not in spec["enum"]:
+            return None
+        return {name: value}
+    
+    def build_context(self, conversation: Conversation) -> Tuple[List[Message], ContextBudgetReport]:
+        """Budgeted context for this agent, reporting token usage"""
+        context, report = conversation.build_context(self.system_prompt, self.context_manager)
+        print(f"📏 Context: {report.describe()}")
+        return context, report
+    
+    async def _summarize_messages(self, summary: str, messages: List[Message]) -> str:
+        """Fold older turns into the rolling conversation summary"""
+        transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in messages)
+        prompt = f"""Update the conversation summary with the new turns below. Keep names, places, numbers and open requests. Reply with the summary only, in at most 150 words.
+
+Current summary:
+{summary or 'None'}
+
+New turns:
+{transcript}"""
+        # Not part of the answer, so its tokens must not reach a listening stream
+        with streaming_to(None):
+            return await self.llm_provider.generate_response([Message(role="user", content=prompt)])
+    
+    async def _generate_response(self, messages: List[Message], relevant_tools: List[Any],
+                                 conversation: Conversation) -> str:
+        """Generate a response, passing routing hints to the tiered provider"""
+        if isinstance(self.llm_provider, TieredLLMProvider):
+            return await self.llm_provider.generate_response(
+                messages,
+                tool_count=len(relevant_tools),
+                conversation_depth=len(conversation.messages)
+            )
+        return await self.llm_provider.generate_response(messages)
+    
+    async def _run_with_tools(self, messages: List[Message], relevant_tools: List[Any],
+                              conversation: Conversation) -> str:
+        """Answer through the compiled tool graph, or plain generation without one"""
+        if self._graph is None or not relevant_tools:
+            return await self._generate_response(messages, relevant_tools, conversation)
+        
+        start = time.perf_counter()
+        current_span().set_attribute("graph", True)
+        graph_input = {"messages": [{"role": msg.role, "content": msg.content} for msg in messages]}
+        predictions = []
+        if self.speculator is not None:
+            predictions = self.predict_tool_calls(messages[-1].content, self.speculator.read_only(relevant_tools))
+        with self.speculator.scope(predictions, relevant_tools) if predictions else nullcontext():
+            if self.graph_checkpointer is None:
+                final_message = await self._invoke_graph(graph_input, None)
+            else:
+                final_message = await self._run_checkpointed(graph_input, messages, conversation)
+        self.graph_stats["queries"] += 1
+        self.graph_stats["query_ms"] += (time.perf_counter() - start) * 1000
+        
+        content = final_message.content
+        return content if isinstance(content, str) else str(content)
+    
+    async def _invoke_graph(self, graph_input: Optional[dict], config: Optional[dict]) -> Any:
+        """Run the graph to completion, publishing tokens and tool progress when a stream listens"""
+        if not is_streaming():
+            result = await self._graph.ainvoke(graph_input, config)
+            return result["messages"][-1]
+        
+        final_message = None
+        async for mode, payload in self._graph.astream(graph_input, config, stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") == "agent" and isinstance(chunk.content, str) and chunk.content:
+                    emit("token", agent=self.name, content=chunk.content)
+                continue
+            for node, update in payload.items():
+                for message in (update or {}).get("messages", []):
+                    if node == "agent":
+                        final_message = message
+                        for call in getattr(message, "tool_calls", None) or []:
+                            emit("tool_start", agent=self.name, tool=call["name"], args=call["args"])
+                    elif node == "tools":
+                        emit("tool_end", agent=self.name, tool=message.name,
+                             status=getattr(message, "status", "success"), chars=len(str(message.content)))
+        return final_message
+    
+    async def _run_checkpointed(self, graph_input: dict, messages: List[Message],
+                                conversation: Conversation) -> Any:
+        """Run the graph under a per-turn thread, resuming it if a previous attempt was interrupted"""
+        # The thread is keyed by conversation, agent, turn and query, so a retried turn
+        # finds its own checkpoints while fan-out sub-queries stay apart
+        query_hash = zlib.crc32(messages[-1].content.encode("utf-8"))
+        thread_id = f"{conversation.conversation_id}:{self.name}:{len(conversation.messages)}:{query_hash:08x}"
+        config = {"configurable": {"thread_id": thread_id}}
+        
+        state = await self._graph.aget_state(config)
+        if state.next:
+            print(f"♻️ Agent '{self.name}' resuming interrupted run at {', '.join(state.next)}")
+            self.graph_stats["resumed"] += 1
+            final_message = await self._invoke_graph(None, config)
+        else:
+            if state.values:
+                await self.graph_checkpointer.adelete_thread(thread_id)
+            final_message = await self._invoke_graph(graph_input, config)
+        # Finished runs are recorded in the conversation; their graph state is no longer needed
+        await self.graph_checkpointer.adelete_thread(thread_id)
+        return final_message
     
     @abstractmethod
     async def process_query(self, conversation: Conversation, query: str) -> str:
@@ -53,5 +268,6 @@ Always be helpful, accurate, and provide clear responses."""
             "description": self.description,
             "llm_model": self.llm_provider.get_model_info(),
             "tools_count": len(self.tools),
-            "tools": [tool.name for tool in self.tools] if self.tools else []
+            "tools": [tool.name for tool in self.tools] if self.tools else [],
+            "graph": dict(self.graph_stats)
         }
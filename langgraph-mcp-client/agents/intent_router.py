@@ -0,0 +1,186 @@
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+@dataclass
+class RouteCandidate:
+    """Scored routing candidate for a query"""
+    agent_name: str
+    score: float
+    confidence: float
+    matches: List[str] = field(default_factory=list)
+    source: str = "keywords"
+
+class NaiveBayesIntentClassifier:
+    """Lightweight multinomial Naive Bayes classifier over query tokens"""
+    
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.label_counts: Counter = Counter()
+        self.token_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.label_totals: Counter = Counter()
+        self.vocabulary = set()
+    
+    def fit(self, samples: Iterable[Tuple[str, str]]) -> "NaiveBayesIntentClassifier":
+        """Train on (query, agent_name) pairs"""
+        for query, label in samples:
+            tokens = TOKEN_PATTERN.findall(query.lower())
+            self.label_counts[label] += 1
+            self.token_counts[label].update(tokens)
+            self.label_totals[label] += len(tokens)
+            self.vocabulary.update(tokens)
+        return self
+    
+    @classmethod
+    def from_jsonl(cls, path: str, query_key: str = "query", label_key: str = "agent") -> "NaiveBayesIntentClassifier":
+        """Train from a JSONL routing log"""
+        samples = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get(query_key) and record.get(label_key):
+                    samples.append((record[query_key], record[label_key]))
+        return cls().fit(samples)
+    
+    def predict_proba(self, query: str) -> Dict[str, float]:
+        """Return label probabilities for a query"""
+        if not self.label_counts:
+            return {}
+        
+        tokens = TOKEN_PATTERN.findall(query.lower())
+        total_samples = sum(self.label_counts.values())
+        vocabulary_size = len(self.vocabulary) or 1
+        log_scores = {}
+        for label, count in self.label_counts.items():
+            denominator = self.label_totals[label] + self.alpha * vocabulary_size
+            log_score = math.log(count / total_samples)
+            for token in tokens:
+                if token in self.vocabulary:
+                    log_score += math.log((self.token_counts[label][token] + self.alpha) / denominator)
+            log_scores[label] = log_score
+        
+        # Normalize in log space to avoid underflow
+        max_log = max(log_scores.values())
+        exp_scores = {label: math.exp(score - max_log) for label, score in log_scores.items()}
+        total = sum(exp_scores.values())
+        return {label: score / total for label, score in exp_scores.items()}
+
+class IntentRouter:
+    """Scores every registered agent against a query in a single pass"""
+    
+    KEYWORD_WEIGHT = 1.0
+    PATTERN_WEIGHT = 1.5
+    
+    def __init__(self, classifier: Optional[NaiveBayesIntentClassifier] = None,
+                 classifier_threshold: float = 0.6):
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        self._keyword_owners: Dict[str, List[str]] = {}
+        self._max_phrase_tokens = 1
+        self._pattern: Optional[re.Pattern] = None
+        self._pattern_owners: Dict[str, str] = {}
+        self._agent_names: List[str] = []
+    
+    def compile(self, agents: Dict[str, object]):
+        """Compile keywords and patterns of all agents into one matcher"""
+        keyword_owners: Dict[str, List[str]] = defaultdict(list)
+        pattern_owners: Dict[str, str] = {}
+        pattern_groups = []
+        
+        for name, agent in agents.items():
+            for keyword in getattr(agent, 'get_routing_keywords', lambda: [])():
+                phrase = " ".join(TOKEN_PATTERN.findall(keyword.lower()))
+                owners = keyword_owners[phrase]
+                if phrase and name not in owners:
+                    owners.append(name)
+            for pattern in getattr(agent, 'get_routing_patterns', lambda: [])():
+                group = f"p{len(pattern_groups)}"
+                pattern_owners[group] = name
+                pattern_groups.append(f"(?P<{group}>{pattern})")
+        
+        # Keywords become a hashed phrase index, so lookup cost depends on the
+        # query length only; free-form patterns share one compiled regex
+        self._keyword_owners = dict(keyword_owners)
+        self._max_phrase_tokens = max((phrase.count(" ") + 1 for phrase in keyword_owners), default=1)
+        self._pattern_owners = pattern_owners
+        self._pattern = re.compile("|".join(pattern_groups), re.IGNORECASE) if pattern_groups else None
+        self._agent_names = list(agents)
+    
+    def _match_keywords(self, query: str) -> Iterable[Tuple[str, List[str]]]:
+        """Yield (keyword, owners) for the longest keyword phrase at each position"""
+        tokens = TOKEN_PATTERN.findall(query.lower())
+        index = 0
+        while index < len(tokens):
+            matched = 0
+            for length in range(min(self._max_phrase_tokens, len(tokens) - index), 0, -1):
+                phrase = " ".join(tokens[index:index + length])
+                # Accept simple plurals ("forecasts", "updates", "storms")
+                variants = [phrase, phrase[:-1], phrase[:-2]] if phrase.endswith("s") else [phrase]
+                owners = None
+                for variant in variants:
+                    owners = self._keyword_owners.get(variant)
+                    if owners:
+                        phrase = variant
+                        break
+                if owners:
+                    yield phrase, owners
+                    matched = length
+                    break
+            index += matched or 1
+    
+    def rank(self, query: str) -> List[RouteCandidate]:
+        """Return candidates ranked by score with normalized confidence"""
+        scores: Dict[str, float] = defaultdict(float)
+        matches: Dict[str, List[str]] = defaultdict(list)
+        
+        hits = [(term, owners, self.KEYWORD_WEIGHT) for term, owners in self._match_keywords(query)]
+        if self._pattern is not None:
+            for match in self._pattern.finditer(query):
+                hits.append((match.group(), [self._pattern_owners[match.lastgroup]], self.PATTERN_WEIGHT))
+        
+        for term, owners, weight in hits:
+            for owner in owners:
+                # Keywords shared by several agents count less for each
+                scores[owner] += weight / len(owners)
+                matches[owner].append(term)
+        
+        total = sum(scores.values())
+        candidates = [
+            RouteCandidate(agent_name=name, score=score, confidence=score / total, matches=matches[name])
+            for name, score in scores.items()
+        ]
+        candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+        
+        if self.classifier and (not candidates or candidates[0].confidence < self.classifier_threshold):
+            candidates = self._blend_with_classifier(query, candidates)
+        return candidates
+    
+    def _blend_with_classifier(self, query: str, candidates: List[RouteCandidate]) -> List[RouteCandidate]:
+        """Combine keyword confidence with classifier probabilities"""
+        probabilities = {
+            name: probability for name, probability in self.classifier.predict_proba(query).items()
+            if name in self._agent_names
+        }
+        by_name = {candidate.agent_name: candidate for candidate in candidates}
+        
+        blended = []
+        for name in set(probabilities) | set(by_name):
+            candidate = by_name.get(name)
+            probability = probabilities.get(name, 0.0)
+            if candidate:
+                confidence = (candidate.confidence + probability) / 2
+                blended.append(RouteCandidate(name, candidate.score, confidence, candidate.matches, "blended"))
+            else:
+                confidence = probability / 2 if candidates else probability
+                blended.append(RouteCandidate(name, 0.0, confidence, [], "classifier"))
+        
+        blended.sort(key=lambda candidate: candidate.confidence, reverse=True)
+        return blended
@@ -1,17 +1,16 @@
-from typing import List, Any
-from agents.base_agent import BaseAgent
+from typing import Any, Dict, List, Tuple
+from agents.base_agent import BaseAgent, traced_query
 from models.conversation import Conversation
+from models.message import Message
 from interfaces.llm_interface import ILLMProvider
 
+CATEGORY_PARAMETERS = ("category", "topic", "section")
+
 class NewsAgent(BaseAgent):
     """Specialized agent for news and current events queries"""
     
     def __init__(self, llm_provider: ILLMProvider):
-        super().__init__(
-            name="NewsAgent", 
-            llm_provider=llm_provider,
-            description="Specialized in providing current news, trending topics, and analysis of recent events."
-        )
+        # Set before the base constructor, which builds the system prompt from them
         self.news_keywords = [
             'news', 'breaking', 'headlines', 'current events', 'trending',
             'politics', 'business', 'technology', 'sports', 'entertainment',
@@ -21,6 +20,11 @@ class NewsAgent(BaseAgent):
             'general', 'business', 'technology', 'sports', 'health',
             'science', 'entertainment', 'politics', 'world'
         ]
+        super().__init__(
+            name="NewsAgent", 
+            llm_provider=llm_provider,
+            description="Specialized in providing current news, trending topics, and analysis of recent events."
+        )
     
     def _get_default_system_prompt(self) -> str:
         """Get news-specific system prompt"""
@@ -39,10 +43,8 @@ Categories you can help with: {', '.join(self.news_categories)}
 
 Always provide factual, unbiased news information and cite sources when available. For breaking news, emphasize the importance of checking multiple reliable sources."""
     
-    def get_relevant_tools(self, query: str) -> List[Any]:
+    def get_agent_tools(self) -> List[Any]:
         """Filter tools relevant to news queries"""
-        query_lower = query.lower()
-        
         # Return news-specific tools
         news_tools = [
             tool for tool in self.tools 
@@ -52,6 +54,14 @@ Always provide factual, unbiased news information and cite sources when availabl
         
         return news_tools if news_tools else self.tools
     
+    def get_routing_keywords(self) -> List[str]:
+        """News keywords used by the intent router"""
+        return self.news_keywords
+    
+    def get_routing_patterns(self) -> List[str]:
+        """News phrasings not covered by single keywords"""
+        return [r"\bwhat(?:'s| is) happening\b", r"\bwhat happened (?:in|to|with)\b"]
+    
     def is_news_query(self, query: str) -> bool:
         """Check if query is news-related"""
         query_lower = query.lower()
@@ -65,18 +75,26 @@ Always provide factual, unbiased news information and cite sources when availabl
                 return category
         return 'general'  # default category
     
+    def predict_tool_calls(self, query: str, tools: List[Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """A news query will fetch headlines in its category"""
+        category = self.extract_news_category(query)
+        ranked = sorted(tools, key=lambda tool: "headline" not in tool.name.lower())
+        for tool in ranked:
+            arguments = self._string_argument(tool, category, CATEGORY_PARAMETERS)
+            if arguments is not None:
+                return [(tool.name, arguments)]
+        return []
+    
+    @traced_query
     async def process_query(self, conversation: Conversation, query: str) -> str:
         """Process news-related query"""
         try:
-            # Add system message if not present
-            if not conversation.messages or conversation.messages[0].role != "system":
-                conversation.messages.insert(0, 
-                    Message(role="system", content=self.system_prompt)
-                )
-            
             # Add user query
             conversation.add_message("user", query)
             
+            # System prompt, summary and recent turns within the token budget
+            context, context_report = self.build_context(conversation)
+            
             # Get relevant tools and category
             relevant_tools = self.get_relevant_tools(query)
             category = self.extract_news_category(query)
@@ -90,8 +108,8 @@ Available news tools: {[tool.name for tool in relevant_tools]}
 
 Please use the appropriate news tools to fetch current, relevant information. Provide a summary and highlight key points."""
                 
-                # Use LLM with tool context
-                response = await self.llm_provider.generate_response(conversation.messages[-5:])
+                # Run the agent's compiled tool-calling graph
+                response = await self._run_with_tools(context, relevant_tools, conversation)
             else:
                 # Fallback to general news knowledge
                 enhanced_query = f"""As a news specialist, please provide information about: {query}
@@ -100,11 +118,11 @@ Category: {category}
 
 Note: Real-time news data is not currently available. Please provide context based on general knowledge and advise users to check current news from reliable sources for the latest updates."""
                 
-                conversation.messages[-1].content = enhanced_query  
-                response = await self.llm_provider.generate_response(conversation.messages[-3:])
+                context[-1] = Message(role="user", content=enhanced_query)
+                response = await self._generate_response(context, relevant_tools, conversation)
             
             # Add response to conversation
-            conversation.add_message("assistant", response)
+            conversation.add_message("assistant", response, metadata={"context": context_report.to_dict()})
             
             return response
             
@@ -1,8 +1,14 @@
-from typing import List, Any
-from agents.base_agent import BaseAgent
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from agents.base_agent import BaseAgent, traced_query
 from models.conversation import Conversation
+from models.message import Message
 from interfaces.llm_interface import ILLMProvider
 
+# Capitalized place name after "in", "for" or "at", e.g. "weather in New York tomorrow"
+CITY_PATTERN = re.compile(r"\b(?:in|for|at)\s+([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)")
+LOCATION_PARAMETERS = ("city", "city_name", "location", "place")
+
 class WeatherAgent(BaseAgent):
     """Specialized agent for weather-related queries"""
     
@@ -32,10 +38,8 @@ Available weather tools: {[tool.name for tool in self.tools if 'weather' in tool
 
 Always provide accurate, up-to-date weather information and include relevant details like temperature, conditions, and any weather advisories when available."""
     
-    def get_relevant_tools(self, query: str) -> List[Any]:
+    def get_agent_tools(self) -> List[Any]:
         """Filter tools relevant to weather queries"""
-        query_lower = query.lower()
-        
         # Return weather-specific tools
         weather_tools = [
             tool for tool in self.tools 
@@ -45,23 +49,48 @@ Always provide accurate, up-to-date weather information and include relevant det
         
         return weather_tools if weather_tools else self.tools
     
+    def get_routing_keywords(self) -> List[str]:
+        """Weather keywords used by the intent router"""
+        return self.weather_keywords
+    
+    def get_routing_patterns(self) -> List[str]:
+        """Weather phrasings not covered by single keywords"""
+        return [r"\bwill it (?:rain|snow|be (?:hot|cold|warm|sunny))\b", r"\b\d+\s*(?:degrees|°[cf])"]
+    
+    def extract_city(self, query: str) -> Optional[str]:
+        """City named in the query, if any"""
+        match = CITY_PATTERN.search(query)
+        return match.group(1) if match else None
+    
+    def predict_tool_calls(self, query: str, tools: List[Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """A query naming a city will call the forecast (or current weather) tool for it"""
+        city = self.extract_city(query)
+        if not city:
+            return []
+        # Forecast tools first for queries about the future, current-weather tools first otherwise
+        wants_forecast = any(word in query.lower() for word in ("forecast", "tomorrow", "week", "will it"))
+        ranked = sorted(tools, key=lambda tool: ("forecast" in tool.name.lower()) != wants_forecast)
+        for tool in ranked:
+            arguments = self._string_argument(tool, city, LOCATION_PARAMETERS)
+            if arguments is not None:
+                return [(tool.name, arguments)]
+        return []
+    
     def is_weather_query(self, query: str) -> bool:
         """Check if query is weather-related"""
         query_lower = query.lower()
         return any(keyword in query_lower for keyword in self.weather_keywords)
     
+    @traced_query
     async def process_query(self, conversation: Conversation, query: str) -> str:
         """Process weather-related query"""
         try:
-            # Add system message if not present
-            if not conversation.messages or conversation.messages[0].role != "system":
-                conversation.messages.insert(0, 
-                    Message(role="system", content=self.system_prompt)
-                )
-            
             # Add user query
             conversation.add_message("user", query)
             
+            # System prompt, summary and recent turns within the token budget
+            context, context_report = self.build_context(conversation)
+            
             # Get relevant tools for this query
             relevant_tools = self.get_relevant_tools(query)
             
@@ -74,19 +103,19 @@ Available weather tools: {[tool.name for tool in relevant_tools]}
 
 Please use the appropriate weather tools to provide accurate, current information."""
                 
-                # Use LLM with tool context (this would integrate with your workflow)
-                response = await self.llm_provider.generate_response(conversation.messages[-5:])
+                # Run the agent's compiled tool-calling graph
+                response = await self._run_with_tools(context, relevant_tools, conversation)
             else:
                 # Fallback to general weather knowledge
                 enhanced_query = f"""As a weather specialist, please provide information about: {query}
 
 Note: Real-time weather data is not currently available, so provide general weather information and advice users to check current conditions from reliable weather services."""
                 
-                conversation.messages[-1].content = enhanced_query
-                response = await self.llm_provider.generate_response(conversation.messages[-3:])
+                context[-1] = Message(role="user", content=enhanced_query)
+                response = await self._generate_response(context, relevant_tools, conversation)
             
             # Add response to conversation
-            conversation.add_message("assistant", response)
+            conversation.add_message("assistant", response, metadata={"context": context_report.to_dict()})
             
             return response
             
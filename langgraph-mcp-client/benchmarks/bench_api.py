@@ -0,0 +1,78 @@
+"""Load test of the HTTP API client against a fake LLM.
+
+Requests go through the full ASGI stack in-process (no sockets), so the
+numbers show the overhead of the API, sessions and workflow on top of the
+fake model latency.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_api [--sessions 200] [--turns 5] [--concurrency 32] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+import httpx
+from benchmarks.fakes import create_fake_llm_service
+from clients.api_client import APIClient
+from config.settings import APIConfig
+from workflows.react_workflow import ReactWorkflow
+
+QUERIES = [
+    "What's the weather forecast for Paris tomorrow?",
+    "Show me the latest technology headlines",
+    "Will it rain in London this weekend?",
+    "Any breaking news about the stock market?",
+]
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_session(client: httpx.AsyncClient, turns: int, latencies: List[float], stream: bool):
+    """One user: create a session and send turns one after another"""
+    response = await client.post("/sessions")
+    conversation_id = response.json()["conversation_id"]
+    for turn in range(turns):
+        query = QUERIES[turn % len(QUERIES)]
+        start = time.perf_counter()
+        if stream:
+            async with client.stream("POST", f"/sessions/{conversation_id}/stream", json={"query": query}) as response:
+                async for _ in response.aiter_lines():
+                    pass
+        else:
+            response = await client.post(f"/sessions/{conversation_id}/messages", json={"query": query})
+            response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run(sessions: int, turns: int, concurrency: int, latency_ms: float, stream: bool):
+    workflow = ReactWorkflow(create_fake_llm_service(latency_ms), "fake")
+    api = APIClient(workflow, APIConfig(max_concurrency=concurrency, max_sessions=sessions))
+    transport = httpx.ASGITransport(app=api.app)
+    latencies: List[float] = []
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_session(client, turns, latencies, stream) for _ in range(sessions)))
+        elapsed = time.perf_counter() - start
+    
+    print(f"\n{'stream' if stream else 'request/response'}: {sessions} sessions x {turns} turns, "
+          f"concurrency {concurrency}, fake LLM {latency_ms:.0f}ms")
+    print(f"   requests/s: {len(latencies) / elapsed:8.1f}")
+    print(f"   p50: {percentile(latencies, 0.50):8.1f}ms   p95: {percentile(latencies, 0.95):8.1f}ms   "
+          f"p99: {percentile(latencies, 0.99):8.1f}ms   mean: {statistics.mean(latencies):8.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    
+    for stream in (False, True):
+        asyncio.run(run(args.sessions, args.turns, args.concurrency, args.latency_ms, stream))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""First-query latency of hot read-only tool calls with and without background cache warming.
+
+Serves a FastMCP server with headline, weather and flight-catalog tools of a
+given backend latency, then asks for every warmed call once: first against a
+cold tool result cache, then after the cache warmer's first round. A second
+phase puts demand on a few targets and shows their refresh periods shrink
+while unused ones back off; a third makes the backend fail and counts the
+refreshes skipped while it is unhealthy.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_cache_warming
+    python -m benchmarks.bench_cache_warming --server-latency-ms 300 --interval-s 2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from typing import Any, Dict, List
+from fastmcp import FastMCP
+from agents.news_agent import NewsAgent
+from agents.weather_agent import WeatherAgent
+from benchmarks.fake_mcp_server import serve_mcp_server
+from benchmarks.fakes import FakeLLMProvider
+from config.settings import CacheWarmerConfig, MCPServerConfig, ToolCacheConfig
+from services.cache_warmer import CacheWarmer
+from services.mcp_service import MCPServiceFactory
+from services.tool_cache import ToolResultCache
+
+CITIES = ["London", "New York", "Tokyo", "Paris", "Mumbai"]
+
+def build_server(latency_ms: float, backend: Dict[str, bool]) -> FastMCP:
+    """Read-only tools whose backend takes latency_ms and fails while backend["down"] is set"""
+    mcp = FastMCP("fake-hot-data")
+    
+    async def backend_call(payload: Dict[str, Any]) -> str:
+        await asyncio.sleep(latency_ms / 1000)
+        if backend["down"]:
+            raise RuntimeError("backend unavailable")
+        return json.dumps(payload)
+    
+    @mcp.tool
+    async def get_news_headlines(category: str) -> str:
+        """Latest news headlines in a category"""
+        return await backend_call({"category": category, "headlines": [f"{category} story {i}" for i in range(5)]})
+    
+    @mcp.tool
+    async def get_current_weather(city: str) -> str:
+        """Current weather for a city"""
+        return await backend_call({"city": city, "temperature_c": 21})
+    
+    @mcp.tool
+    async def get_available_flights() -> str:
+        """All flights with available seats"""
+        return await backend_call({"flights": [f"AI-{100 + i}" for i in range(20)]})
+    
+    return mcp
+
+async def first_query_ms(tools: Dict[str, Any], warmer: CacheWarmer) -> List[float]:
+    """Latency of asking for every target once, as a query would"""
+    latencies = []
+    for target in list(warmer.targets.values()):
+        start = time.perf_counter()
+        await tools[target.tool].ainvoke(target.arguments)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def summary(latencies: List[float]) -> str:
+    ordered = sorted(latencies)
+    return f"mean {sum(ordered) / len(ordered):8.1f}ms   max {ordered[-1]:8.1f}ms"
+
+async def run(server_latency_ms: float, interval_s: float):
+    backend = {"down": False}
+    url, server, task = await serve_mcp_server(build_server(server_latency_ms, backend))
+    cache_config = ToolCacheConfig(enabled=True, ttl_s=interval_s * 1.5)
+    warmer_config = CacheWarmerConfig(enabled=True, interval_s=interval_s, min_interval_s=interval_s / 4,
+                                      max_interval_s=interval_s * 4, concurrency=4, failure_threshold=2)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = await MCPServiceFactory.create_mcp_service([MCPServerConfig(name="hot-data", url=url)])
+            registry = service.registry
+            cache = ToolResultCache(cache_config, registry.tools)
+            service.add_middleware(cache.middleware)
+            warmer = CacheWarmer(registry, cache, warmer_config)
+            service.add_middleware(warmer.health.middleware)
+            agents = [NewsAgent(FakeLLMProvider()), WeatherAgent(FakeLLMProvider())]
+            for agent in agents:
+                agent.set_tools(registry.tools)
+            warmer.add_agent_targets(agents, CITIES)
+            warmer.add_tool_targets(["get_available_flights"])
+        tools = {tool.name: tool for tool in registry.tools}
+        print(f"{len(warmer.targets)} warmed calls, backend latency {server_latency_ms:.0f}ms\n")
+        
+        print(f"{'cold cache':<14} {summary(await first_query_ms(tools, warmer))}")
+        cache.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            warmer.start()
+        while warmer.stats["refreshed"] < len(warmer.targets):
+            await asyncio.sleep(0.05)
+        print(f"{'warmed cache':<14} {summary(await first_query_ms(tools, warmer))}")
+        
+        hot = [target for target in warmer.targets.values() if target.tool != "get_news_headlines"][:3]
+        print(f"\nDemand on {len(hot)} targets for {interval_s * 3:.0f}s:")
+        end = time.monotonic() + interval_s * 3
+        while time.monotonic() < end:
+            for target in hot:
+                await tools[target.tool].ainvoke(target.arguments)
+            await asyncio.sleep(interval_s / 10)
+        cold = [target for target in warmer.targets.values() if target not in hot]
+        print(f"  {'hot':<6} refresh every {min(t.interval_s for t in hot):.2f}-{max(t.interval_s for t in hot):.2f}s")
+        print(f"  {'unused':<6} refresh every {min(t.interval_s for t in cold):.2f}-"
+              f"{max(t.interval_s for t in cold):.2f}s (base {interval_s:g}s)")
+        
+        before = dict(warmer.stats)
+        backend["down"] = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.sleep(interval_s * 3)
+        failed, skipped = (warmer.stats[outcome] - before[outcome] for outcome in ("failed", "skipped"))
+        print(f"\nBackend down for {interval_s * 3:.0f}s: {failed} refreshes failed, {skipped} skipped")
+        await warmer.stop()
+    finally:
+        server.should_exit = True
+        await task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server-latency-ms", type=float, default=200.0, help="backend time per tool call")
+    parser.add_argument("--interval-s", type=float, default=2.0, help="base refresh period")
+    args = parser.parse_args()
+    asyncio.run(run(args.server_latency_ms, args.interval_s))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Memory per message and per-turn serialization cost of the conversation store.
+
+The compact store encodes only the messages added since the previous turn, so
+its encoding time per turn must stay flat as the conversation grows; the run
+fails if the last turns cost more than FLAT_RATIO times the first ones.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_conversation
+"""
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from models.conversation import Conversation
+
+FLAT_RATIO = 2.0  # allowed growth of the per-turn encoding time from the first to the last turns
+
+@dataclass
+class LegacyMessage:
+    """The previous Message layout: regular dataclass with a datetime"""
+    role: str
+    content: str
+    timestamp: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
+    
+    def __post_init__(self):
+        if self.timestamp is None:
+            self.timestamp = datetime.now()
+    
+    def to_dict(self) -> dict:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "metadata": self.metadata
+        }
+
+def bytes_per_message(sessions: int, messages_per_session: int, legacy: bool, serialize: bool = False) -> float:
+    """Allocated bytes per message still held after the sessions are built (and serialized), content excluded"""
+    contents = [f"message body {i}" for i in range(messages_per_session)]
+    roles = ["user", "assistant"]
+    
+    def fresh_role(i: int) -> str:
+        # Roles usually arrive as new string objects (parsed requests, JSON)
+        role = roles[i % 2]
+        return role[:2] + role[2:]
+    
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    if legacy:
+        store = [[LegacyMessage(role=fresh_role(i), content=contents[i]) for i in range(messages_per_session)]
+                 for _ in range(sessions)]
+    else:
+        store = []
+        for _ in range(sessions):
+            conversation = Conversation()
+            for i in range(messages_per_session):
+                conversation.add_message(fresh_role(i), contents[i])
+            store.append(conversation)
+    if serialize:
+        # Whatever serialization keeps alive is part of the footprint; the dicts themselves are discarded
+        for conversation in store:
+            if legacy:
+                [msg.to_dict() for msg in conversation]
+            else:
+                conversation.to_langgraph_json()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return (after - before) / (sessions * messages_per_session)
+
+def serialization_ms(turns: int, legacy: bool) -> float:
+    """Total time serializing the conversation to JSON after every turn"""
+    if legacy:
+        messages: List[LegacyMessage] = []
+        start = time.perf_counter()
+        for turn in range(turns):
+            messages.append(LegacyMessage(role="user", content=f"question {turn}"))
+            messages.append(LegacyMessage(role="assistant", content=f"answer {turn}"))
+            json.dumps({"messages": [msg.to_dict() for msg in messages]}, default=str)
+        return (time.perf_counter() - start) * 1000
+    
+    conversation = Conversation()
+    start = time.perf_counter()
+    for turn in range(turns):
+        conversation.add_message("user", f"question {turn}")
+        conversation.add_message("assistant", f"answer {turn}")
+        conversation.to_langgraph_json()
+    return (time.perf_counter() - start) * 1000
+
+def encoding_us_per_turn(turns: int, window: int = 100) -> Tuple[float, float]:
+    """Mean time encoding a turn's messages over the first and the last window turns"""
+    conversation = Conversation()
+    times = []
+    for turn in range(turns):
+        conversation.add_message("user", f"question {turn}")
+        conversation.add_message("assistant", f"answer {turn}")
+        start = time.perf_counter()
+        conversation.messages.encoded()
+        times.append(time.perf_counter() - start)
+    return sum(times[:window]) / window * 1e6, sum(times[-window:]) / window * 1e6
+
+def main():
+    print("Bytes per message (1000 sessions x 50 messages, content excluded)")
+    print(f"{'':<18} {'built':>8} {'serialized':>11}")
+    for label, legacy in (("legacy dataclass", True), ("compact store", False)):
+        built = bytes_per_message(1000, 50, legacy)
+        serialized = bytes_per_message(1000, 50, legacy, serialize=True)
+        print(f"  {label:<16} {built:>8.1f} {serialized:>11.1f}")
+    
+    print("\nSerialization after every turn (total ms)")
+    print(f"{'turns':>8} {'legacy':>10} {'compact':>10}")
+    for turns in [10, 100, 1000]:
+        print(f"{turns:>8} {serialization_ms(turns, True):>10.1f} {serialization_ms(turns, False):>10.1f}")
+    
+    first, last = encoding_us_per_turn(5000)
+    print(f"\nEncoding per turn over 5000 turns: first 100 {first:.1f}us, last 100 {last:.1f}us")
+    if last > first * FLAT_RATIO:
+        raise SystemExit(f"Per-turn encoding grew {last / first:.1f}x; it should stay flat")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Event-loop liveness while a terminal client waits for input.
+
+A background heartbeat ticks every 10ms while the client waits for a line that
+arrives on a pipe after a delay, first with a blocking readline as input() does,
+then with AsyncLineReader. With the blocking read the heartbeat (standing in for
+keepalives, cache refresh and the MCP supervisor's watchdog) stalls for the whole
+wait.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_input_loop
+    python -m benchmarks.bench_input_loop --delay 2
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, TextIO
+from clients.async_input import AsyncLineReader
+
+HEARTBEAT_S = 0.01
+
+async def heartbeat(ticks: list):
+    """Record the time of every tick"""
+    while True:
+        ticks.append(time.perf_counter())
+        await asyncio.sleep(HEARTBEAT_S)
+
+def write_later(fd: int, delay: float):
+    """Type a line into the pipe after the delay, as a user would"""
+    def write():
+        time.sleep(delay)
+        os.write(fd, b"show available flights\n")
+        os.close(fd)
+    threading.Thread(target=write, daemon=True).start()
+
+async def measure(label: str, read: Callable[[TextIO], Awaitable[str]], delay: float):
+    read_fd, write_fd = os.pipe()
+    stream = os.fdopen(read_fd, "r")
+    ticks: list = []
+    beat = asyncio.create_task(heartbeat(ticks))
+    await asyncio.sleep(0)
+    write_later(write_fd, delay)
+    start = time.perf_counter()
+    line = await read(stream)
+    waited = time.perf_counter() - start
+    beat.cancel()
+    stream.close()
+    
+    gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+    stall_ms = max(gaps, default=waited) * 1000
+    print(f"{label:<22} {len(ticks):>8} {waited * 1000:>10.0f} {stall_ms:>14.0f}   {line!r}")
+
+async def blocking_read(stream: TextIO) -> str:
+    # What input() does inside a coroutine: the whole loop waits on the read
+    return stream.readline().rstrip("\n")
+
+async def async_read(stream: TextIO) -> str:
+    return await AsyncLineReader(stream).readline()
+
+async def run(delay: float):
+    print(f"{'reader':<22} {'ticks':>8} {'waited ms':>10} {'max stall ms':>14}   line")
+    await measure("blocking readline", blocking_read, delay)
+    await measure("AsyncLineReader", async_read, delay)
+    print(f"\nExpected about {delay / HEARTBEAT_S:.0f} ticks if the loop stays live")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds before the line arrives")
+    args = parser.parse_args()
+    asyncio.run(run(args.delay))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Token delivery latency of the realtime WebSocket client against a local peer.
+
+Starts the server on a free local port with a fake LLM that emits tokens at a
+fixed rate, connects a WebSocket peer and reports, per flush interval:
+time to first token, token delivery lag (generation to receipt), frames per
+token and how long an interrupt takes to stop generation.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_realtime [--tokens 200] [--token-interval-ms 2]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+import uvicorn
+import websockets
+from benchmarks.fakes import create_fake_llm_service
+from clients.webrtc_client import RealtimeClient
+from config.settings import RealtimeConfig
+from workflows.react_workflow import ReactWorkflow
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def start_server(client: RealtimeClient):
+    """Serve the client's app on a free port"""
+    server = uvicorn.Server(uvicorn.Config(client.app, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+async def measure_stream(url: str, query: str):
+    """Send one query and collect per-token delivery lag until the final answer"""
+    lags: List[float] = []
+    frames = tokens = 0
+    async with websockets.connect(url) as peer:
+        json.loads(await peer.recv())  # session
+        start = time.time()
+        await peer.send(json.dumps({"type": "query", "id": 1, "query": query}))
+        first_token_ms = None
+        async for raw in peer:
+            message = json.loads(raw)
+            if message["type"] == "frame":
+                received = time.time()
+                frames += 1
+                for event in message["events"]:
+                    if event["type"] == "token":
+                        tokens += event.get("tokens", 1)
+                        lags.append((received - event["created_at"]) * 1000)
+                        if first_token_ms is None:
+                            first_token_ms = (received - start) * 1000
+            elif message["type"] in ("final", "error"):
+                break
+    return first_token_ms, lags, frames, tokens
+
+async def measure_interrupt(url: str, query: str, after_tokens: int = 20) -> float:
+    """Interrupt mid-generation; time from sending the interrupt to its acknowledgement"""
+    async with websockets.connect(url) as peer:
+        json.loads(await peer.recv())
+        await peer.send(json.dumps({"type": "query", "id": 1, "query": query}))
+        seen = 0
+        sent_at = None
+        async for raw in peer:
+            message = json.loads(raw)
+            if message["type"] == "frame" and sent_at is None:
+                seen += sum(event.get("tokens", 1) for event in message["events"] if event["type"] == "token")
+                if seen >= after_tokens:
+                    sent_at = time.perf_counter()
+                    await peer.send(json.dumps({"type": "interrupt"}))
+            elif message["type"] == "interrupted":
+                return (time.perf_counter() - sent_at) * 1000
+            elif message["type"] == "final":
+                return float("nan")
+
+async def run(tokens: int, token_interval_ms: float):
+    query = "Tell me a story about the sea"
+    print(f"Fake LLM: {tokens} tokens every {token_interval_ms}ms\n")
+    print(f"{'flush ms':>9} {'TTFT ms':>8} {'lag p50':>8} {'lag p99':>8} {'frames':>7} {'tokens':>7} {'interrupt ms':>13}")
+    for flush_ms in (0.0, 2.0, 5.0, 10.0):
+        llm_service = create_fake_llm_service(0.0, response_tokens=tokens, token_interval_ms=token_interval_ms)
+        client = RealtimeClient(ReactWorkflow(llm_service, "fake"), RealtimeConfig(flush_interval_ms=flush_ms))
+        server, server_task = await start_server(client)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        url = f"ws://127.0.0.1:{port}/ws"
+        
+        first_token_ms, lags, frames, received = await measure_stream(url, query)
+        interrupt_ms = await measure_interrupt(url, query)
+        print(f"{flush_ms:>9.1f} {first_token_ms:>8.2f} {statistics.median(lags):>8.2f} "
+              f"{percentile(lags, 0.99):>8.2f} {frames:>7} {received:>7} {interrupt_ms:>13.2f}")
+        
+        server.should_exit = True
+        await server_task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-interval-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.tokens, args.token_interval_ms))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Routing cost as the number of registered agents grows.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_routing
+"""
+import random
+import string
+import time
+from typing import Dict, List
+from agents.intent_router import IntentRouter
+
+QUERIES = [
+    "What's the weather forecast for Paris tomorrow?",
+    "Show me the latest technology headlines",
+    "Will it rain in London this weekend?",
+    "Tell me a joke about programmers",
+    "Breaking news about the stock market and business updates",
+]
+
+class SyntheticAgent:
+    """Stand-in agent exposing only routing keywords"""
+    
+    def __init__(self, name: str, keywords: List[str]):
+        self.name = name
+        self.keywords = keywords
+    
+    def get_routing_keywords(self) -> List[str]:
+        return self.keywords
+    
+    def is_query(self, query: str) -> bool:
+        query_lower = query.lower()
+        return any(keyword in query_lower for keyword in self.keywords)
+
+def build_agents(count: int, keywords_per_agent: int = 15) -> Dict[str, SyntheticAgent]:
+    """Create agents with random keywords plus the two real domains"""
+    rng = random.Random(42)
+    agents = {
+        "WeatherAgent": SyntheticAgent("WeatherAgent", ["weather", "forecast", "rain", "temperature"]),
+        "NewsAgent": SyntheticAgent("NewsAgent", ["news", "headlines", "latest", "breaking"]),
+    }
+    for index in range(max(count - 2, 0)):
+        keywords = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))) for _ in range(keywords_per_agent)]
+        agents[f"Agent{index}"] = SyntheticAgent(f"Agent{index}", keywords)
+    return agents
+
+def time_per_query(func, iterations: int) -> float:
+    """Average microseconds per routed query"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in QUERIES:
+            func(query)
+    return (time.perf_counter() - start) / (iterations * len(QUERIES)) * 1e6
+
+def main():
+    print(f"{'agents':>8} {'compile ms':>11} {'router us/q':>12} {'linear us/q':>12}")
+    for count in [2, 10, 50, 200, 1000]:
+        agents = build_agents(count)
+        router = IntentRouter()
+        start = time.perf_counter()
+        router.compile(agents)
+        compile_ms = (time.perf_counter() - start) * 1000
+        
+        iterations = 200
+        router_us = time_per_query(router.rank, iterations)
+        linear_us = time_per_query(
+            lambda query: [name for name, agent in agents.items() if agent.is_query(query)], iterations
+        )
+        print(f"{count:>8} {compile_ms:>11.2f} {router_us:>12.1f} {linear_us:>12.1f}")
+
+if __name__ == "__main__":
+    main()
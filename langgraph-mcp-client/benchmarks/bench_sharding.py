@@ -0,0 +1,130 @@
+"""Throughput of the sharded API with one to N worker processes against a fake LLM.
+
+Each configuration starts a ShardedAPIClient over TCP with its workers (a full
+Application each, with the fake LLM service), then drives many concurrent
+sessions through the front dispatcher from a separate load process. Failed
+requests are counted and reported rather than ending the run. With CPU-bound
+orchestration per query, requests per second should grow with the number of
+workers up to the number of cores; on a single core the extra processes only
+add dispatch overhead, and with every session waiting on the one CPU the mean
+latency is simply sessions / requests per second.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_sharding
+    python -m benchmarks.bench_sharding --workers 1,2,4,8 --sessions 400 --latency-ms 5
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import httpx
+from benchmarks.bench_api import QUERIES, percentile
+from benchmarks.fakes import create_fake_llm_service
+from clients.sharded_api_client import ShardedAPIClient
+from config.settings import APIConfig, AppSettings
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+@contextlib.contextmanager
+def silenced_children():
+    """Processes started inside inherit /dev/null as stdout; their per-query logging would swamp the results"""
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+async def run_session(client: httpx.AsyncClient, turns: int, latencies: List[float], failures: List[str]):
+    """One conversation; a failed request is recorded and ends the session instead of the run"""
+    try:
+        response = await client.post("/sessions")
+        response.raise_for_status()
+        conversation_id = response.json()["conversation_id"]
+        for turn in range(turns):
+            start = time.perf_counter()
+            response = await client.post(f"/sessions/{conversation_id}/messages",
+                                         json={"query": QUERIES[turn % len(QUERIES)]})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+    except httpx.HTTPStatusError as e:
+        failures.append(str(e.response.status_code))
+    except httpx.TransportError as e:
+        failures.append(type(e).__name__)
+
+async def load(port: int, sessions: int, turns: int) -> Tuple[List[float], List[str], float]:
+    latencies: List[float] = []
+    failures: List[str] = []
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+        await run_session(client, 1, [], failures)  # first request through every layer
+        start = time.perf_counter()
+        await asyncio.gather(*(run_session(client, turns, latencies, failures) for _ in range(sessions)))
+        return latencies, failures, time.perf_counter() - start
+
+def drive_load(port: int, sessions: int, turns: int) -> Tuple[List[float], List[str], float]:
+    """Load process entry point: latencies, failures and elapsed seconds of all sessions"""
+    return asyncio.run(load(port, sessions, turns))
+
+async def measure(workers: int, sessions: int, turns: int, latency_ms: float) -> Dict[str, float]:
+    port = free_port()
+    settings = AppSettings(mcp_servers=[], llm_configs=[], default_llm="fake", client_type="api",
+                           api=APIConfig(port=port, workers=workers, max_concurrency=256, max_sessions=sessions))
+    api = ShardedAPIClient(settings, functools.partial(create_fake_llm_service, latency_ms))
+    with contextlib.redirect_stdout(io.StringIO()), silenced_children():
+        serving = asyncio.create_task(api.start())
+        while api.server is None or not api.server.started:
+            if serving.done():
+                serving.result()
+            await asyncio.sleep(0.05)
+    
+    try:
+        # The load runs in its own process: sharing the dispatcher's event loop, it would delay the very
+        # requests it times, which showed up as multi-second p95 latencies
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            latencies, failures, elapsed = await asyncio.get_running_loop().run_in_executor(
+                pool, drive_load, port, sessions, turns)
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await api.stop()
+            await serving
+    measured = latencies or [float("nan")]  # every request failed
+    return {"rps": len(latencies) / elapsed, "p50": percentile(measured, 0.5), "p95": percentile(measured, 0.95),
+            "failed": len(failures), "errors": ", ".join(f"{error} x{failures.count(error)}"
+                                                          for error in sorted(set(failures)))}
+
+async def run(worker_counts: List[int], sessions: int, turns: int, latency_ms: float):
+    print(f"{sessions} sessions x {turns} turns, fake LLM {latency_ms:.0f}ms, {os.cpu_count()} CPUs\n")
+    print(f"{'workers':>8} {'requests/s':>11} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7}")
+    baseline = None
+    for workers in worker_counts:
+        result = await measure(workers, sessions, turns, latency_ms)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>8} {result['rps']:>11.1f} {result['rps'] / baseline:>7.2f}x "
+              f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['failed']:>7} {result['errors']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    default_workers = ",".join(str(count) for count in sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--workers", default=default_workers, help="comma-separated worker counts")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run([int(count) for count in args.workers.split(",")], args.sessions, args.turns, args.latency_ms))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Cost of local tool argument validation against the round trip it saves.
+
+Loads the tools of a FastMCP travel server (flat, enum, nested-model and list
+parameters), compiles their schemas, then times the check per call for valid,
+coercible and malformed arguments, next to jsonschema's validator when it is
+installed. Finally a malformed call is made through the tool registry with and
+without the validator: without it the mistake is only found by the server.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_validation
+    python -m benchmarks.bench_validation --server-latency-ms 150 --calls 20000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from typing import Any, Callable, Dict, List, Literal
+from fastmcp import FastMCP
+from pydantic import BaseModel
+from benchmarks.fake_mcp_server import serve_mcp_server
+from config.settings import MCPServerConfig
+from services.mcp_service import MCPServiceFactory
+from services.tool_validation import ToolArgumentValidator
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+class Passenger(BaseModel):
+    name: str
+    age: int
+
+CASES = [
+    ("valid", "search_flights", {"from_city": "Delhi", "to_city": "Mumbai", "date": "2025-03-01", "passengers": 2}),
+    ("coerced", "search_flights", {"from_city": "Delhi", "to_city": "Mumbai", "date": "2025-03-01",
+                                   "passengers": "2", "cabin": "Business"}),
+    ("valid nested", "book_flight", {"flight_id": "AI-101", "passengers": [{"name": "A", "age": 30}] * 3}),
+    ("malformed", "book_flight", {"flight": "AI-101", "passengers": [{"name": "A", "age": "thirty"}]}),
+]
+
+def build_travel_server(latency_ms: float) -> FastMCP:
+    """Travel tools whose backend call takes latency_ms"""
+    mcp = FastMCP("fake-travel")
+    
+    @mcp.tool
+    async def search_flights(from_city: str, to_city: str, date: str, passengers: int = 1,
+                             cabin: Literal["economy", "business"] = "economy") -> str:
+        """Search flights between two cities"""
+        await asyncio.sleep(latency_ms / 1000)
+        return json.dumps({"from": from_city, "to": to_city, "date": date, "cabin": cabin})
+    
+    @mcp.tool
+    async def book_flight(flight_id: str, passengers: List[Passenger]) -> str:
+        """Book a flight for the passengers"""
+        await asyncio.sleep(latency_ms / 1000)
+        return json.dumps({"booking_id": f"B-{flight_id}", "passengers": len(passengers)})
+    
+    return mcp
+
+def per_call_us(check: Callable[[], Any], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        check()
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+def jsonschema_check(validator: Any, arguments: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: list(validator.iter_errors(arguments))
+
+async def malformed_call_ms(tools: List[Any]) -> float:
+    """Time until a malformed call fails"""
+    tool = next(tool for tool in tools if tool.name == "book_flight")
+    start = time.perf_counter()
+    try:
+        await tool.ainvoke(CASES[-1][2])
+    except Exception:
+        pass
+    return (time.perf_counter() - start) * 1000
+
+async def run(server_latency_ms: float, calls: int):
+    url, server, task = await serve_mcp_server(build_travel_server(server_latency_ms))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = await MCPServiceFactory.create_mcp_service([MCPServerConfig(name="travel", url=url)])
+            validator = ToolArgumentValidator(service.registry.tools)
+        print(f"Compiled {len(validator.validators)} validators in {validator.build_ms:.2f}ms\n")
+        
+        schemas = {tool.name: tool.args_schema for tool in service.registry.tools}
+        print(f"{'arguments':<14} {'compiled us':>12} {'jsonschema us':>14}   problems")
+        for label, tool, arguments in CASES:
+            compiled = per_call_us(lambda: validator.validate(tool, arguments), calls)
+            reference = "-"
+            if jsonschema is not None:
+                checker = jsonschema.validators.validator_for(schemas[tool])(schemas[tool])
+                reference = f"{per_call_us(jsonschema_check(checker, arguments), calls):.1f}"
+            _, problems = validator.validate(tool, arguments)
+            print(f"{label:<14} {compiled:>12.1f} {reference:>14}   {[problem['path'] for problem in problems]}")
+        
+        print(f"\nMalformed call, server latency {server_latency_ms:.0f}ms:")
+        print(f"  {'server round trip':<18} {await malformed_call_ms(service.registry.tools):>8.1f}ms")
+        service.add_middleware(validator.middleware)
+        print(f"  {'local validation':<18} {await malformed_call_ms(service.registry.tools):>8.1f}ms")
+    finally:
+        server.should_exit = True
+        await task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server-latency-ms", type=float, default=100.0, help="backend time per tool call")
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(run(args.server_latency_ms, args.calls))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""LLM calls and wall-clock time of ReactWorkflow versus PlanExecuteWorkflow on a multi-step task.
+
+A scripted LLM plays both roles for the same four-step travel task (search a
+flight, book it, book a cab at arrival, list hotels there); the planner reply is
+a dependency graph, while the ReAct agent calls tools one turn at a time, either
+one call per turn or every ready call at once.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.bench_workflows
+    python -m benchmarks.bench_workflows --llm-latency-ms 500 --tool-latency-ms 200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+from fastmcp import FastMCP
+from langchain_core.messages import AIMessage
+from benchmarks.fake_mcp_server import serve_mcp_server
+from benchmarks.fakes import FakeLLMProvider
+from config.settings import AppSettings, MCPServerConfig, WorkflowConfig
+from main import Application
+from models.conversation import Conversation
+from models.message import Message
+from services.llm_service import LLMService, llm_span
+from services.metrics import LLM_LATENCY, timed
+from workflows.plan_execute_workflow import PLANNER_PROMPT
+
+QUERY = "Find a flight from Delhi to Mumbai, book it, then book a cab at the arrival airport and list hotels there"
+
+# (id, tool, arguments as the planner writes them, arguments after substitution, dependencies)
+TASK = [
+    ("s1", "search_flights", {"from_city": "Delhi", "to_city": "Mumbai"}, {"from_city": "Delhi", "to_city": "Mumbai"}, []),
+    ("s2", "book_flight", {"flight_id": "${s1.flight_id}"}, {"flight_id": "AI-101"}, ["s1"]),
+    ("s3", "book_cab", {"location": "${s1.arrival_airport}"}, {"location": "BOM"}, ["s1"]),
+    ("s4", "list_hotels", {"city": "Mumbai"}, {"city": "Mumbai"}, []),
+]
+
+def build_travel_server(latency_ms: float) -> FastMCP:
+    """Travel tools with a fixed latency"""
+    mcp = FastMCP("fake-travel")
+    
+    async def pause():
+        await asyncio.sleep(latency_ms / 1000)
+    
+    @mcp.tool
+    async def search_flights(from_city: str, to_city: str) -> str:
+        """Search flights between two cities"""
+        await pause()
+        return json.dumps({"flight_id": "AI-101", "from": from_city, "to": to_city, "arrival_airport": "BOM"})
+    
+    @mcp.tool
+    async def book_flight(flight_id: str) -> str:
+        """Book a flight by id"""
+        await pause()
+        return json.dumps({"booking_id": f"B-{flight_id}", "status": "confirmed"})
+    
+    @mcp.tool
+    async def book_cab(location: str) -> str:
+        """Book a cab at a location"""
+        await pause()
+        return json.dumps({"cab_id": "C-7", "pickup": location})
+    
+    @mcp.tool
+    async def list_hotels(city: str) -> str:
+        """List hotels in a city"""
+        await pause()
+        return json.dumps([{"name": f"Hotel {index}", "city": city} for index in range(3)])
+    
+    return mcp
+
+class ScriptedTravelLLM(FakeLLMProvider):
+    """Plans the travel task as a DAG, or walks it as a ReAct agent would"""
+    
+    def __init__(self, latency_ms: float, parallel_tool_calls: bool):
+        super().__init__("scripted", latency_ms)
+        self.parallel_tool_calls = parallel_tool_calls
+    
+    async def generate_response(self, messages: List[Message]) -> str:
+        if not (messages and messages[0].content.startswith(PLANNER_PROMPT[:60])):
+            return await super().generate_response(messages)
+        with (llm_span("generate_response", "fake", self.name, messages),
+              timed(LLM_LATENCY.labels(self.name, "plan"), "llm")):
+            self.calls += 1
+            await asyncio.sleep(self.latency_ms / 1000)
+            steps = [{"id": step_id, "tool": tool, "args": args, "depends_on": deps}
+                     for step_id, tool, args, _, deps in TASK]
+            return json.dumps({"steps": steps, "answer": ""})
+    
+    async def _generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        done = {message.name for message in messages if getattr(message, "type", None) == "tool"}
+        finished = {step_id for step_id, tool, _, _, _ in TASK if tool in done}
+        ready = [(step_id, tool, args) for step_id, tool, _, args, deps in TASK
+                 if step_id not in finished and all(dep in finished for dep in deps)]
+        if not ready:
+            return AIMessage(content=await self._respond("travel booked", stream=False))
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        ready = ready if self.parallel_tool_calls else ready[:1]
+        return AIMessage(content="", tool_calls=[{"name": tool, "args": args, "id": f"call_{self.calls}_{step_id}"}
+                                                 for step_id, tool, args in ready])
+
+async def measure(url: str, kind: str, parallel_tool_calls: bool, llm_latency_ms: float, runs: int) -> Dict[str, float]:
+    """Median wall time and LLM calls per query for one workflow"""
+    provider = ScriptedTravelLLM(llm_latency_ms, parallel_tool_calls)
+    service = LLMService()
+    service.register_llm("scripted", provider)
+    settings = AppSettings(mcp_servers=[MCPServerConfig(name="travel", url=url)], llm_configs=[],
+                           default_llm="scripted", workflow=WorkflowConfig(kind=kind))
+    app = Application(settings, service)
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        await app.initialize()
+        for _ in range(runs):
+            start = time.perf_counter()
+            await app.workflow.execute(Conversation(), QUERY)
+            timings.append((time.perf_counter() - start) * 1000)
+    return {"wall_ms": statistics.median(timings), "llm_calls": provider.calls / runs}
+
+async def run(llm_latency_ms: float, tool_latency_ms: float, runs: int):
+    url, server, task = await serve_mcp_server(build_travel_server(tool_latency_ms))
+    try:
+        variants = [
+            ("react, one tool per turn", "react", False),
+            ("react, parallel tool calls", "react", True),
+            ("plan_execute", "plan_execute", False),
+        ]
+        print(f"LLM {llm_latency_ms:.0f}ms, tools {tool_latency_ms:.0f}ms, {runs} runs each\n")
+        print(f"{'workflow':<28} {'LLM calls':>10} {'wall ms':>10}")
+        for label, kind, parallel in variants:
+            result = await measure(url, kind, parallel, llm_latency_ms, runs)
+            print(f"{label:<28} {result['llm_calls']:>10.1f} {result['wall_ms']:>10.0f}")
+    finally:
+        server.should_exit = True
+        await task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--tool-latency-ms", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.llm_latency_ms, args.tool_latency_ms, args.runs))
+
+if __name__ == "__main__":
+    main()
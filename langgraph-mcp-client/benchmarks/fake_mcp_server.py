@@ -0,0 +1,77 @@
+"""Local MCP server with synthetic tools of configurable latency and payload size.
+
+Used in-process by the benchmark suite; can also be run on its own:
+    python -m benchmarks.fake_mcp_server --port 8001 --tools 5 --latency-ms 10 --payload-bytes 2000
+and pointed to with WEATHER_MCP_URL=http://127.0.0.1:8001
+"""
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import List, Tuple
+import uvicorn
+from fastmcp import FastMCP
+
+@dataclass
+class FakeToolSpec:
+    """Shape of one synthetic tool"""
+    name: str
+    description: str
+    latency_ms: float = 0.0
+    payload_bytes: int = 200
+
+def domain_tools(domain: str, count: int, latency_ms: float = 0.0, payload_bytes: int = 200) -> List[FakeToolSpec]:
+    """Tools whose names and descriptions match an agent domain ("weather", "news", ...)"""
+    return [
+        FakeToolSpec(f"get_{domain}_{index}", f"Look up {domain} data (synthetic tool {index})", latency_ms, payload_bytes)
+        for index in range(count)
+    ]
+
+def _make_tool(spec: FakeToolSpec):
+    payload = "x" * spec.payload_bytes
+    
+    async def tool(query: str) -> str:
+        if spec.latency_ms:
+            await asyncio.sleep(spec.latency_ms / 1000)
+        return json.dumps({"tool": spec.name, "query": query, "data": payload})
+    
+    return tool
+
+def build_fake_mcp_server(name: str, tools: List[FakeToolSpec]) -> FastMCP:
+    """FastMCP server exposing the given synthetic tools"""
+    mcp = FastMCP(name)
+    for spec in tools:
+        mcp.tool(_make_tool(spec), name=spec.name, description=spec.description)
+    return mcp
+
+async def start_fake_mcp_server(name: str, tools: List[FakeToolSpec], port: int = 0) -> Tuple[str, uvicorn.Server, asyncio.Task]:
+    """Serve a fake MCP server over SSE; returns its base URL, the server and its task"""
+    return await serve_mcp_server(build_fake_mcp_server(name, tools), port)
+
+async def serve_mcp_server(mcp: FastMCP, port: int = 0) -> Tuple[str, uvicorn.Server, asyncio.Task]:
+    """Serve any FastMCP server over SSE in the running loop"""
+    app = mcp.http_app(path="/sse", transport="sse")
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{bound_port}", server, task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--domain", default="weather")
+    parser.add_argument("--tools", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=200)
+    args = parser.parse_args()
+    
+    tools = domain_tools(args.domain, args.tools, args.latency_ms, args.payload_bytes)
+    app = build_fake_mcp_server(f"fake-{args.domain}", tools).http_app(path="/sse", transport="sse")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
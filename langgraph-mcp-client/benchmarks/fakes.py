@@ -0,0 +1,89 @@
+"""Deterministic stand-ins for LLM providers used by the benchmarks."""
+import asyncio
+from typing import Any, List
+from interfaces.llm_interface import ILLMProvider
+from models.message import Message
+from models.stream_event import emit, is_streaming
+from services.llm_service import LLMService, llm_span
+from services.metrics import LLM_LATENCY, timed
+
+try:
+    from langchain_core.messages import AIMessage
+except ImportError:
+    AIMessage = None
+
+def fake_tool_args(tool: Any, text: str) -> dict:
+    """Arguments satisfying a tool's required parameters"""
+    schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+    samples = {"string": text, "integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+    properties = schema.get("properties", {})
+    return {name: samples.get(properties[name].get("type"), text) for name in schema.get("required", [])}
+
+class FakeLLMProvider(ILLMProvider):
+    """Provider that answers after a fixed delay without any network calls"""
+    
+    def __init__(self, name: str = "fake", latency_ms: float = 20.0, context_budget_tokens: int = 8000,
+                 response_tokens: int = 0, token_interval_ms: float = 0.0, tool_calls: int = 0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.context_budget_tokens = context_budget_tokens
+        self.response_tokens = response_tokens
+        self.token_interval_ms = token_interval_ms
+        self.tool_calls = tool_calls  # tool-calling rounds before the final answer
+        self.calls = 0
+    
+    async def _respond(self, last_content: str, stream: bool = True) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        tokens = [f"Answer to: {last_content[:80]}"] + [f" token{index}" for index in range(self.response_tokens)]
+        if not stream or not is_streaming():
+            return "".join(tokens)
+        # Emit tokens at the configured generation rate, like a streaming model
+        for token in tokens:
+            emit("token", content=token)
+            if self.token_interval_ms:
+                await asyncio.sleep(self.token_interval_ms / 1000)
+        return "".join(tokens)
+    
+    async def generate_response(self, messages: List[Message]) -> str:
+        with (llm_span("generate_response", "fake", self.name, messages),
+              timed(LLM_LATENCY.labels(self.name, "generate_response"), "llm")):
+            return await self._respond(messages[-1].content if messages else "")
+    
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        with (llm_span("generate_with_tools", "fake", self.name, messages, tools),
+              timed(LLM_LATENCY.labels(self.name, "generate_with_tools"), "llm")):
+            return await self._generate_with_tools(messages, tools)
+    
+    async def _generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        # Rounds of this turn are the tool results since the last user message
+        rounds = 0
+        for message in reversed(messages):
+            if getattr(message, "type", None) == "human":
+                break
+            rounds += getattr(message, "type", None) == "tool"
+        query = next((str(msg.content) for msg in reversed(messages) if getattr(msg, "type", None) == "human"), "")
+        
+        if tools and rounds < self.tool_calls:
+            self.calls += 1
+            await asyncio.sleep(self.latency_ms / 1000)
+            tool = tools[rounds % len(tools)]
+            return AIMessage(content="", tool_calls=[{
+                "name": tool.name, "args": fake_tool_args(tool, query[:40]), "id": f"call_{self.calls}"
+            }])
+        # Graph runs stream the returned message themselves
+        content = await self._respond(query, stream=False)
+        return AIMessage(content=content)
+    
+    def get_model_info(self) -> dict:
+        return {
+            "provider": "fake",
+            "model": self.name,
+            "context_budget_tokens": self.context_budget_tokens
+        }
+
+def create_fake_llm_service(latency_ms: float = 20.0, name: str = "fake", **provider_options) -> LLMService:
+    """LLM service with a single fake provider registered under the given name"""
+    service = LLMService()
+    service.register_llm(name, FakeLLMProvider(name, latency_ms, **provider_options))
+    return service
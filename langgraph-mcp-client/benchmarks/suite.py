@@ -0,0 +1,222 @@
+"""End-to-end benchmark suite for the orchestration code.
+
+Runs the real Application, ReactWorkflow and AgentManager against a fake LLM
+and local fake MCP servers, so the numbers measure our own overhead rather
+than network or model latency. Results are compared with the stored
+baselines and the run exits non-zero on a regression.
+
+Run from the langgraph-mcp-client directory:
+    python -m benchmarks.suite                    # compare with baselines
+    python -m benchmarks.suite --update-baseline  # record new baselines
+    python -m benchmarks.suite --tolerance 0.3    # allow 30% drift instead of the default
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+from benchmarks.fake_mcp_server import domain_tools, start_fake_mcp_server
+from benchmarks.fakes import create_fake_llm_service
+from config.settings import AppSettings, MCPServerConfig
+from main import Application
+from models.conversation import Conversation
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+QUERIES = [
+    "What's the weather forecast for Paris tomorrow?",
+    "Show me the latest technology headlines",
+    "Will it rain in London this weekend?",
+    "Any breaking news about the stock market?",
+]
+
+@dataclass
+class Metric:
+    """One measured value and which direction is better"""
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the application's progress output while measuring"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class Suite:
+    """Scenarios sharing one set of fake MCP servers"""
+    
+    def __init__(self, tools_per_server: int = 5, payload_bytes: int = 2000):
+        self.tools_per_server = tools_per_server
+        self.payload_bytes = payload_bytes
+        self.servers = []
+        self.metrics: List[Metric] = []
+    
+    def record(self, name: str, value: float, unit: str, higher_is_better: bool = False):
+        self.metrics.append(Metric(name, value, unit, higher_is_better))
+        print(f"   {name:<28} {value:>12.3f} {unit}")
+    
+    async def start_servers(self):
+        """Bring up one fake MCP server per agent domain"""
+        for domain in ("weather", "news"):
+            url, server, task = await start_fake_mcp_server(
+                f"fake-{domain}", domain_tools(domain, self.tools_per_server, payload_bytes=self.payload_bytes)
+            )
+            self.servers.append((domain, url, server, task))
+    
+    async def stop_servers(self):
+        for _, _, server, task in self.servers:
+            server.should_exit = True
+            await task
+    
+    async def create_app(self, llm_latency_ms: float = 0.0, tool_calls: int = 1) -> Application:
+        """Initialized application wired to the fake LLM and fake MCP servers"""
+        settings = AppSettings(
+            mcp_servers=[MCPServerConfig(name=domain, url=url) for domain, url, _, _ in self.servers],
+            llm_configs=[],
+            default_llm="fake"
+        )
+        app = Application(settings, create_fake_llm_service(llm_latency_ms, tool_calls=tool_calls))
+        with quiet():
+            await app.initialize()
+        return app
+    
+    async def scenario_startup(self, runs: int = 5):
+        """Application.initialize, including MCP tool discovery and graph compilation"""
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await self.create_app()
+            timings.append((time.perf_counter() - start) * 1000)
+        self.record("startup_ms", statistics.median(timings), "ms")
+    
+    async def scenario_routing(self, iterations: int = 2000):
+        """AgentManager.route_query"""
+        app = await self.create_app()
+        manager = app.workflow.agent_manager
+        with quiet():
+            start = time.perf_counter()
+            for index in range(iterations):
+                manager.route_query(QUERIES[index % len(QUERIES)])
+            elapsed = time.perf_counter() - start
+        self.record("route_us", elapsed / iterations * 1e6, "us")
+    
+    async def _execute_latencies(self, app: Application, runs: int) -> List[float]:
+        latencies = []
+        with quiet():
+            for index in range(runs):
+                start = time.perf_counter()
+                await app.workflow.execute(Conversation(), QUERIES[index % len(QUERIES)])
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+    
+    async def scenario_execute(self, runs: int = 50):
+        """ReactWorkflow.execute overhead with a zero-latency LLM, with and without an MCP tool call"""
+        no_tools = await self._execute_latencies(await self.create_app(tool_calls=0), runs)
+        with_tool = await self._execute_latencies(await self.create_app(tool_calls=1), runs)
+        self.record("execute_overhead_p50_ms", statistics.median(no_tools), "ms")
+        self.record("execute_tool_call_p50_ms", statistics.median(with_tool), "ms")
+        self.record("execute_tool_call_p95_ms", percentile(with_tool, 0.95), "ms")
+    
+    async def scenario_throughput(self, queries: int = 200, concurrency: int = 20, llm_latency_ms: float = 10.0):
+        """Concurrent executes, each with one tool call and two LLM round trips"""
+        app = await self.create_app(llm_latency_ms=llm_latency_ms, tool_calls=1)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_one(index: int):
+            async with semaphore:
+                await app.workflow.execute(Conversation(), QUERIES[index % len(QUERIES)])
+        
+        with quiet():
+            start = time.perf_counter()
+            await asyncio.gather(*(run_one(index) for index in range(queries)))
+            elapsed = time.perf_counter() - start
+        self.record("throughput_qps", queries / elapsed, "q/s", higher_is_better=True)
+    
+    async def scenario_memory(self, conversations: int = 100):
+        """Peak allocation while executing and memory retained per conversation"""
+        app = await self.create_app(tool_calls=1)
+        kept = []
+        with quiet():
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+            for index in range(conversations):
+                conversation = Conversation()
+                await app.workflow.execute(conversation, QUERIES[index % len(QUERIES)])
+                kept.append(conversation)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.record("memory_peak_kb", (peak - baseline) / 1024, "KB")
+        self.record("memory_per_conversation_kb", (current - baseline) / 1024 / conversations, "KB")
+    
+    async def run(self) -> Dict[str, Metric]:
+        await self.start_servers()
+        try:
+            print("Scenarios:")
+            await self.scenario_startup()
+            await self.scenario_routing()
+            await self.scenario_execute()
+            await self.scenario_throughput()
+            await self.scenario_memory()
+        finally:
+            await self.stop_servers()
+        return {metric.name: metric for metric in self.metrics}
+
+def compare(metrics: Dict[str, Metric], baselines: Dict[str, dict], tolerance: float) -> List[str]:
+    """Names of metrics that regressed beyond the tolerance"""
+    regressions = []
+    print(f"\n{'metric':<28} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, metric in metrics.items():
+        baseline = baselines.get(name)
+        if not baseline or not baseline["value"]:
+            print(f"{name:<28} {'-':>12} {metric.value:>12.3f} {'new':>9}")
+            continue
+        change = (metric.value - baseline["value"]) / baseline["value"]
+        worse = -change if metric.higher_is_better else change
+        flag = "  ❌" if worse > tolerance else ""
+        print(f"{name:<28} {baseline['value']:>12.3f} {metric.value:>12.3f} {change:>+8.0%}{flag}")
+        if worse > tolerance:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown before failing")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+    
+    metrics = asyncio.run(Suite().run())
+    
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({name: asdict(metric) for name, metric in metrics.items()}, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baselines written to {args.baseline}")
+        return
+    
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    regressions = compare(metrics, baselines, args.tolerance)
+    if regressions:
+        print(f"\n❌ Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
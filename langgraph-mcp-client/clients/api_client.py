@@ -1,3 +1,254 @@
-"""Module: api_client.py"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+from clients.base_client import BaseClient
+from config.settings import APIConfig
+from models.conversation import Conversation
+from services.deadline import DeadlineExceeded, deadline_scope
+from services.metrics import registry
 
-# TODO: Implement api_client.py functionality
+try:
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+    from starlette.routing import Route
+except ImportError:
+    Starlette = None
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+@dataclass
+class Session:
+    """One API conversation and the lock that orders its turns"""
+    conversation: Conversation
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_active: float = field(default_factory=time.monotonic)
+    in_flight: int = 0  # turns checked out and not finished; the session is not evicted meanwhile
+
+class SessionManager:
+    """Conversations keyed by ID with per-session turn ordering and a global concurrency cap"""
+    
+    def __init__(self, max_sessions: int = 1000, max_concurrency: int = 32, checkpointer=None):
+        self.max_sessions = max_sessions
+        self.checkpointer = checkpointer
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def create(self, conversation_id: str = "") -> Session:
+        """Start a new conversation, under the given ID or a fresh one"""
+        session = Session(Conversation(conversation_id=conversation_id))
+        self._add(session)
+        return session
+    
+    async def get(self, conversation_id: str) -> Optional[Session]:
+        """Session by ID, restored from checkpoints if it was evicted or the server restarted"""
+        session = self._sessions.get(conversation_id)
+        if session is not None:
+            self._sessions.move_to_end(conversation_id)
+            return session
+        if self.checkpointer is None:
+            return None
+        conversation = await self.checkpointer.aload(conversation_id)
+        if conversation is None:
+            return None
+        # Another request may have restored it while we were loading
+        if conversation_id in self._sessions:
+            return self._sessions[conversation_id]
+        session = Session(conversation)
+        self._add(session)
+        return session
+    
+    async def checkout(self, conversation_id: str) -> Optional[Session]:
+        """Session for a turn, kept from eviction from now until the turn ends"""
+        session = await self.get(conversation_id)
+        if session is not None:
+            session.in_flight += 1
+        return session
+    
+    def _add(self, session: Session):
+        """Register a session, evicting the least recently used idle ones over the limit"""
+        self._sessions[session.conversation.conversation_id] = session
+        for conversation_id, candidate in list(self._sessions.items()):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if candidate is not session and not candidate.in_flight:
+                del self._sessions[conversation_id]
+    
+    @asynccontextmanager
+    async def turn(self, session: Session, queue_timeout: float):
+        """Run one turn of a checked-out session: turns run in order, and at most max_concurrency at once"""
+        try:
+            async with session.lock:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=queue_timeout)
+                self.active += 1
+                try:
+                    yield session.conversation
+                finally:
+                    self.active -= 1
+                    session.last_active = time.monotonic()
+                    self.semaphore.release()
+        finally:
+            session.in_flight -= 1
+
+class APIClient(BaseClient):
+    """Asyncio HTTP API serving many conversations over one shared workflow"""
+    
+    def __init__(self, workflow, config: Optional[APIConfig] = None, checkpointer=None):
+        if Starlette is None:
+            raise ImportError("starlette not installed")
+        
+        super().__init__(workflow)
+        self.config = config or APIConfig()
+        self.sessions = SessionManager(self.config.max_sessions, self.config.max_concurrency, checkpointer)
+        self.stats = {"requests": 0, "rejected": 0}
+        self.app = self.build_app()
+        self.server = None
+    
+    def build_app(self) -> "Starlette":
+        """ASGI application exposing the session endpoints"""
+        return Starlette(routes=[
+            Route("/health", self._health, methods=["GET"]),
+            Route("/metrics", self._metrics, methods=["GET"]),
+            Route("/sessions", self._create_session, methods=["POST"]),
+            Route("/sessions/{conversation_id}", self._get_session, methods=["GET"]),
+            Route("/sessions/{conversation_id}/messages", self._send_message, methods=["POST"]),
+            Route("/sessions/{conversation_id}/stream", self._stream_message, methods=["POST"]),
+        ])
+    
+    async def start(self):
+        """Serve the API until stopped"""
+        if uvicorn is None:
+            raise ImportError("uvicorn not installed")
+        
+        if self.config.uds:
+            server_config = uvicorn.Config(self.app, uds=self.config.uds, log_level="warning")
+            print(f"🌐 API client listening on unix:{self.config.uds}")
+        else:
+            server_config = uvicorn.Config(self.app, host=self.config.host, port=self.config.port, log_level="warning")
+            print(f"🌐 API client listening on http://{self.config.host}:{self.config.port}")
+        self.server = uvicorn.Server(server_config)
+        await self.server.serve()
+    
+    async def stop(self):
+        """Stop the API server"""
+        if self.server is not None:
+            self.server.should_exit = True
+        print("🧹 API client stopped.")
+    
+    async def _health(self, request: "Request") -> "JSONResponse":
+        return JSONResponse({
+            "status": "ok",
+            "sessions": len(self.sessions),
+            "active_queries": self.sessions.active,
+            **self.stats
+        })
+    
+    async def _metrics(self, request: "Request") -> "PlainTextResponse":
+        return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+    
+    async def _create_session(self, request: "Request") -> "JSONResponse":
+        # A sharding front end chooses the ID, so it knows which worker owns the conversation
+        conversation_id = ""
+        if await request.body():
+            try:
+                body = await request.json()
+            except ValueError:
+                return self._error("Body must be JSON", 400)
+            conversation_id = str(body.get("conversation_id") or "") if isinstance(body, dict) else ""
+        if conversation_id and await self.sessions.get(conversation_id) is not None:
+            return self._error("Conversation already exists", 409)
+        session = self.sessions.create(conversation_id)
+        return JSONResponse({"conversation_id": session.conversation.conversation_id}, status_code=201)
+    
+    async def _get_session(self, request: "Request") -> "JSONResponse":
+        session = await self.sessions.get(request.path_params["conversation_id"])
+        if session is None:
+            return self._error("Unknown conversation", 404)
+        conversation = session.conversation
+        return JSONResponse({
+            "conversation_id": conversation.conversation_id,
+            "messages": [message.to_dict() for message in conversation.messages]
+        })
+    
+    async def _read_turn(self, request: "Request", checkout: bool = True):
+        """Resolve the session and query of a turn request, or an error response; checked out unless told not to"""
+        try:
+            body = await request.json()
+        except ValueError:
+            return None, None, self._error("Body must be JSON", 400)
+        query = str(body.get("query", "")).strip() if isinstance(body, dict) else ""
+        if not query:
+            return None, None, self._error("Missing 'query'", 400)
+        conversation_id = request.path_params["conversation_id"]
+        session = await (self.sessions.checkout if checkout else self.sessions.get)(conversation_id)
+        if session is None:
+            return None, None, self._error("Unknown conversation", 404)
+        self.stats["requests"] += 1
+        return session, query, None
+    
+    async def _send_message(self, request: "Request") -> "JSONResponse":
+        session, query, error = await self._read_turn(request)
+        if error:
+            return error
+        
+        start = time.perf_counter()
+        try:
+            async with self.sessions.turn(session, self.config.queue_timeout) as conversation:
+                try:
+                    async with deadline_scope():
+                        response = await self.workflow.execute(conversation, query)
+                except DeadlineExceeded as e:
+                    # Recorded while the turn is still held, so the next turn sees it
+                    conversation.record_interrupted(query)
+                    return self._error(str(e), 504)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            return self._error("Server busy, retry later", 503)
+        return JSONResponse({
+            "conversation_id": session.conversation.conversation_id,
+            "response": response,
+            "elapsed_ms": (time.perf_counter() - start) * 1000
+        })
+    
+    async def _stream_message(self, request: "Request"):
+        # Checked out once the stream starts: a client gone before then never runs the turn that releases it
+        session, query, error = await self._read_turn(request, checkout=False)
+        if error:
+            return error
+        conversation_id = session.conversation.conversation_id
+        
+        async def events():
+            session = await self.sessions.checkout(conversation_id)
+            if session is None:
+                yield f"event: error\ndata: {json.dumps({'type': 'error', 'message': 'Unknown conversation'})}\n\n"
+                return
+            try:
+                async with self.sessions.turn(session, self.config.queue_timeout) as conversation:
+                    try:
+                        async with deadline_scope():
+                            async for event in self.workflow.stream(conversation, query):
+                                yield f"event: {event.type}\ndata: {json.dumps(event.to_dict(), default=str)}\n\n"
+                    except DeadlineExceeded as e:
+                        conversation.record_interrupted(query)
+                        yield f"event: error\ndata: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                yield f"event: error\ndata: {json.dumps({'type': 'error', 'message': 'Server busy, retry later'})}\n\n"
+        
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    
+    @staticmethod
+    def _error(message: str, status_code: int) -> "JSONResponse":
+        return JSONResponse({"error": message}, status_code=status_code)
@@ -0,0 +1,55 @@
+import asyncio
+import queue
+import sys
+import threading
+from typing import Optional, TextIO
+
+class AsyncLineReader:
+    """Reads lines from stdin on a daemon thread so the event loop keeps running while the user types"""
+    
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdin
+        self._requests: queue.Queue = queue.Queue()
+        self._lines: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._outstanding = 0  # lines requested from the thread and not yet delivered
+    
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._lines = asyncio.Queue()
+        self._thread = threading.Thread(target=self._run, name="stdin-reader", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        # Lines are read only when asked for, so nothing typed after the client stops is consumed
+        while True:
+            self._requests.get()
+            try:
+                line = self.stream.readline()
+            except (OSError, ValueError):
+                line = ""
+            self._loop.call_soon_threadsafe(self._deliver, line)
+            if not line:
+                return
+    
+    def _deliver(self, line: str):
+        self._outstanding -= 1
+        self._lines.put_nowait(line)
+    
+    async def readline(self, prompt: str = "") -> str:
+        """Next line without its newline; raises EOFError at end of input, like input()"""
+        if self._thread is None:
+            self._start()
+        elif not self._thread.is_alive() and self._lines.empty():
+            raise EOFError
+        if prompt:
+            print(prompt, end="", flush=True)
+        # A line requested by a cancelled call is handed to the next one instead of being read twice
+        if self._lines.empty() and not self._outstanding:
+            self._outstanding += 1
+            self._requests.put(None)
+        line = await self._lines.get()
+        if not line:
+            raise EOFError
+        return line.rstrip("\r\n")
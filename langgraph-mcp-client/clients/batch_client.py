@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Set
+from clients.base_client import BaseClient
+from config.settings import BatchConfig
+from models.conversation import Conversation
+from models.stream_event import StreamEvent, streaming_to
+from services.deadline import DeadlineExceeded, deadline_scope
+
+class StageTimer:
+    """Event sink turning a query's stream events into per-stage timings"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.route_ms: Optional[float] = None
+        self.first_token_ms: Optional[float] = None
+        self.tools_ms = 0.0
+        self.tool_calls = 0
+        self.agents: List[str] = []
+        self._open_tools: Dict[str, List[float]] = defaultdict(list)
+    
+    def __call__(self, event: StreamEvent):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        if event.type == "route" and self.route_ms is None:
+            self.route_ms = elapsed_ms
+            self.agents = list(event.data.get("agents", []))
+        elif event.type == "token" and self.first_token_ms is None:
+            self.first_token_ms = elapsed_ms
+        elif event.type == "tool_start":
+            self._open_tools[event.data.get("tool")].append(elapsed_ms)
+            self.tool_calls += 1
+        elif event.type == "tool_end":
+            started = self._open_tools[event.data.get("tool")]
+            if started:
+                self.tools_ms += elapsed_ms - started.pop(0)
+    
+    def timings(self) -> Dict[str, Optional[float]]:
+        """Stage timings in milliseconds"""
+        return {
+            "route_ms": self.route_ms,
+            "first_token_ms": self.first_token_ms,
+            "tools_ms": self.tools_ms,
+            "total_ms": (time.perf_counter() - self.start) * 1000
+        }
+
+class BatchClient(BaseClient):
+    """Runs queries from a JSONL file through the workflow and appends results as they finish"""
+    
+    def __init__(self, workflow, config: BatchConfig):
+        super().__init__(workflow)
+        self.config = config
+        self.running = False
+        self.stats = {"done": 0, "skipped": 0, "ok": 0, "timeout": 0, "error": 0}
+        self._totals: List[float] = []
+    
+    def _completed_ids(self) -> Set[str]:
+        """IDs already in the output file, so a restarted run picks up where it stopped"""
+        completed = set()
+        if not os.path.exists(self.config.output_path):
+            return completed
+        # Read as bytes: a line cut short by a crash may end inside a multi-byte character
+        with open(self.config.output_path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # line cut short by a crash, possibly inside a character
+                if self.config.retry_failed and record.get("status") != "ok":
+                    continue
+                completed.add(str(record.get("id")))
+        return completed
+    
+    def _end_cut_line(self):
+        """End a line cut short by a crash so new records start cleanly; on bytes, as the cut may split a character"""
+        path = self.config.output_path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    
+    def _read_queries(self, completed: Set[str]) -> Iterator[Dict[str, Any]]:
+        """Stream pending query records from the input file"""
+        with open(self.config.input_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ Skipping invalid JSON on line {line_number}")
+                    continue
+                if isinstance(record, str):
+                    record = {"query": record}
+                record["id"] = str(record.get("id", line_number))
+                if record["id"] in completed:
+                    self.stats["skipped"] += 1
+                    continue
+                if record.get("query"):
+                    yield record
+    
+    async def start(self):
+        """Run the whole batch"""
+        self.running = True
+        completed = self._completed_ids()
+        print(f"📦 Batch: {self.config.input_path} -> {self.config.output_path} "
+              f"(concurrency {self.config.concurrency}, deadline {self.config.deadline_s:.0f}s, "
+              f"{len(completed)} already done)")
+        
+        # A bounded queue keeps only a few pending queries in memory however large the input is
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.config.concurrency * 2)
+        start = time.perf_counter()
+        self._end_cut_line()
+        with open(self.config.output_path, "a", encoding="utf-8") as output:
+            workers = [asyncio.create_task(self._worker(queue, output)) for _ in range(self.config.concurrency)]
+            try:
+                for record in self._read_queries(completed):
+                    if not self.running:
+                        break
+                    await queue.put(record)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+        self._print_summary(time.perf_counter() - start)
+    
+    async def _worker(self, queue: asyncio.Queue, output):
+        """Run queries from the queue until the end marker"""
+        while (record := await queue.get()) is not None:
+            result = await self._run_query(record)
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+            self.stats["done"] += 1
+            self.stats[result["status"]] += 1
+            self._totals.append(result["timings"]["total_ms"])
+            if self.stats["done"] % self.config.progress_every == 0:
+                print(f"   ✔️ {self.stats['done']} done ({self.stats['timeout']} timeouts, {self.stats['error']} errors)")
+    
+    async def _run_query(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one query within its deadline, recording stage timings"""
+        deadline_s = float(record.get("deadline_s", self.config.deadline_s))
+        timer = StageTimer()
+        status, response, error = "ok", None, None
+        try:
+            async with deadline_scope(deadline_s):
+                with streaming_to(timer):
+                    response = await self.workflow.execute(Conversation(), record["query"])
+        except DeadlineExceeded:
+            status, error = "timeout", f"Deadline of {deadline_s:.1f}s exceeded"
+        except Exception as e:
+            status, error = "error", str(e)
+        
+        return {
+            "id": record["id"],
+            "query": record["query"],
+            "status": status,
+            "response": response,
+            "error": error,
+            "agents": timer.agents,
+            "tool_calls": timer.tool_calls,
+            "timings": timer.timings(),
+            "finished_at": time.time()
+        }
+    
+    def _print_summary(self, elapsed_s: float):
+        """Print throughput and latency of this run"""
+        done = self.stats["done"]
+        print(f"✅ Batch finished: {done} run, {self.stats['skipped']} skipped, "
+              f"{self.stats['ok']} ok, {self.stats['timeout']} timeouts, {self.stats['error']} errors "
+              f"in {elapsed_s:.1f}s ({done / elapsed_s if elapsed_s else 0:.1f} queries/s)")
+        if self._totals:
+            ordered = sorted(self._totals)
+            p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            print(f"   ⏱️ total p50 {statistics.median(ordered):.0f}ms, p95 {p95:.0f}ms")
+    
+    async def stop(self):
+        """Stop feeding new queries; running ones finish"""
+        self.running = False
@@ -0,0 +1,368 @@
+import asyncio
+import dataclasses
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import uuid
+import zlib
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from clients.base_client import BaseClient
+from config.settings import AppSettings
+from services.metrics import registry
+
+try:
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+    from starlette.routing import Route
+except ImportError:
+    Starlette = None
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+WORKER_START_TIMEOUT_S = 120.0  # workers connect to MCP servers before they report healthy
+WORKER_STOP_TIMEOUT_S = 30.0
+WATCH_INTERVAL_S = 1.0
+CONNECT_RETRY_DELAY_S = 0.05  # before the one retry of a request whose connection to the worker failed
+
+DISPATCHED = registry.counter("mcp_client_dispatched_requests_total", "Requests forwarded to API workers", ["worker"])
+WORKER_RESTARTS = registry.counter("mcp_client_worker_restarts_total", "API worker processes replaced", ["reason"])
+
+SAMPLE_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?(\s.*)$")
+
+def shard_for(conversation_id: str, workers: int) -> int:
+    """Worker owning a conversation; stable across restarts, so checkpointed conversations return to their shard"""
+    return zlib.crc32(conversation_id.encode("utf-8")) % workers
+
+def merge_prometheus(sources: List[Tuple[str, str]]) -> str:
+    """Expositions of several processes as one, with each sample labelled by its process"""
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = defaultdict(list)
+    for process, text in sources:
+        family = None
+        for line in text.splitlines():
+            if line.startswith("#"):
+                parts = line.split(None, 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    lines = headers.setdefault(family, [])
+                    if len(lines) < 2 and line not in lines:
+                        lines.append(line)
+                continue
+            match = SAMPLE_LINE.match(line)
+            if match is None or family is None:
+                continue
+            name, labels, value = match.groups()
+            labels = f'process="{process}",{labels}' if labels else f'process="{process}"'
+            samples[family].append(f"{name}{{{labels}}}{value}")
+    # Samples of a family stay together under its HELP and TYPE lines
+    return "\n".join(line for family, lines in headers.items() for line in lines + samples[family]) + "\n"
+
+def worker_path(path: str, index: int) -> str:
+    """A worker's own copy of an output file: traces.jsonl -> traces.worker-0.jsonl"""
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker-{index}{extension}"
+
+def run_worker(settings: AppSettings, llm_factory: Optional[Callable[[], Any]] = None):
+    """Worker process entry point: a complete single-process API server on its Unix socket"""
+    # Imported here because main imports this module
+    from main import Application
+    asyncio.run(Application(settings, llm_factory() if llm_factory else None).run())
+
+class WorkerUnavailable(ConnectionError):
+    """The worker owning a request could not be replaced and has no connection to take it"""
+
+class Worker:
+    """One API worker process, the socket it serves on and the requests it is handling"""
+    
+    def __init__(self, index: int, socket_path: str):
+        self.index = index
+        self.socket_path = socket_path
+        self.process: Optional[multiprocessing.Process] = None
+        self.client: Optional["httpx.AsyncClient"] = None
+        self.in_flight = 0
+        self.served = 0
+        self.ready = asyncio.Event()  # cleared while the worker is replaced, so its requests wait
+        self.restarting = False
+    
+    @property
+    def name(self) -> str:
+        return f"worker-{self.index}"
+
+class ShardedAPIClient(BaseClient):
+    """Front dispatcher for API worker processes; each conversation always goes to the worker owning its ID"""
+    
+    def __init__(self, settings: AppSettings, llm_factory: Optional[Callable[[], Any]] = None):
+        if Starlette is None:
+            raise ImportError("starlette not installed")
+        if httpx is None:
+            raise ImportError("httpx not installed")
+        
+        if settings.cassette.mode == "record" and settings.api.workers > 1:
+            raise ValueError("CASSETTE_MODE=record needs API_WORKERS=1; workers would overwrite one cassette")
+        
+        super().__init__(None)
+        self.settings = settings
+        self.config = settings.api
+        self.llm_factory = llm_factory  # top-level callable building each worker's LLM service (benchmarks)
+        self._context = multiprocessing.get_context("spawn")
+        self._socket_dir = tempfile.mkdtemp(prefix="mcp-api-")
+        self.workers = [Worker(index, os.path.join(self._socket_dir, f"worker-{index}.sock"))
+                        for index in range(max(1, self.config.workers))]
+        self.stats = {"requests": 0, "restarts": 0}
+        self.app = self.build_app()
+        self.server = None
+        self._watcher: Optional[asyncio.Task] = None
+        if self.config.worker_max_requests and not settings.checkpoint.path:
+            print("⚠️ Recycled workers lose their conversations unless CHECKPOINT_PATH is set")
+    
+    def build_app(self) -> "Starlette":
+        """ASGI application with the same endpoints as the single-process API"""
+        return Starlette(routes=[
+            Route("/health", self._health, methods=["GET"]),
+            Route("/metrics", self._metrics, methods=["GET"]),
+            Route("/sessions", self._create_session, methods=["POST"]),
+            Route("/sessions/{conversation_id}", self._forward, methods=["GET"]),
+            Route("/sessions/{conversation_id}/messages", self._forward, methods=["POST"]),
+            Route("/sessions/{conversation_id}/stream", self._forward_stream, methods=["POST"]),
+        ])
+    
+    async def start(self):
+        """Start the workers, then serve the front end until stopped"""
+        if uvicorn is None:
+            raise ImportError("uvicorn not installed")
+        
+        print(f"🧵 Starting {len(self.workers)} API worker processes...")
+        await asyncio.gather(*(self._spawn(worker) for worker in self.workers))
+        self._watcher = asyncio.create_task(self._watch())
+        server_config = uvicorn.Config(self.app, host=self.config.host, port=self.config.port, log_level="warning")
+        self.server = uvicorn.Server(server_config)
+        print(f"🌐 Sharded API listening on http://{self.config.host}:{self.config.port} "
+              f"({len(self.workers)} workers)")
+        await self.server.serve()
+    
+    async def stop(self):
+        """Stop the front end and every worker"""
+        if self.server is not None:
+            self.server.should_exit = True
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        await asyncio.gather(*(self._terminate(worker) for worker in self.workers))
+        shutil.rmtree(self._socket_dir, ignore_errors=True)
+        print("🧹 Sharded API client stopped.")
+    
+    def _worker_settings(self, worker: Worker) -> AppSettings:
+        # A worker is a plain single-process API server on its socket; the metrics port stays with the front end
+        settings = self.settings
+        return dataclasses.replace(
+            settings,
+            client_type="api",
+            api=dataclasses.replace(self.config, workers=1, uds=worker.socket_path),
+            metrics=dataclasses.replace(settings.metrics, enabled=False),
+            # Files every worker appends to get one per worker, so records do not interleave
+            tracing=dataclasses.replace(settings.tracing,
+                                        json_path=worker_path(settings.tracing.json_path, worker.index)),
+            routing=dataclasses.replace(settings.routing,
+                                        log_path=worker_path(settings.routing.log_path, worker.index)),
+            # One warmer, not one per worker hitting the same backends with the same refreshes
+            cache_warmer=dataclasses.replace(settings.cache_warmer,
+                                             enabled=settings.cache_warmer.enabled and worker.index == 0)
+        )
+    
+    async def _spawn(self, worker: Worker):
+        if os.path.exists(worker.socket_path):
+            os.unlink(worker.socket_path)
+        worker.process = self._context.Process(target=run_worker, name=f"api-{worker.name}", daemon=True,
+                                               args=(self._worker_settings(worker), self.llm_factory))
+        worker.process.start()
+        # Every connection is kept for reuse: httpx's default of 20 idle connections made bursts reconnect for
+        # each request, which queued them behind new connections and could overflow the socket's backlog
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        worker.client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=worker.socket_path, limits=limits),
+                                          base_url="http://worker", timeout=None)
+        await self._wait_healthy(worker)
+        worker.served = 0
+        worker.ready.set()
+        print(f"✅ API {worker.name} ready (pid {worker.process.pid})")
+    
+    async def _wait_healthy(self, worker: Worker):
+        deadline = asyncio.get_running_loop().time() + WORKER_START_TIMEOUT_S
+        while True:
+            if not worker.process.is_alive():
+                raise RuntimeError(f"API {worker.name} exited during startup (code {worker.process.exitcode})")
+            try:
+                if (await worker.client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if asyncio.get_running_loop().time() > deadline:
+                raise RuntimeError(f"API {worker.name} not healthy after {WORKER_START_TIMEOUT_S:.0f}s")
+            await asyncio.sleep(0.1)
+    
+    async def _terminate(self, worker: Worker):
+        if worker.client is not None:
+            await worker.client.aclose()
+            worker.client = None
+        if worker.process is None:
+            return
+        if worker.process.is_alive():
+            # SIGTERM lets uvicorn finish open requests and the worker's Application clean up
+            worker.process.terminate()
+        await asyncio.to_thread(worker.process.join, WORKER_STOP_TIMEOUT_S)
+        if worker.process.is_alive():
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.join)
+    
+    async def _watch(self):
+        """Replace workers that died or reached API_WORKER_MAX_REQUESTS"""
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL_S)
+            for worker in self.workers:
+                if worker.restarting:
+                    continue
+                if not worker.process.is_alive():
+                    asyncio.create_task(self._restart(worker, "crashed"))
+                elif self.config.worker_max_requests and worker.served >= self.config.worker_max_requests:
+                    asyncio.create_task(self._restart(worker, "recycled"))
+    
+    async def _restart(self, worker: Worker, reason: str):
+        """Drain the worker, replace its process and let the requests held meanwhile through"""
+        worker.restarting = True
+        worker.ready.clear()
+        try:
+            while worker.in_flight and worker.process.is_alive():
+                await asyncio.sleep(0.05)
+            await self._terminate(worker)
+            await self._spawn(worker)
+            self.stats["restarts"] += 1
+            WORKER_RESTARTS.labels(reason).inc()
+            print(f"♻️ Replaced API {worker.name} ({reason})")
+        except Exception as e:
+            print(f"❌ Could not replace API {worker.name}: {e}")
+            # Held requests fail fast instead of waiting; the watcher tries again
+            worker.ready.set()
+        finally:
+            worker.restarting = False
+    
+    @asynccontextmanager
+    async def _dispatch(self, worker: Worker):
+        """Count a request against its worker, waiting while the worker is being replaced"""
+        await worker.ready.wait()
+        if worker.client is None:
+            # Its replacement failed; the watcher tries again
+            raise WorkerUnavailable(f"API {worker.name} is down")
+        worker.in_flight += 1
+        worker.served += 1
+        self.stats["requests"] += 1
+        DISPATCHED.labels(worker.name).inc()
+        try:
+            yield worker.client
+        finally:
+            worker.in_flight -= 1
+    
+    def _owner(self, conversation_id: str) -> Worker:
+        return self.workers[shard_for(conversation_id, len(self.workers))]
+    
+    async def _relay(self, worker: Worker, method: str, path: str, body: bytes) -> "Response":
+        for attempt in range(2):
+            try:
+                async with self._dispatch(worker) as client:
+                    response = await client.request(method, path, content=body,
+                                                    headers={"content-type": "application/json"})
+                break
+            except httpx.ConnectError as e:
+                # The worker never received the request (its socket backlog can overflow under bursts),
+                # so sending it once more cannot run it twice
+                if attempt == 0:
+                    await asyncio.sleep(CONNECT_RETRY_DELAY_S)
+                    continue
+                return self._unavailable(e)
+            except (httpx.TransportError, WorkerUnavailable) as e:
+                return self._unavailable(e)
+        return Response(response.content, status_code=response.status_code,
+                        media_type=response.headers.get("content-type"))
+    
+    @staticmethod
+    def _unavailable(error: Exception) -> "JSONResponse":
+        return JSONResponse({"error": f"Worker unavailable: {error}"}, status_code=502)
+    
+    async def _create_session(self, request: "Request") -> "Response":
+        # The front end picks the ID, so it knows the owning worker before the conversation exists
+        conversation_id = uuid.uuid4().hex
+        body = f'{{"conversation_id": "{conversation_id}"}}'.encode("utf-8")
+        return await self._relay(self._owner(conversation_id), "POST", "/sessions", body)
+    
+    async def _forward(self, request: "Request") -> "Response":
+        worker = self._owner(request.path_params["conversation_id"])
+        return await self._relay(worker, request.method, request.url.path, await request.body())
+    
+    async def _forward_stream(self, request: "Request") -> "StreamingResponse":
+        worker = self._owner(request.path_params["conversation_id"])
+        body = await request.body()
+        
+        async def relay():
+            for attempt in range(2):
+                try:
+                    async with self._dispatch(worker) as client:
+                        async with client.stream("POST", request.url.path, content=body,
+                                                 headers={"content-type": "application/json"}) as response:
+                            async for chunk in response.aiter_raw():
+                                yield chunk
+                    return
+                except httpx.ConnectError as e:
+                    # Nothing was sent or relayed yet, as for _relay
+                    if attempt == 0:
+                        await asyncio.sleep(CONNECT_RETRY_DELAY_S)
+                        continue
+                    error = e
+                except (httpx.TransportError, WorkerUnavailable) as e:
+                    error = e
+                yield f'event: error\ndata: {{"type": "error", "message": "Worker unavailable: {error}"}}\n\n'.encode()
+                return
+        
+        return StreamingResponse(relay(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    
+    async def _worker_get(self, worker: Worker, path: str) -> Optional["httpx.Response"]:
+        if worker.client is None or not worker.ready.is_set():
+            return None
+        try:
+            return await worker.client.get(path)
+        except httpx.TransportError:
+            return None
+    
+    async def _health(self, request: "Request") -> "JSONResponse":
+        responses = await asyncio.gather(*(self._worker_get(worker, "/health") for worker in self.workers))
+        workers = [{
+            "worker": worker.index,
+            "pid": worker.process.pid if worker.process else None,
+            "alive": bool(worker.process and worker.process.is_alive()),
+            "in_flight": worker.in_flight,
+            "served": worker.served,
+            **(response.json() if response is not None and response.status_code == 200 else {"status": "down"})
+        } for worker, response in zip(self.workers, responses)]
+        healthy = all(worker["status"] == "ok" for worker in workers)
+        return JSONResponse({"status": "ok" if healthy else "degraded", "workers": workers, **self.stats},
+                            status_code=200 if healthy else 503)
+    
+    async def _metrics(self, request: "Request") -> "PlainTextResponse":
+        responses = await asyncio.gather(*(self._worker_get(worker, "/metrics") for worker in self.workers))
+        sources = [("dispatcher", registry.render_prometheus())]
+        sources += [(worker.name, response.text) for worker, response in zip(self.workers, responses)
+                    if response is not None and response.status_code == 200]
+        return PlainTextResponse(merge_prometheus(sources), media_type="text/plain; version=0.0.4")
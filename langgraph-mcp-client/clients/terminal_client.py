@@ -1,5 +1,10 @@
 import asyncio
+import signal
+from contextlib import contextmanager
+from clients.async_input import AsyncLineReader
 from clients.base_client import BaseClient
+from services.deadline import DeadlineExceeded, deadline_scope
+from services.metrics import registry
 
 class TerminalClient(BaseClient):
     """Terminal-based interactive client"""
@@ -7,6 +12,7 @@ class TerminalClient(BaseClient):
     def __init__(self, workflow):
         super().__init__(workflow)
         self.running = False
+        self.reader = AsyncLineReader()
     
     async def start(self):
         """Start the terminal client"""
@@ -14,8 +20,9 @@ class TerminalClient(BaseClient):
         print("🤖 LangGraph Multi-MCP Terminal Client Ready!")
         print("="*60)
         print("\nAvailable commands:")
-        print("• Enter any query to process")
+        print("• Enter any query to process (Ctrl-C stops the running query)")
         print("• 'clear' or 'reset' - Clear conversation history")
+        print("• '/stats' - Show latency percentiles, counters and cache hit rates")
         print("• 'quit', 'exit', or 'q' - Exit the client")
         print("="*60 + "\n")
         
@@ -24,7 +31,8 @@ class TerminalClient(BaseClient):
         try:
             while self.running:
                 try:
-                    query = input("🔍 Enter your query: ").strip()
+                    # Read without blocking the loop, so background tasks keep running while the user types
+                    query = (await self.reader.readline("🔍 Enter your query: ")).strip()
                     
                     if not query:
                         continue
@@ -38,9 +46,13 @@ class TerminalClient(BaseClient):
                         print("🗑️ Conversation history cleared!")
                         continue
                     
+                    if query.lower() == '/stats':
+                        print(f"\n📊 Metrics:\n{registry.format_stats()}\n")
+                        continue
+                    
                     await self._process_query(query)
                     
-                except KeyboardInterrupt:
+                except (KeyboardInterrupt, EOFError):
                     print("\n👋 Goodbye!")
                     break
                 except Exception as e:
@@ -58,14 +70,46 @@ class TerminalClient(BaseClient):
         if context_summary != "No previous context":
             print(f"📝 {context_summary}")
         
+        task = asyncio.create_task(self._execute(query))
         try:
-            response = await self.workflow.execute(self.conversation, query)
+            with self._interrupt_cancels(task):
+                response = await task
             print(f"\n🤖 Response:\n{response}\n")
             print("-" * 60)
             
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            self.conversation.record_interrupted(query)
+            print("\n⏹️ Query interrupted")
+        except DeadlineExceeded as e:
+            self.conversation.record_interrupted(query)
+            print(f"⏱️ Query stopped: {e}")
         except Exception as e:
             print(f"❌ Error processing query: {e}")
     
+    async def _execute(self, query: str) -> str:
+        async with deadline_scope():
+            return await self.workflow.execute(self.conversation, query)
+    
+    @contextmanager
+    def _interrupt_cancels(self, task: asyncio.Task):
+        """While the query runs, Ctrl-C cancels it instead of stopping the client"""
+        loop = asyncio.get_running_loop()
+        previous = signal.getsignal(signal.SIGINT)
+        try:
+            loop.add_signal_handler(signal.SIGINT, task.cancel)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # No loop signal handlers on Windows or off the main thread; Ctrl-C keeps its usual meaning
+            yield
+            return
+        try:
+            yield
+        finally:
+            loop.remove_signal_handler(signal.SIGINT)
+            # Give the prompt back the handler asyncio.run installed
+            signal.signal(signal.SIGINT, previous)
+    
     async def stop(self):
         """Stop the terminal client"""
         self.running = False
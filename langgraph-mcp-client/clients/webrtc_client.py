@@ -1,3 +1,251 @@
-"""Module: webrtc_client.py"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+from clients.base_client import BaseClient
+from config.settings import RealtimeConfig
+from models.conversation import Conversation
+from models.stream_event import StreamEvent, streaming_to
+from services.deadline import DeadlineExceeded, deadline_scope
 
-# TODO: Implement webrtc_client.py functionality
+try:
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocket, WebSocketDisconnect
+except ImportError:
+    Starlette = None
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+class FrameBatcher:
+    """Coalesces stream events into frames for a transport that may be slower than generation"""
+    
+    def __init__(self, flush_interval_ms: float = 5.0):
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: List[StreamEvent] = []
+        self._ready = asyncio.Event()
+        self._closed = asyncio.Event()
+        self.stats = {"events": 0, "frames": 0, "coalesced": 0}
+    
+    def push(self, event: StreamEvent):
+        """Event sink; consecutive tokens merge into one event so the backlog stays bounded"""
+        self.stats["events"] += 1
+        last = self._pending[-1] if self._pending else None
+        if (last is not None and event.type == "token" and last.type == "token"
+                and last.data.get("agent") == event.data.get("agent")):
+            # Keep the first token's timestamp so delivery lag is measured from the oldest token
+            last.data["content"] += event.data["content"]
+            last.data["tokens"] = last.data.get("tokens", 1) + 1
+            self.stats["coalesced"] += 1
+        else:
+            self._pending.append(event)
+        self._ready.set()
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+    
+    def close(self):
+        """Flush what is pending and end the frame stream"""
+        self._closed.set()
+        self._ready.set()
+    
+    async def next_frame(self) -> Optional[List[StreamEvent]]:
+        """Next batch of events, or None once closed and drained"""
+        await self._ready.wait()
+        # Let more tokens join the frame until the oldest has waited flush_interval;
+        # anything else, or closing, sends at once
+        if (self.flush_interval and not self.closed and self._pending
+                and all(event.type == "token" for event in self._pending)):
+            remaining = self.flush_interval - (time.time() - self._pending[0].created_at)
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(self._closed.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+        frame, self._pending = self._pending, []
+        # A close() during the flush window must still wake the next call
+        if not self.closed:
+            self._ready.clear()
+        if not frame:
+            return None if self.closed else []
+        self.stats["frames"] += 1
+        return frame
+
+class RealtimeSession:
+    """One WebSocket peer: runs its queries, streams their events and honours interrupts"""
+    
+    def __init__(self, websocket: "WebSocket", conversation: Conversation, workflow, config: RealtimeConfig):
+        self.websocket = websocket
+        self.conversation = conversation
+        self.workflow = workflow
+        self.config = config
+        self.current: Optional[asyncio.Task] = None
+        self.stats = {"queries": 0, "interrupts": 0, "frames": 0, "events": 0, "coalesced": 0,
+                      "max_lag_ms": 0.0}
+        self._send_lock = asyncio.Lock()
+    
+    async def send(self, payload: Dict[str, Any]):
+        """Send one JSON frame; frames from the query and control paths never interleave"""
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(payload, default=str))
+    
+    async def run(self):
+        """Receive control messages until the peer disconnects"""
+        await self.send({"type": "session", "conversation_id": self.conversation.conversation_id})
+        try:
+            while True:
+                text = await self.websocket.receive_text()
+                try:
+                    message = json.loads(text)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    await self.send({"type": "error", "message": "Frames must be JSON objects"})
+                    continue
+                await self._handle(message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await self._cancel_current()
+    
+    async def _handle(self, message: Dict[str, Any]):
+        """Dispatch one control message from the peer"""
+        message_type = message.get("type")
+        if message_type == "query":
+            if self.current is not None and not self.current.done():
+                await self.send({"type": "error", "id": message.get("id"), "message": "A query is already running"})
+                return
+            query = str(message.get("query", "")).strip()
+            if not query:
+                await self.send({"type": "error", "id": message.get("id"), "message": "Missing 'query'"})
+                return
+            self.current = asyncio.create_task(self._run_query(query, message.get("id")))
+        elif message_type == "interrupt":
+            await self._cancel_current()
+        elif message_type == "reset":
+            await self._cancel_current()
+            self.conversation.clear()
+            await self.send({"type": "reset"})
+        elif message_type == "ping":
+            await self.send({"type": "pong", "sent_at": message.get("sent_at"), "server_time": time.time()})
+        else:
+            await self.send({"type": "error", "message": f"Unknown message type: {message_type}"})
+    
+    async def _cancel_current(self):
+        """Interrupt the running query, if any, and wait until it has wound down"""
+        if self.current is not None and not self.current.done():
+            self.current.cancel()
+            await asyncio.gather(self.current, return_exceptions=True)
+    
+    async def _run_query(self, query: str, query_id: Any):
+        """Execute a query while a pump task forwards its events in frames"""
+        self.stats["queries"] += 1
+        batcher = FrameBatcher(self.config.flush_interval_ms)
+        streamed: List[str] = []
+        pump = asyncio.create_task(self._pump(batcher, query_id, streamed))
+        try:
+            async with deadline_scope():
+                with streaming_to(batcher.push):
+                    response = await self.workflow.execute(self.conversation, query)
+            batcher.close()
+            await pump
+            await self.send({"type": "final", "id": query_id, "content": response})
+        except asyncio.CancelledError:
+            self.stats["interrupts"] += 1
+            batcher.close()
+            await asyncio.gather(pump, return_exceptions=True)
+            self.conversation.record_interrupted(query, "".join(streamed))
+            await self.send({"type": "interrupted", "id": query_id, "partial": "".join(streamed)})
+        except DeadlineExceeded as e:
+            batcher.close()
+            await asyncio.gather(pump, return_exceptions=True)
+            self.conversation.record_interrupted(query, "".join(streamed))
+            await self.send({"type": "error", "id": query_id, "message": str(e), "partial": "".join(streamed)})
+        except Exception as e:
+            batcher.close()
+            await asyncio.gather(pump, return_exceptions=True)
+            await self.send({"type": "error", "id": query_id, "message": str(e)})
+        finally:
+            for key in ("events", "frames", "coalesced"):
+                self.stats[key] += batcher.stats[key]
+    
+    async def _pump(self, batcher: FrameBatcher, query_id: Any, streamed: List[str]):
+        """Forward frames; while a send is blocked, new tokens coalesce in the batcher"""
+        while (frame := await batcher.next_frame()) is not None:
+            if not frame:
+                continue
+            sent_at = time.time()
+            for event in frame:
+                if event.type == "token":
+                    streamed.append(event.data["content"])
+                elif event.type == "discard":
+                    streamed.clear()
+            lag_ms = (sent_at - frame[0].created_at) * 1000
+            self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+            await self.send({"type": "frame", "id": query_id, "sent_at": sent_at,
+                             "events": [event.to_dict() for event in frame]})
+
+class RealtimeClient(BaseClient):
+    """Bidirectional streaming client over WebSocket: tokens and tool progress out, interrupts in"""
+    
+    def __init__(self, workflow, config: Optional[RealtimeConfig] = None, checkpointer=None):
+        if Starlette is None:
+            raise ImportError("starlette not installed")
+        
+        super().__init__(workflow)
+        self.config = config or RealtimeConfig()
+        self.checkpointer = checkpointer
+        self.sessions: Dict[str, RealtimeSession] = {}
+        self.app = self.build_app()
+        self.server = None
+    
+    def build_app(self) -> "Starlette":
+        """ASGI application with the WebSocket endpoint"""
+        return Starlette(routes=[
+            Route("/health", self._health, methods=["GET"]),
+            WebSocketRoute("/ws", self._connect),
+        ])
+    
+    async def start(self):
+        """Serve WebSocket peers until stopped"""
+        if uvicorn is None:
+            raise ImportError("uvicorn not installed")
+        
+        server_config = uvicorn.Config(self.app, host=self.config.host, port=self.config.port,
+                                       log_level="warning", ws_max_queue=self.config.max_inbound_queue)
+        self.server = uvicorn.Server(server_config)
+        print(f"📡 Realtime client listening on ws://{self.config.host}:{self.config.port}/ws")
+        await self.server.serve()
+    
+    async def stop(self):
+        """Stop the server"""
+        if self.server is not None:
+            self.server.should_exit = True
+        print("🧹 Realtime client stopped.")
+    
+    async def _health(self, request) -> "JSONResponse":
+        return JSONResponse({
+            "status": "ok",
+            "sessions": len(self.sessions),
+            "stats": {conversation_id: session.stats for conversation_id, session in self.sessions.items()}
+        })
+    
+    async def _connect(self, websocket: "WebSocket"):
+        """Attach a peer to a new or resumed conversation (?conversation_id=...)"""
+        await websocket.accept()
+        conversation = None
+        conversation_id = websocket.query_params.get("conversation_id")
+        if conversation_id and self.checkpointer is not None:
+            conversation = await self.checkpointer.aload(conversation_id)
+        session = RealtimeSession(websocket, conversation or Conversation(), self.workflow, self.config)
+        key = session.conversation.conversation_id
+        self.sessions[key] = session
+        try:
+            await session.run()
+        finally:
+            self.sessions.pop(key, None)
@@ -1,6 +1,6 @@
 import os
 from typing import Dict, List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,6 +19,155 @@ class LLMConfig:
     api_key_env: str
     temperature: float = 0.1
     additional_params: Optional[Dict] = None
+    context_budget_tokens: int = 8000
+
+@dataclass
+class TieringConfig:
+    """Settings for per-request model tier selection"""
+    enabled: bool = False
+    name: str = "auto"
+    small_llm: str = "gemini"
+    large_llm: str = "openai"
+    max_simple_query_chars: int = 200
+    max_simple_tools: int = 2
+    max_simple_depth: int = 6
+    min_confidence: float = 0.5
+
+@dataclass
+class HTTPPoolConfig:
+    """Settings for the shared keepalive HTTP pool and connection warmup"""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    timeout: float = 60.0
+    warmup: bool = False  # LLM provider connections only
+
+@dataclass
+class RoutingConfig:
+    """Settings for the agent intent router"""
+    log_path: str = ""
+    classifier_training_path: str = ""
+    classifier_threshold: float = 0.6
+
+@dataclass
+class CheckpointConfig:
+    """Settings for durable conversation checkpoints"""
+    path: str = ""  # SQLite file; empty disables checkpointing
+    resume_id: str = ""
+
+@dataclass
+class APIConfig:
+    """Settings for the HTTP API client"""
+    host: str = "127.0.0.1"
+    port: int = 8080
+    max_concurrency: int = 32  # queries executing at once across all sessions
+    max_sessions: int = 1000  # conversations kept in memory
+    queue_timeout: float = 30.0  # seconds a request may wait for a free slot
+    workers: int = 1  # processes; above 1 a front dispatcher shards conversations across them
+    worker_max_requests: int = 0  # requests after which a worker process is replaced; 0 never
+    uds: str = ""  # Unix socket to serve on instead of host and port (set for worker processes)
+
+@dataclass
+class RealtimeConfig:
+    """Settings for the WebSocket streaming client"""
+    host: str = "127.0.0.1"
+    port: int = 8081
+    flush_interval_ms: float = 5.0  # longest a token waits to share a frame; 0 sends each event at once
+    max_inbound_queue: int = 32  # control frames buffered per peer before reads stop
+
+@dataclass
+class BatchConfig:
+    """Settings for the offline JSONL batch runner"""
+    input_path: str = "queries.jsonl"
+    output_path: str = "results.jsonl"
+    concurrency: int = 8
+    deadline_s: float = 60.0  # per query; records may override with "deadline_s"
+    retry_failed: bool = False  # rerun timeouts and errors when resuming
+    progress_every: int = 100
+
+@dataclass
+class TracingConfig:
+    """Settings for span tracing"""
+    exporter: str = ""  # "json", "otlp" or empty to disable
+    json_path: str = "traces.jsonl"
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    service_name: str = "langgraph-mcp-client"
+
+@dataclass
+class MetricsConfig:
+    """Settings for the Prometheus metrics endpoint"""
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9464
+
+@dataclass
+class ToolCompressionConfig:
+    """Settings for shrinking tool results before they reach the LLM"""
+    enabled: bool = False
+    token_budget: int = 1500  # per result, estimated at CHARS_PER_TOKEN
+    max_rows: int = 20
+    max_string_chars: int = 400
+    rules_path: str = ""  # JSON object of per-tool overrides keyed by tool name or glob
+
+@dataclass
+class SpeculationConfig:
+    """Settings for starting predicted tool calls while the LLM plans"""
+    enabled: bool = False
+    max_calls: int = 2  # per agent turn
+    read_only_tools: str = "get_*,list_*,search_*,fetch_*"  # globs, used when a tool has no readOnlyHint
+
+@dataclass
+class WorkflowConfig:
+    """Settings for choosing and tuning the workflow"""
+    kind: str = "react"  # "react" or "plan_execute"
+    max_replans: int = 1  # plan-and-execute: extra planning passes after failed steps
+    max_parallel_steps: int = 8
+
+@dataclass
+class FastPathConfig:
+    """Settings for answering template-matching queries without the LLM"""
+    templates_path: str = ""  # JSON list of intent templates; empty disables the fast path
+
+@dataclass
+class DeadlineConfig:
+    """Settings for per-query time budgets"""
+    query_timeout_s: float = 120.0  # whole query, from the client front end; 0 disables
+    llm_timeout_s: float = 60.0  # one model call, when shorter than the query's remaining budget
+    tool_timeout_s: float = 30.0  # one MCP tool call, likewise
+
+@dataclass
+class CassetteConfig:
+    """Settings for recording LLM and MCP traffic and replaying it offline"""
+    mode: str = ""  # "record", "replay" or empty for live traffic
+    path: str = "cassettes/session.jsonl"
+    latency_scale: float = 1.0  # replayed latency as a multiple of the recorded one; 0 answers at once
+
+@dataclass
+class ToolValidationConfig:
+    """Settings for checking tool arguments locally before dispatch"""
+    enabled: bool = True
+
+@dataclass
+class ToolCacheConfig:
+    """Settings for sharing results of read-only tool calls between queries"""
+    enabled: bool = False
+    ttl_s: float = 300.0
+    max_entries: int = 1024
+    read_only_tools: str = "get_*,list_*,search_*,fetch_*"  # globs, used when a tool has no readOnlyHint
+
+@dataclass
+class CacheWarmerConfig:
+    """Settings for refreshing hot read-only tool calls in the background"""
+    enabled: bool = False
+    interval_s: float = 240.0  # refresh period for a target asked for once per period; keep it under the TTL
+    min_interval_s: float = 30.0  # for the hottest targets
+    max_interval_s: float = 1800.0  # backoff limit for targets nobody asks for
+    jitter: float = 0.1  # fraction of the interval
+    concurrency: int = 2
+    cities: str = "London,New York,Tokyo,Paris,Mumbai"  # weather warmed for each
+    tools: str = "get_available_flights"  # tools without required arguments, warmed as they are
+    targets_path: str = ""  # JSON list of {"tool": ..., "arguments": {...}} for anything else
+    failure_threshold: int = 3  # consecutive failures before a server's targets are paused
 
 @dataclass
 class AppSettings:
@@ -26,6 +175,24 @@ class AppSettings:
     llm_configs: List[LLMConfig]
     default_llm: str
     client_type: str = "terminal"
+    tiering: TieringConfig = field(default_factory=TieringConfig)
+    http_pool: HTTPPoolConfig = field(default_factory=HTTPPoolConfig)
+    routing: RoutingConfig = field(default_factory=RoutingConfig)
+    checkpoint: CheckpointConfig = field(default_factory=CheckpointConfig)
+    api: APIConfig = field(default_factory=APIConfig)
+    realtime: RealtimeConfig = field(default_factory=RealtimeConfig)
+    batch: BatchConfig = field(default_factory=BatchConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    tool_compression: ToolCompressionConfig = field(default_factory=ToolCompressionConfig)
+    speculation: SpeculationConfig = field(default_factory=SpeculationConfig)
+    workflow: WorkflowConfig = field(default_factory=WorkflowConfig)
+    fast_path: FastPathConfig = field(default_factory=FastPathConfig)
+    deadline: DeadlineConfig = field(default_factory=DeadlineConfig)
+    cassette: CassetteConfig = field(default_factory=CassetteConfig)
+    tool_validation: ToolValidationConfig = field(default_factory=ToolValidationConfig)
+    tool_cache: ToolCacheConfig = field(default_factory=ToolCacheConfig)
+    cache_warmer: CacheWarmerConfig = field(default_factory=CacheWarmerConfig)
 
 def load_settings() -> AppSettings:
     """Load application settings from environment variables"""
@@ -51,20 +218,185 @@ def load_settings() -> AppSettings:
             model_type="google",
             model_name="gemini-1.5-flash",
             api_key_env="GOOGLE_API_KEY",
-            temperature=0.1
+            temperature=0.1,
+            context_budget_tokens=int(os.getenv("GEMINI_CONTEXT_BUDGET", "16000"))
         ),
         LLMConfig(
             name="openai",
             model_type="openai", 
             model_name="gpt-4",
             api_key_env="OPENAI_API_KEY",
-            temperature=0.1
+            temperature=0.1,
+            context_budget_tokens=int(os.getenv("OPENAI_CONTEXT_BUDGET", "6000"))
         )
     ]
     
+    # Model tiering configuration
+    tiering = TieringConfig(
+        enabled=os.getenv("LLM_TIERING", "false").lower() == "true",
+        small_llm=os.getenv("LLM_SMALL", "gemini"),
+        large_llm=os.getenv("LLM_LARGE", "openai"),
+        max_simple_query_chars=int(os.getenv("LLM_TIER_MAX_QUERY_CHARS", "200")),
+        max_simple_tools=int(os.getenv("LLM_TIER_MAX_TOOLS", "2")),
+        max_simple_depth=int(os.getenv("LLM_TIER_MAX_DEPTH", "6")),
+        min_confidence=float(os.getenv("LLM_TIER_MIN_CONFIDENCE", "0.5"))
+    )
+    default_llm = os.getenv("DEFAULT_LLM", tiering.name if tiering.enabled else "gemini")
+    
+    # Shared HTTP transport configuration
+    http_pool = HTTPPoolConfig(
+        max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+        warmup=os.getenv("WARMUP_CONNECTIONS", "false").lower() == "true"
+    )
+    
+    # Intent routing configuration
+    routing = RoutingConfig(
+        log_path=os.getenv("ROUTING_LOG_PATH", ""),
+        classifier_training_path=os.getenv("ROUTING_CLASSIFIER_DATA", ""),
+        classifier_threshold=float(os.getenv("ROUTING_CLASSIFIER_THRESHOLD", "0.6"))
+    )
+    
+    # Conversation checkpoint configuration
+    checkpoint = CheckpointConfig(
+        path=os.getenv("CHECKPOINT_PATH", ""),
+        resume_id=os.getenv("RESUME_CONVERSATION_ID", "")
+    )
+    
+    # HTTP API client configuration
+    api = APIConfig(
+        host=os.getenv("API_HOST", "127.0.0.1"),
+        port=int(os.getenv("API_PORT", "8080")),
+        max_concurrency=int(os.getenv("API_MAX_CONCURRENCY", "32")),
+        max_sessions=int(os.getenv("API_MAX_SESSIONS", "1000")),
+        queue_timeout=float(os.getenv("API_QUEUE_TIMEOUT", "30")),
+        workers=int(os.getenv("API_WORKERS", "1")),
+        worker_max_requests=int(os.getenv("API_WORKER_MAX_REQUESTS", "0"))
+    )
+    
+    # Realtime streaming client configuration
+    realtime = RealtimeConfig(
+        host=os.getenv("REALTIME_HOST", "127.0.0.1"),
+        port=int(os.getenv("REALTIME_PORT", "8081")),
+        flush_interval_ms=float(os.getenv("REALTIME_FLUSH_MS", "5")),
+        max_inbound_queue=int(os.getenv("REALTIME_MAX_INBOUND_QUEUE", "32"))
+    )
+    
+    # Batch runner configuration
+    batch = BatchConfig(
+        input_path=os.getenv("BATCH_INPUT", "queries.jsonl"),
+        output_path=os.getenv("BATCH_OUTPUT", "results.jsonl"),
+        concurrency=int(os.getenv("BATCH_CONCURRENCY", "8")),
+        deadline_s=float(os.getenv("BATCH_DEADLINE", "60")),
+        retry_failed=os.getenv("BATCH_RETRY_FAILED", "false").lower() == "true"
+    )
+    
+    # Tracing configuration; the OTLP variables follow the OpenTelemetry conventions
+    tracing = TracingConfig(
+        exporter=os.getenv("TRACING_EXPORTER", "").lower(),
+        json_path=os.getenv("TRACING_JSON_PATH", "traces.jsonl"),
+        otlp_endpoint=os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces"),
+        service_name=os.getenv("OTEL_SERVICE_NAME", "langgraph-mcp-client")
+    )
+    
+    # Metrics endpoint configuration
+    metrics = MetricsConfig(
+        enabled=os.getenv("METRICS_ENABLED", "false").lower() == "true",
+        host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        port=int(os.getenv("METRICS_PORT", "9464"))
+    )
+    
+    # Tool result compression configuration
+    tool_compression = ToolCompressionConfig(
+        enabled=os.getenv("TOOL_COMPRESSION_ENABLED", "false").lower() == "true",
+        token_budget=int(os.getenv("TOOL_COMPRESSION_TOKEN_BUDGET", "1500")),
+        max_rows=int(os.getenv("TOOL_COMPRESSION_MAX_ROWS", "20")),
+        max_string_chars=int(os.getenv("TOOL_COMPRESSION_MAX_STRING_CHARS", "400")),
+        rules_path=os.getenv("TOOL_COMPRESSION_RULES", "")
+    )
+    
+    # Speculative tool prefetch configuration
+    speculation = SpeculationConfig(
+        enabled=os.getenv("TOOL_SPECULATION_ENABLED", "false").lower() == "true",
+        max_calls=int(os.getenv("TOOL_SPECULATION_MAX_CALLS", "2")),
+        read_only_tools=os.getenv("TOOL_SPECULATION_READ_ONLY", "get_*,list_*,search_*,fetch_*")
+    )
+    
+    # Workflow configuration
+    workflow = WorkflowConfig(
+        kind=os.getenv("WORKFLOW", "react").lower(),
+        max_replans=int(os.getenv("PLAN_MAX_REPLANS", "1")),
+        max_parallel_steps=int(os.getenv("PLAN_MAX_PARALLEL_STEPS", "8"))
+    )
+    
+    # Fast-path configuration
+    fast_path = FastPathConfig(
+        templates_path=os.getenv("FAST_PATH_TEMPLATES", "")
+    )
+    
+    # Deadline configuration
+    deadline = DeadlineConfig(
+        query_timeout_s=float(os.getenv("QUERY_TIMEOUT", "120")),
+        llm_timeout_s=float(os.getenv("LLM_CALL_TIMEOUT", "60")),
+        tool_timeout_s=float(os.getenv("TOOL_CALL_TIMEOUT", "30"))
+    )
+    
+    # Record/replay configuration
+    cassette = CassetteConfig(
+        mode=os.getenv("CASSETTE_MODE", "").lower(),
+        path=os.getenv("CASSETTE_PATH", "cassettes/session.jsonl"),
+        latency_scale=float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
+    )
+    
+    # Tool argument validation configuration
+    tool_validation = ToolValidationConfig(
+        enabled=os.getenv("TOOL_VALIDATION_ENABLED", "true").lower() == "true"
+    )
+    
+    # Tool result cache configuration
+    tool_cache = ToolCacheConfig(
+        enabled=os.getenv("TOOL_CACHE_ENABLED", "false").lower() == "true",
+        ttl_s=float(os.getenv("TOOL_CACHE_TTL", "300")),
+        max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+        read_only_tools=os.getenv("TOOL_CACHE_READ_ONLY", "get_*,list_*,search_*,fetch_*")
+    )
+    
+    # Background cache warming configuration
+    cache_warmer = CacheWarmerConfig(
+        enabled=os.getenv("CACHE_WARMER_ENABLED", "false").lower() == "true",
+        interval_s=float(os.getenv("CACHE_WARMER_INTERVAL", "240")),
+        min_interval_s=float(os.getenv("CACHE_WARMER_MIN_INTERVAL", "30")),
+        max_interval_s=float(os.getenv("CACHE_WARMER_MAX_INTERVAL", "1800")),
+        jitter=float(os.getenv("CACHE_WARMER_JITTER", "0.1")),
+        concurrency=int(os.getenv("CACHE_WARMER_CONCURRENCY", "2")),
+        cities=os.getenv("CACHE_WARMER_CITIES", "London,New York,Tokyo,Paris,Mumbai"),
+        tools=os.getenv("CACHE_WARMER_TOOLS", "get_available_flights"),
+        targets_path=os.getenv("CACHE_WARMER_TARGETS", ""),
+        failure_threshold=int(os.getenv("CACHE_WARMER_FAILURE_THRESHOLD", "3"))
+    )
+    
     return AppSettings(
         mcp_servers=mcp_servers,
         llm_configs=llm_configs,
-        default_llm=os.getenv("DEFAULT_LLM", "gemini"),
-        client_type=os.getenv("CLIENT_TYPE", "terminal")
+        default_llm=default_llm,
+        client_type=os.getenv("CLIENT_TYPE", "terminal"),
+        tiering=tiering,
+        http_pool=http_pool,
+        routing=routing,
+        checkpoint=checkpoint,
+        api=api,
+        realtime=realtime,
+        batch=batch,
+        tracing=tracing,
+        metrics=metrics,
+        tool_compression=tool_compression,
+        speculation=speculation,
+        workflow=workflow,
+        fast_path=fast_path,
+        deadline=deadline,
+        cassette=cassette,
+        tool_validation=tool_validation,
+        tool_cache=tool_cache,
+        cache_warmer=cache_warmer
     )
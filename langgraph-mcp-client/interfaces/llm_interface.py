@@ -10,6 +10,11 @@ class ILLMProvider(ABC):
         """Generate response from LLM"""
         pass
     
+    @abstractmethod
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        """Generate a tool-calling response (LangChain AIMessage) for LangChain messages"""
+        pass
+    
     @abstractmethod
     def get_model_info(self) -> dict:
         """Get model information"""
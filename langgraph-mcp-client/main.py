@@ -7,33 +7,125 @@ def main():
 if __name__ == "__main__":
     main()
 import asyncio
-from config.settings import load_settings
+from typing import Optional
+from config.settings import AppSettings, load_settings
+from interfaces.llm_interface import ILLMService
 from services.llm_service import LLMServiceFactory
-from services.mcp_service import MCPServiceFactory
+from services.http_pool import SharedHTTPPool
+from services.mcp_service import MCPService, MCPServiceFactory
+from services.cache_warmer import CacheWarmer
+from services.cassette import Cassette
+from services.checkpoint_service import ConversationCheckpointer
+from services.deadline import configure_deadlines, deadline_middleware
+from services.metrics import MetricsServer, metrics_middleware
+from services.tracing import configure_tracing, tracing_middleware
+from services.tool_cache import ToolResultCache
+from services.tool_compression import ToolOutputCompressor
+from services.tool_speculation import ToolSpeculator
+from services.tool_validation import ToolArgumentValidator
 from workflows.react_workflow import ReactWorkflow
+from workflows.plan_execute_workflow import PlanExecuteWorkflow
+from workflows.fast_path import FastPath
 from clients.terminal_client import TerminalClient
+from clients.api_client import APIClient
+from clients.sharded_api_client import ShardedAPIClient
+from clients.webrtc_client import RealtimeClient
+from clients.batch_client import BatchClient
 
 class Application:
     """Main application orchestrator"""
     
-    def __init__(self):
-        self.settings = load_settings()
-        self.llm_service = None
+    def __init__(self, settings: Optional[AppSettings] = None, llm_service: Optional[ILLMService] = None):
+        # Settings and LLM service can be injected (benchmarks, tests); by default they come from the environment
+        self.settings = settings or load_settings()
+        self.llm_service = llm_service
         self.mcp_service = None
         self.workflow = None
         self.client = None
+        self.http_pool = None
+        self.warmup_task = None
+        self.checkpointer = None
+        self.tracer = None
+        self.metrics_server = None
+        self.compressor = None
+        self.speculator = None
+        self.cassette = None
+        self.validator = None
+        self.tool_cache = None
+        self.cache_warmer = None
     
     async def initialize(self):
         """Initialize all services and components"""
         print("🚀 Initializing LangGraph MCP Client...")
+        self.tracer = configure_tracing(self.settings.tracing)
+        configure_deadlines(self.settings.deadline)
+        if self.settings.metrics.enabled:
+            self.metrics_server = MetricsServer(self.settings.metrics.host, self.settings.metrics.port)
+            await self.metrics_server.start()
+        if self.settings.cassette.mode:
+            self.cassette = Cassette(self.settings.cassette)
         
         # Initialize LLM service
         print("\n📦 Setting up LLM providers...")
-        self.llm_service = LLMServiceFactory.create_llm_service(self.settings.llm_configs)
+        if self.llm_service is None and self.cassette and self.cassette.mode == "replay":
+            self.llm_service = self.cassette.llm_service(self.settings.tiering)
+        elif self.llm_service is None:
+            try:
+                self.http_pool = SharedHTTPPool(self.settings.http_pool)
+            except ImportError as e:
+                print(f"⚠️ Shared HTTP pool unavailable: {e}")
+            self.llm_service = LLMServiceFactory.create_llm_service(
+                self.settings.llm_configs, self.settings.tiering, self.http_pool
+            )
+        
+        if self.cassette and self.cassette.mode == "record":
+            self.cassette.wrap_providers(self.llm_service)
+        
+        # Warm provider connections in the background while MCP servers connect
+        if self.settings.http_pool.warmup:
+            self.warmup_task = asyncio.create_task(self._warmup_connections())
         
         # Initialize MCP service
         print("\n🔗 Connecting to MCP servers...")
-        self.mcp_service = await MCPServiceFactory.create_mcp_service(self.settings.mcp_servers)
+        if self.cassette and self.cassette.mode == "replay":
+            self.mcp_service = MCPService()
+            self.cassette.register_tools(self.mcp_service.registry)
+        else:
+            self.mcp_service = await MCPServiceFactory.create_mcp_service(self.settings.mcp_servers)
+        if self.cassette and self.cassette.mode == "record":
+            self.cassette.record_tools(self.mcp_service.registry)
+        # Outermost, so malformed calls are turned back before anything else sees them
+        if self.settings.tool_validation.enabled:
+            self.validator = ToolArgumentValidator(self.mcp_service.registry.tools)
+            self.mcp_service.add_middleware(self.validator.middleware)
+        # Outside the rest, so a claimed speculation returns its already processed result as is
+        if self.settings.speculation.enabled:
+            self.speculator = ToolSpeculator(self.mcp_service.registry, self.settings.speculation)
+            self.mcp_service.add_middleware(self.speculator.middleware)
+        # Outside metrics and tracing, so only calls that reach a server are timed; hits skip compression too
+        if self.settings.tool_cache.enabled:
+            self.tool_cache = ToolResultCache(self.settings.tool_cache, self.mcp_service.registry.tools)
+            self.mcp_service.add_middleware(self.tool_cache.middleware)
+            # Warming would record into, or consume, a cassette's recordings
+            if self.settings.cache_warmer.enabled and not self.cassette:
+                self.cache_warmer = CacheWarmer(self.mcp_service.registry, self.tool_cache,
+                                                self.settings.cache_warmer)
+                # Sees every call reaching a server, so failures of user queries also pause warming
+                self.mcp_service.add_middleware(self.cache_warmer.health.middleware)
+        elif self.settings.cache_warmer.enabled:
+            print("⚠️ Cache warming needs TOOL_CACHE_ENABLED=true")
+        self.mcp_service.add_middleware(metrics_middleware)
+        if self.tracer.enabled:
+            self.mcp_service.add_middleware(tracing_middleware)
+        # Inside tracing and metrics, so a timed-out call shows up there as a failed tool call
+        self.mcp_service.add_middleware(deadline_middleware)
+        # Inside tracing, so the sizes land on the tool span and timings exclude the rest of the chain
+        if self.settings.tool_compression.enabled:
+            self.compressor = ToolOutputCompressor(self.settings.tool_compression)
+            self.mcp_service.add_middleware(self.compressor.middleware)
+        # Innermost of all, so cassettes hold raw server results and replay runs the whole chain over them
+        if self.cassette:
+            self.mcp_service.add_middleware(self.cassette.middleware)
         
         # Get all tools
         tools = await self.mcp_service.get_all_tools()
@@ -42,22 +134,83 @@ class Application:
         
         # Create workflow
         print(f"\n⚙️ Setting up workflow with {self.settings.default_llm} LLM...")
-        self.workflow = ReactWorkflow(self.llm_service, self.settings.default_llm)
+        if self.settings.workflow.kind == "plan_execute":
+            self.workflow = PlanExecuteWorkflow(self.llm_service, self.settings.default_llm, self.settings.workflow)
+        else:
+            self.workflow = ReactWorkflow(self.llm_service, self.settings.default_llm, self.settings.routing)
         self.workflow.set_tools(tools)
+        if isinstance(self.workflow, ReactWorkflow):
+            if self.speculator:
+                self.workflow.set_speculator(self.speculator)
+            if self.settings.fast_path.templates_path:
+                try:
+                    self.workflow.set_fast_path(FastPath.from_file(self.settings.fast_path.templates_path))
+                except (OSError, ValueError, TypeError) as e:
+                    print(f"⚠️ Fast path disabled: {e}")
+        if self.settings.checkpoint.path:
+            self.checkpointer = ConversationCheckpointer(self.settings.checkpoint.path)
+            self.workflow.set_checkpointer(self.checkpointer)
+        if self.cache_warmer:
+            self._start_cache_warmer()
         
         # Create client
         print(f"\n🖥️ Initializing {self.settings.client_type} client...")
         if self.settings.client_type == "terminal":
             self.client = TerminalClient(self.workflow)
+        elif self.settings.client_type == "api":
+            self.client = APIClient(self.workflow, self.settings.api, self.checkpointer)
+        elif self.settings.client_type == "realtime":
+            self.client = RealtimeClient(self.workflow, self.settings.realtime, self.checkpointer)
+        elif self.settings.client_type == "batch":
+            self.client = BatchClient(self.workflow, self.settings.batch)
         else:
             raise ValueError(f"Client type '{self.settings.client_type}' not implemented yet")
+        if self.checkpointer and self.settings.client_type == "terminal":
+            self._resume_conversation()
         
         print("✅ Initialization complete!")
     
+    def _resume_conversation(self):
+        """Restore the configured conversation into the client"""
+        resume_id = self.settings.checkpoint.resume_id
+        if resume_id:
+            conversation = self.checkpointer.load(resume_id)
+            if conversation:
+                self.client.conversation = conversation
+                print(f"♻️ Resumed conversation {resume_id} ({len(conversation.messages)} messages)")
+            else:
+                print(f"⚠️ No checkpoint found for conversation {resume_id}, starting a new one")
+        print(f"💾 Checkpointing conversation {self.client.conversation.conversation_id} "
+              f"to {self.settings.checkpoint.path}")
+    
+    def _start_cache_warmer(self):
+        """Warm the agents' predictable calls, the configured catalog tools and any configured targets"""
+        config = self.settings.cache_warmer
+        if isinstance(self.workflow, ReactWorkflow):
+            cities = [city.strip() for city in config.cities.split(",") if city.strip()]
+            self.cache_warmer.add_agent_targets(self.workflow.agent_manager.agents.values(), cities)
+        self.cache_warmer.add_tool_targets([name.strip() for name in config.tools.split(",") if name.strip()])
+        if config.targets_path:
+            try:
+                self.cache_warmer.load_targets(config.targets_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Cache warming targets not loaded: {e}")
+        self.cache_warmer.start()
+    
+    async def _warmup_connections(self):
+        """Pre-open connections to LLM providers"""
+        # MCP endpoints are not warmed: the MCP adapter opens its own httpx client for every session
+        print("🔥 Warming connections in the background...")
+        await self.llm_service.warmup()
+    
     async def run(self):
         """Run the application"""
         try:
-            await self.initialize()
+            if self.settings.client_type == "api" and self.settings.api.workers > 1:
+                # Every worker process runs its own Application; this one only dispatches
+                self.client = ShardedAPIClient(self.settings)
+            else:
+                await self.initialize()
             await self.client.start()
         except Exception as e:
             print(f"❌ Application error: {e}")
@@ -69,6 +222,34 @@ class Application:
         print("🧹 Cleaning up...")
         if self.client:
             await self.client.stop()
+        if self.warmup_task and not self.warmup_task.done():
+            self.warmup_task.cancel()
+        if self.cache_warmer:
+            await self.cache_warmer.stop()
+            print(f"🔥 Cache warmer: {self.cache_warmer.format_stats()}")
+        if self.tool_cache:
+            print(f"🗃️ Tool cache: {self.tool_cache.hit_rate():.0%} hit rate, "
+                  f"{self.tool_cache.stats['joined']} calls shared an in-flight request")
+        if self.llm_service:
+            for name, latency in self.llm_service.get_latency_report().items():
+                if latency["first_call_ms"] is not None:
+                    steady = f"{latency['steady_avg_ms']:.0f}ms" if latency["steady_avg_ms"] else "n/a"
+                    warmed = " (warmed)" if latency["warmed_before_first_call"] else ""
+                    print(f"⏱️ {name}: first query {latency['first_call_ms']:.0f}ms{warmed}, steady state {steady}")
+        if self.cassette:
+            if self.cassette.mode == "replay":
+                print(f"📼 Replayed {self.cassette.format_stats()}")
+            self.cassette.close()
+        if self.http_pool:
+            await self.http_pool.aclose()
+        if self.checkpointer:
+            self.checkpointer.close()
+        if isinstance(self.workflow, ReactWorkflow):
+            self.workflow.agent_manager.close()
+        if self.tracer:
+            self.tracer.shutdown()
+        if self.metrics_server:
+            await self.metrics_server.stop()
 
 async def main():
     """Main entry point"""
@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, List, Optional, Tuple
+from models.message import Message
+
+# Async callable folding messages into an existing summary: (summary, messages) -> new summary
+Summarizer = Callable[[str, List[Message]], Awaitable[str]]
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate without a tokenizer"""
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+@dataclass
+class ContextBudgetReport:
+    """Token budget usage of one assembled context"""
+    budget_tokens: int
+    system_tokens: int
+    summary_tokens: int
+    history_tokens: int
+    messages_included: int
+    messages_summarized: int
+    messages_dropped: int
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.summary_tokens + self.history_tokens
+    
+    def to_dict(self) -> dict:
+        report = asdict(self)
+        report["total_tokens"] = self.total_tokens
+        return report
+    
+    def describe(self) -> str:
+        return (f"{self.total_tokens}/{self.budget_tokens} tokens "
+                f"(system {self.system_tokens}, summary {self.summary_tokens}, "
+                f"{self.messages_included} messages, {self.messages_summarized} summarized, "
+                f"{self.messages_dropped} pending)")
+
+class ContextWindowManager:
+    """Keeps the system prompt and recent turns within a token budget"""
+    
+    def __init__(self, budget_tokens: int = 8000, summarizer: Optional[Summarizer] = None,
+                 min_fold_messages: int = 4):
+        self.budget_tokens = budget_tokens
+        self.summarizer = summarizer
+        self.min_fold_messages = min_fold_messages
+    
+    def build(self, conversation, system_prompt: str) -> Tuple[List[Message], ContextBudgetReport]:
+        """Assemble system prompt, rolling summary and the newest turns that fit"""
+        system_tokens = estimate_tokens(system_prompt)
+        summary_text = f"Summary of the earlier conversation:\n{conversation.summary}" if conversation.summary else ""
+        summary_tokens = estimate_tokens(summary_text) if summary_text else 0
+        remaining = self.budget_tokens - system_tokens - summary_tokens
+        
+        # System prompts are injected per call and never taken from history,
+        # so switching agents cannot stack duplicate system messages
+        history = conversation.messages
+        selected: List[Message] = []
+        history_tokens = 0
+        cutoff = len(history)
+        for index in range(len(history) - 1, conversation.summarized_count - 1, -1):
+            message = history[index]
+            if message.role == "system":
+                cutoff = index
+                continue
+            tokens = estimate_tokens(message.content)
+            # The newest message (the current query) is always kept
+            if selected and history_tokens + tokens > remaining:
+                break
+            selected.append(message)
+            history_tokens += tokens
+            cutoff = index
+        selected.reverse()
+        
+        # One leading system message keeps providers that accept only a single one happy
+        system_content = f"{system_prompt}\n\n{summary_text}" if summary_text else system_prompt
+        context = [Message(role="system", content=system_content)]
+        context.extend(selected)
+        
+        unsummarized = cutoff - conversation.summarized_count
+        if unsummarized >= self.min_fold_messages:
+            self._schedule_fold(conversation, cutoff)
+        
+        report = ContextBudgetReport(
+            budget_tokens=self.budget_tokens,
+            system_tokens=system_tokens,
+            summary_tokens=summary_tokens,
+            history_tokens=history_tokens,
+            messages_included=len(selected),
+            messages_summarized=conversation.summarized_count,
+            messages_dropped=max(unsummarized, 0)
+        )
+        return context, report
+    
+    def _schedule_fold(self, conversation, cutoff: int):
+        """Fold messages older than the cutoff into the summary in the background"""
+        if self.summarizer is None:
+            return
+        if conversation.summary_task is not None and not conversation.summary_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # A fresh context: the fold outlives the query, so it must not inherit its stream sink, tracing span or deadline
+        conversation.summary_task = loop.create_task(self._fold(conversation, cutoff), context=contextvars.Context())
+    
+    async def _fold(self, conversation, cutoff: int):
+        """Summarize messages up to the cutoff and advance the summary watermark"""
+        start = conversation.summarized_count
+        messages = [msg for msg in conversation.messages[start:cutoff] if msg.role != "system"]
+        try:
+            summary = await self.summarizer(conversation.summary, messages)
+        except Exception as e:
+            print(f"⚠️ Context summarization failed: {e}")
+            return
+        # Skip if the conversation was cleared or folded meanwhile
+        if conversation.summarized_count == start and len(conversation.messages) >= cutoff:
+            conversation.summary = summary.strip()
+            conversation.summarized_count = cutoff
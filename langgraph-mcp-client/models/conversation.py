@@ -1,27 +1,69 @@
-from typing import List
+import asyncio
+import uuid
+from typing import List, Optional, Tuple
 from dataclasses import dataclass, field
 from models.message import Message
+from models.message_store import MessageStore
+from models.context_window import ContextWindowManager, ContextBudgetReport
 
 @dataclass
 class Conversation:
-    messages: List[Message] = field(default_factory=list)
+    messages: MessageStore = field(default_factory=MessageStore)
     conversation_id: str = ""
+    summary: str = ""
+    summarized_count: int = 0
+    summary_task: Optional[asyncio.Task] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        if not isinstance(self.messages, MessageStore):
+            self.messages = MessageStore(self.messages)
+        if not self.conversation_id:
+            self.conversation_id = uuid.uuid4().hex
     
     def add_message(self, role: str, content: str, metadata: dict = None):
         """Add a message to the conversation"""
         message = Message(role=role, content=content, metadata=metadata)
         self.messages.append(message)
     
+    def record_interrupted(self, query: str, partial: str = ""):
+        """Keep an interrupted turn in the history so the next query has its context"""
+        last = self.messages[-1] if self.messages else None
+        if last is None or last.role != "user" or last.content != query:
+            self.add_message("user", query)
+        self.add_message("assistant", partial or "(interrupted)", metadata={"interrupted": True})
+    
+    def fork(self) -> "Conversation":
+        """Copy of the conversation that can be extended independently"""
+        return Conversation(
+            messages=self.messages.copy(),
+            conversation_id=self.conversation_id,
+            summary=self.summary,
+            summarized_count=self.summarized_count
+        )
+    
+    def build_context(self, system_prompt: str, manager: ContextWindowManager) -> Tuple[List[Message], ContextBudgetReport]:
+        """Messages to send to the model within the manager's token budget"""
+        return manager.build(self, system_prompt)
+    
     def clear(self):
         """Clear conversation history"""
         self.messages.clear()
+        self.summary = ""
+        self.summarized_count = 0
+        if self.summary_task is not None and not self.summary_task.done():
+            self.summary_task.cancel()
+        self.summary_task = None
     
     def to_langgraph_format(self) -> dict:
-        """Convert to LangGraph compatible format"""
+        """Convert to LangGraph compatible format, as new dicts on every call"""
         return {
-            "messages": [msg.to_dict() for msg in self.messages]
+            "messages": self.messages.serialized()
         }
     
+    def to_langgraph_json(self) -> str:
+        """LangGraph compatible format as JSON; only messages added since the last call are encoded"""
+        return '{"messages":[' + self.messages.encoded() + "]}"
+    
     def get_context_summary(self, last_n: int = 4) -> str:
         """Get a summary of recent conversation context"""
         if len(self.messages) == 0:
@@ -1,23 +1,37 @@
+import sys
+import time
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True, frozen=True, init=False)
 class Message:
     role: str  # "user", "assistant", "system"
     content: str
-    timestamp: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
+    created_at: float = 0.0  # epoch seconds; cheaper to hold than a datetime
     
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now()
+    def __init__(self, role: str, content: str, timestamp: Optional[datetime] = None,
+                 metadata: Optional[Dict[str, Any]] = None, created_at: float = 0.0):
+        # timestamp is still accepted, in its original position, and stored as epoch seconds
+        if not created_at:
+            created_at = timestamp.timestamp() if timestamp is not None else time.time()
+        # Interned roles share one string object across all sessions
+        object.__setattr__(self, "role", sys.intern(role))
+        object.__setattr__(self, "content", content)
+        object.__setattr__(self, "metadata", metadata)
+        object.__setattr__(self, "created_at", created_at)
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time as a datetime"""
+        return datetime.fromtimestamp(self.created_at)
     
     def to_dict(self) -> dict:
         """Convert message to dictionary format"""
         return {
             "role": self.role,
             "content": self.content,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "timestamp": self.timestamp.isoformat(),
             "metadata": self.metadata
         }
@@ -0,0 +1,74 @@
+import json
+from typing import Iterable, Iterator, List, Optional, Union
+from models.message import Message
+
+class MessageStore:
+    """Append-only message sequence with an incrementally encoded JSON form"""
+    
+    __slots__ = ("_messages", "_encoded", "_encoded_count")
+    
+    def __init__(self, messages: Optional[Iterable[Message]] = None):
+        self._messages: List[Message] = list(messages) if messages else []
+        # Compact JSON of the first _encoded_count messages, comma-separated: one string, no per-message objects
+        self._encoded = ""
+        self._encoded_count = 0
+    
+    def append(self, message: Message):
+        """Append a message"""
+        self._messages.append(message)
+    
+    def extend(self, messages: Iterable[Message]):
+        """Append several messages"""
+        self._messages.extend(messages)
+    
+    def clear(self):
+        """Drop all messages and their encoded form"""
+        self._messages.clear()
+        self._encoded = ""
+        self._encoded_count = 0
+    
+    def copy(self) -> "MessageStore":
+        """Independent store sharing the (immutable) messages and their encoded form"""
+        store = MessageStore(self._messages)
+        store._encoded = self._encoded
+        store._encoded_count = self._encoded_count
+        return store
+    
+    def serialized(self) -> List[dict]:
+        """All messages as new dicts; not cached, since the dicts would outweigh the messages they describe"""
+        return [message.to_dict() for message in self._messages]
+    
+    def encoded(self) -> str:
+        """Messages as comma-separated compact JSON, encoding only those appended since the last call"""
+        if self._encoded_count < len(self._messages):
+            new = ",".join(json.dumps(message.to_dict(), ensure_ascii=False, separators=(",", ":"), default=str)
+                           for message in self._messages[self._encoded_count:])
+            # Dropping the attribute's reference first lets CPython extend the string in place instead of copying it
+            encoded, self._encoded = self._encoded, ""
+            encoded += f",{new}" if encoded else new
+            self._encoded = encoded
+            self._encoded_count = len(self._messages)
+        return self._encoded
+    
+    def __len__(self) -> int:
+        return len(self._messages)
+    
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._messages)
+    
+    def __reversed__(self) -> Iterator[Message]:
+        return reversed(self._messages)
+    
+    def __getitem__(self, index: Union[int, slice]):
+        return self._messages[index]
+    
+    def __bool__(self) -> bool:
+        return bool(self._messages)
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, MessageStore):
+            return self._messages == other._messages
+        return self._messages == other
+    
+    def __repr__(self) -> str:
+        return f"MessageStore({len(self._messages)} messages)"
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+@dataclass
+class StreamEvent:
+    """Progress event produced while a query is being processed"""
+    type: str  # "route", "plan", "token", "tool_start", "tool_end", "final", "error"
+    data: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    
+    def to_dict(self) -> dict:
+        """Flat dictionary for JSON transports"""
+        return {"type": self.type, **self.data, "created_at": self.created_at}
+
+EventSink = Callable[[StreamEvent], None]
+
+# Set by a streaming front end for the duration of one query; agents and
+# workflows publish through emit() without knowing who is listening
+_event_sink: ContextVar[Optional[EventSink]] = ContextVar("event_sink", default=None)
+
+def emit(event_type: str, **data):
+    """Publish an event to the active stream, if any"""
+    sink = _event_sink.get()
+    if sink is not None:
+        sink(StreamEvent(event_type, data))
+
+def is_streaming() -> bool:
+    """Whether a stream is listening in the current context"""
+    return _event_sink.get() is not None
+
+@contextmanager
+def streaming_to(sink: Optional[EventSink]):
+    """Send events emitted in this context (and tasks started from it) to the sink; None silences internal calls"""
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+async def stream_execution(run: Callable[[], Awaitable[str]]) -> AsyncIterator[StreamEvent]:
+    """Run a query coroutine, yielding its events as they happen and the response last"""
+    queue: asyncio.Queue = asyncio.Queue()
+    with streaming_to(queue.put_nowait):
+        # The task copies the current context, sink included
+        task = asyncio.create_task(run())
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        try:
+            last = StreamEvent("final", {"content": task.result()})
+        except Exception as e:
+            last = StreamEvent("error", {"message": str(e)})
+        yield last
+    finally:
+        # The consumer went away before the query finished
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import json
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from agents.base_agent import BaseAgent
+from agents.news_agent import NewsAgent
+from agents.weather_agent import WeatherAgent
+from config.settings import CacheWarmerConfig
+from services.metrics import registry
+from services.tool_cache import ToolResultCache, cache_key
+from services.tool_registry import ToolCall, ToolHandler, ToolRegistry
+
+CACHE_WARMS = registry.counter("mcp_client_cache_warms_total", "Background cache refreshes by outcome",
+                               ["tool", "outcome"])
+
+class BackendHealth:
+    """Consecutive failed tool calls per MCP server, from user traffic and warming alike"""
+    
+    def __init__(self, failure_threshold: int, retry_after_s: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.retry_after_s = retry_after_s
+        self._failures: Dict[str, int] = {}
+        self._failed_at: Dict[str, float] = {}
+    
+    def record(self, server: str, ok: bool):
+        if ok:
+            self._failures.pop(server, None)
+        else:
+            self._failures[server] = self._failures.get(server, 0) + 1
+            self._failed_at[server] = time.monotonic()
+    
+    def allows(self, server: str) -> bool:
+        """Whether to call a server: always below the failure threshold, past it once per retry period as a probe"""
+        if self._failures.get(server, 0) < self.failure_threshold:
+            return True
+        now = time.monotonic()
+        if now - self._failed_at[server] < self.retry_after_s:
+            return False
+        self._failed_at[server] = now  # the probe; other calls wait for its outcome or the next period
+        return True
+    
+    async def middleware(self, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Tool middleware recording the outcome of every call that reaches a server"""
+        try:
+            result = await next_handler(call)
+        except Exception:
+            self.record(call.server, False)
+            raise
+        self.record(call.server, True)
+        return result
+
+class WarmTarget:
+    """A read-only call kept in the cache, with its current refresh period"""
+    __slots__ = ("server", "tool", "arguments", "key", "interval_s", "due_at", "refreshing")
+    
+    def __init__(self, server: str, tool: str, arguments: Dict[str, Any], interval_s: float, due_at: float):
+        self.server = server
+        self.tool = tool
+        self.arguments = arguments
+        self.key = cache_key(tool, arguments)
+        self.interval_s = interval_s
+        self.due_at = due_at
+        self.refreshing = False
+
+class CacheWarmer:
+    """Refreshes a set of read-only tool calls in the background so queries find them in the tool result cache"""
+    
+    def __init__(self, tool_registry: ToolRegistry, cache: ToolResultCache, config: CacheWarmerConfig):
+        self.tool_registry = tool_registry
+        self.cache = cache
+        self.config = config
+        # Unhealthy servers are probed again after the shortest refresh period
+        self.health = BackendHealth(config.failure_threshold, config.min_interval_s)
+        self.targets: Dict[str, WarmTarget] = {}
+        self.stats = {"refreshed": 0, "failed": 0, "skipped": 0}
+        self._semaphore = asyncio.Semaphore(max(1, config.concurrency))
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._refreshes: Set[asyncio.Task] = set()
+    
+    def add_target(self, tool: str, arguments: Dict[str, Any]) -> bool:
+        """Keep one call warm; only read-only tools the cache serves qualify"""
+        server = self.tool_registry.server_for(tool)
+        if server is None:
+            print(f"⚠️ Not warming unknown tool '{tool}'")
+            return False
+        if not self.cache.is_cacheable(tool):
+            print(f"⚠️ Not warming '{tool}': not a read-only tool")
+            return False
+        target = WarmTarget(server, tool, dict(arguments), self.config.interval_s, 0.0)
+        if target.key in self.targets:
+            return False
+        self.targets[target.key] = target
+        return True
+    
+    def add_agent_targets(self, agents: Iterable[BaseAgent], cities: List[str]):
+        """Headlines for every news category and weather for each city, with the arguments the agents predict"""
+        for agent in agents:
+            if isinstance(agent, NewsAgent):
+                queries = [f"latest {category} headlines" for category in agent.news_categories]
+            elif isinstance(agent, WeatherAgent):
+                queries = [f"weather in {city}" for city in cities]
+            else:
+                continue
+            for query in queries:
+                for tool, arguments in agent.predict_tool_calls(query, agent.get_agent_tools()):
+                    self.add_target(tool, arguments)
+    
+    def add_tool_targets(self, names: List[str]):
+        """Tools taking no required arguments, such as catalogs, warmed as they are"""
+        tools = {tool.name: tool for tool in self.tool_registry.tools}
+        for name in names:
+            tool = tools.get(name)
+            if tool is None:
+                print(f"⚠️ Not warming unknown tool '{name}'")
+                continue
+            schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+            if schema.get("required"):
+                print(f"⚠️ Not warming '{name}': it needs {', '.join(schema['required'])}")
+                continue
+            self.add_target(name, {})
+    
+    def load_targets(self, path: str):
+        """Calls from a JSON list of {"tool": ..., "arguments": {...}}"""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(f"{path} must hold a JSON list of tool calls")
+        for entry in entries:
+            self.add_target(entry["tool"], entry.get("arguments", {}))
+    
+    def start(self):
+        """Begin warming; first refreshes are spread over a short jittered window"""
+        if not self.targets:
+            print("⚠️ Cache warmer has no targets")
+            return
+        if self.config.interval_s >= self.cache.ttl_s:
+            print("⚠️ CACHE_WARMER_INTERVAL is not shorter than TOOL_CACHE_TTL; entries expire between refreshes")
+        now = asyncio.get_running_loop().time()
+        spread = self.config.min_interval_s * self.config.jitter
+        for target in self.targets.values():
+            target.due_at = now + random.uniform(0, spread)
+        self._task = asyncio.create_task(self._run())
+        print(f"🔥 Warming {len(self.targets)} read-only tool calls in the background")
+    
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._refreshes) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+    
+    async def _run(self):
+        """Start every due refresh, then sleep until the next one is due or a refresh finishes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            for target in self.targets.values():
+                if not target.refreshing and target.due_at <= now:
+                    target.refreshing = True
+                    task = asyncio.create_task(self._refresh(target))
+                    self._refreshes.add(task)
+                    task.add_done_callback(self._refreshes.discard)
+            waiting = [target.due_at for target in self.targets.values() if not target.refreshing]
+            delay = min(waiting) - now if waiting else self.config.max_interval_s
+            self._wake.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), max(0.0, delay))
+    
+    async def _refresh(self, target: WarmTarget):
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            # Checked once a slot is free, so queued refreshes see failures of the ones before them
+            if not self.health.allows(target.server):
+                outcome = "skipped"
+            else:
+                try:
+                    await self.tool_registry.call(ToolCall(target.server, target.tool, dict(target.arguments),
+                                                           {"warming": True}))
+                    outcome = "refreshed"
+                except Exception as e:
+                    outcome = "failed"
+                    print(f"⚠️ Warming {target.tool} failed: {e}")
+        if outcome == "skipped":
+            delay = self.health.retry_after_s
+        else:
+            target.interval_s = self._next_interval(target)
+            delay = target.interval_s
+        jitter = self.config.jitter
+        target.due_at = loop.time() + delay * random.uniform(1 - jitter, 1 + jitter)
+        target.refreshing = False
+        self._wake.set()
+        self.stats[outcome] += 1
+        CACHE_WARMS.labels(target.tool, outcome).inc()
+    
+    def _next_interval(self, target: WarmTarget) -> float:
+        """Base period at one query per period, shorter in proportion to demand, doubling while nobody asks"""
+        demand = self.cache.demand(target.key, self.config.interval_s)
+        if demand == 0:
+            return min(target.interval_s * 2, self.config.max_interval_s)
+        return min(max(self.config.interval_s / demand, self.config.min_interval_s), self.config.max_interval_s)
+    
+    def format_stats(self) -> str:
+        return (f"{len(self.targets)} targets, {self.stats['refreshed']} refreshes, "
+                f"{self.stats['failed']} failed, {self.stats['skipped']} skipped while unhealthy")
@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+from config.settings import CassetteConfig, TieringConfig
+from interfaces.llm_interface import ILLMProvider
+from models.message import Message
+from models.stream_event import emit, is_streaming
+from services.llm_service import LLMService, TieredLLMProvider, collect_usage, llm_span, record_usage
+from services.metrics import LLM_LATENCY, registry, timed
+from services.tool_registry import ToolCall, ToolHandler, ToolRegistry
+
+try:
+    from langchain_core.messages import message_to_dict, messages_from_dict
+    from langchain_core.tools import StructuredTool, ToolException
+except ImportError:
+    StructuredTool = None
+
+CASSETTE_CALLS = registry.counter("mcp_client_cassette_calls_total",
+                                  "Recorded and replayed interactions by kind and outcome", ["kind", "outcome"])
+
+class CassetteMiss(KeyError):
+    """The replayed session made a request the cassette has no recording for"""
+
+def request_key(kind: str, name: str, request: Any) -> str:
+    """Stable identity of a request; repeated identical requests replay in recorded order"""
+    canonical = json.dumps(request, sort_keys=True, default=str)
+    return f"{kind}:{name}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]}"
+
+def message_fields(message: Any) -> Dict[str, Any]:
+    """The parts of a message that decide the model's answer; ids and timestamps vary between runs"""
+    if isinstance(message, Message):
+        return {"role": message.role, "content": message.content}
+    if isinstance(message, dict):
+        return {"role": message.get("role"), "content": message.get("content")}
+    fields = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        fields["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in tool_calls]
+    return fields
+
+class Cassette:
+    """LLM and MCP traffic of a session, written as JSON lines in record mode and served back in replay mode"""
+    
+    def __init__(self, config: CassetteConfig):
+        self.config = config
+        self.mode = config.mode
+        self.tools: List[Dict[str, Any]] = []
+        self.providers: Dict[str, Dict[str, Any]] = {}
+        self._recordings: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._file = None
+        self.stats = {"llm": 0, "tool": 0, "misses": 0, "input_tokens": 0, "output_tokens": 0}
+        if self.mode == "record":
+            directory = os.path.dirname(config.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(config.path, "w", encoding="utf-8")
+            print(f"📼 Recording LLM and MCP traffic to {config.path}")
+        elif self.mode == "replay":
+            self._load(config.path)
+        else:
+            raise ValueError(f"Unknown cassette mode '{self.mode}' (use 'record' or 'replay')")
+    
+    def _load(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["type"] == "tool_definition":
+                    self.tools.append(entry)
+                elif entry["type"] == "provider":
+                    self.providers[entry["name"]] = entry
+                else:
+                    self._recordings[entry["key"]].append(entry)
+        interactions = sum(len(entries) for entries in self._recordings.values())
+        print(f"📼 Replaying {interactions} interactions from {path} "
+              f"(latency x{self.config.latency_scale:g}, {len(self.tools)} tools, {len(self.providers)} LLMs)")
+    
+    def _write(self, entry: Dict[str, Any]):
+        # One line per interaction, flushed, so a crashed session still leaves a usable cassette
+        self._file.write(json.dumps(entry, default=str) + "\n")
+        self._file.flush()
+    
+    def record(self, kind: str, name: str, request: Any, response: Any, latency_ms: float, **extra: Any):
+        """Append one interaction"""
+        self._write({"type": kind, "name": name, "key": request_key(kind, name, request), "request": request,
+                     "response": response, "latency_ms": round(latency_ms, 3), **extra})
+        CASSETTE_CALLS.labels(kind, "recorded").inc()
+    
+    async def replay(self, kind: str, name: str, request: Any) -> Dict[str, Any]:
+        """The next recording of this request, after its recorded latency scaled by CASSETTE_LATENCY_SCALE"""
+        key = request_key(kind, name, request)
+        entries = self._recordings.get(key)
+        if not entries:
+            self.stats["misses"] += 1
+            CASSETTE_CALLS.labels(kind, "miss").inc()
+            raise CassetteMiss(f"No recording of this {kind} request to {name} ({key}); re-record the cassette")
+        entry = entries.popleft()
+        CASSETTE_CALLS.labels(kind, "replayed").inc()
+        self.stats[kind] += 1
+        if self.config.latency_scale > 0:
+            await asyncio.sleep(entry["latency_ms"] * self.config.latency_scale / 1000)
+        return entry
+    
+    def record_tools(self, tool_registry: ToolRegistry):
+        """Save the tool catalog, so replay needs no MCP server"""
+        for tool in tool_registry.tools:
+            schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+            self._write({"type": "tool_definition", "server": tool_registry.server_for(tool.name),
+                         "name": tool.name, "description": tool.description, "args_schema": schema,
+                         "metadata": tool.metadata, "response_format": tool.response_format})
+    
+    def register_tools(self, tool_registry: ToolRegistry):
+        """Recreate the recorded tool catalog; calls are answered by the middleware"""
+        if StructuredTool is None:
+            raise ImportError("langchain_core not installed")
+        
+        async def not_recorded(**arguments: Any) -> Any:
+            raise CassetteMiss("Tool calls are answered from the cassette")
+        
+        by_server: Dict[str, List[Any]] = defaultdict(list)
+        for entry in self.tools:
+            by_server[entry["server"]].append(StructuredTool(
+                name=entry["name"],
+                description=entry["description"],
+                args_schema=entry["args_schema"],
+                coroutine=not_recorded,
+                response_format=entry["response_format"],
+                metadata=entry["metadata"]
+            ))
+        for server, tools in by_server.items():
+            tool_registry.register(server, tools)
+            print(f"✅ Replaying {server}: {len(tools)} tools")
+    
+    async def middleware(self, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Innermost tool middleware: records raw server results, or serves them back"""
+        request = {"arguments": call.arguments}
+        if self.mode == "replay":
+            entry = await self.replay("tool", call.tool, request)
+            if "error" in entry:
+                raise ToolException(entry["error"])
+            # MCP adapter tools return (content, artifact); artifacts are not recorded
+            return (entry["response"], None) if entry.get("artifact") else entry["response"]
+        
+        start = time.perf_counter()
+        try:
+            result = await next_handler(call)
+        except ToolException as e:
+            self.record("tool", call.tool, request, None, (time.perf_counter() - start) * 1000, error=str(e))
+            raise
+        content = result[0] if isinstance(result, tuple) else result
+        self.record("tool", call.tool, request, content, (time.perf_counter() - start) * 1000,
+                    artifact=isinstance(result, tuple))
+        return result
+    
+    def wrap_providers(self, llm_service: LLMService):
+        """Route every registered LLM through a recorder; the tiered provider already goes through them"""
+        for name in llm_service.list_providers():
+            provider = llm_service.get_llm(name)
+            if isinstance(provider, TieredLLMProvider):
+                continue
+            info = {key: value for key, value in provider.get_model_info().items() if key != "latency"}
+            self._write({"type": "provider", "name": name, "model_info": info})
+            llm_service.register_llm(name, RecordingLLMProvider(name, provider, self))
+    
+    def llm_service(self, tiering: Optional[TieringConfig] = None) -> LLMService:
+        """LLM service answering from the cassette, with the tiered provider on top when tiering is enabled"""
+        service = LLMService(tiering)
+        for name in self.providers:
+            service.register_llm(name, ReplayLLMProvider(name, self))
+        if tiering and tiering.enabled and tiering.large_llm in self.providers:
+            service.register_llm(tiering.name, TieredLLMProvider(service))
+        return service
+    
+    def format_stats(self) -> str:
+        """Summary of a replayed session, for comparing orchestration changes"""
+        return (f"{self.stats['llm']} LLM calls ({self.stats['input_tokens']} input / "
+                f"{self.stats['output_tokens']} output tokens), {self.stats['tool']} tool calls, "
+                f"{self.stats['misses']} misses")
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+class RecordingLLMProvider(ILLMProvider):
+    """Passes calls to the real provider and records each request and response"""
+    
+    def __init__(self, name: str, provider: ILLMProvider, cassette: Cassette):
+        self.name = name
+        self.provider = provider
+        self.cassette = cassette
+        if hasattr(provider, "latency"):
+            self.latency = provider.latency
+    
+    async def warmup(self):
+        warmup = getattr(self.provider, "warmup", None)
+        if warmup:
+            await warmup()
+    
+    async def generate_response(self, messages: List[Message]) -> str:
+        start = time.perf_counter()
+        # The text response carries no usage_metadata, so the provider's reported counts are recorded beside it
+        with collect_usage() as usage:
+            response = await self.provider.generate_response(messages)
+        self.cassette.record("llm", self.name, {"operation": "generate_response",
+                                                "messages": [message_fields(m) for m in messages]},
+                             response, (time.perf_counter() - start) * 1000,
+                             usage=usage if any(usage.values()) else None)
+        return response
+    
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        start = time.perf_counter()
+        response = await self.provider.generate_with_tools(messages, tools)
+        self.cassette.record("llm", self.name, {"operation": "generate_with_tools",
+                                                "messages": [message_fields(m) for m in messages],
+                                                "tools": [tool.name for tool in tools]},
+                             message_to_dict(response), (time.perf_counter() - start) * 1000)
+        return response
+    
+    def get_model_info(self) -> dict:
+        return self.provider.get_model_info()
+
+class ReplayLLMProvider(ILLMProvider):
+    """Answers from the cassette with the recorded (scaled) latency and token usage"""
+    
+    def __init__(self, name: str, cassette: Cassette):
+        self.name = name
+        self.cassette = cassette
+        self.model_info = cassette.providers[name]["model_info"]
+    
+    async def generate_response(self, messages: List[Message]) -> str:
+        request = {"operation": "generate_response", "messages": [message_fields(m) for m in messages]}
+        with (llm_span("generate_response", "cassette", self.name, messages) as current,
+              timed(LLM_LATENCY.labels(self.name, "generate_response"), "llm")):
+            entry = await self.cassette.replay("llm", self.name, request)
+            usage = entry.get("usage")
+            record_usage(current, usage)
+        self._count_usage(usage)
+        response = entry["response"]
+        if is_streaming():
+            emit("token", content=response)
+        return response
+    
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        request = {"operation": "generate_with_tools", "messages": [message_fields(m) for m in messages],
+                   "tools": [tool.name for tool in tools]}
+        with (llm_span("generate_with_tools", "cassette", self.name, messages, tools) as current,
+              timed(LLM_LATENCY.labels(self.name, "generate_with_tools"), "llm")):
+            entry = await self.cassette.replay("llm", self.name, request)
+            response = messages_from_dict([entry["response"]])[0]
+            usage = getattr(response, "usage_metadata", None)
+            record_usage(current, usage)
+        self._count_usage(usage)
+        return response
+    
+    def _count_usage(self, usage: Optional[Dict[str, Any]]):
+        if usage:
+            self.cassette.stats["input_tokens"] += usage.get("input_tokens", 0)
+            self.cassette.stats["output_tokens"] += usage.get("output_tokens", 0)
+    
+    def get_model_info(self) -> dict:
+        return {**self.model_info, "provider": f"{self.model_info.get('provider', self.name)} (replay)"}
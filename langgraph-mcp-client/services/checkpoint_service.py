@@ -0,0 +1,407 @@
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from models.conversation import Conversation
+from models.message import Message
+from models.message_store import MessageStore
+
+try:
+    from langgraph.checkpoint.base import (
+        BaseCheckpointSaver, CheckpointTuple, WRITES_IDX_MAP,
+        get_checkpoint_id, get_checkpoint_metadata
+    )
+except ImportError:
+    BaseCheckpointSaver = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    conversation_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_count INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS graph_checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS graph_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS graph_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+class SQLiteStore:
+    """Shared SQLite connection; statements are serialized through one lock"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL keeps appends cheap and lets readers run alongside the writer
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+    
+    def close(self):
+        """Close the connection"""
+        with self.lock:
+            self.connection.close()
+
+class ConversationCheckpointer:
+    """Persists conversations turn by turn and restores them by conversation ID"""
+    
+    def __init__(self, path: str):
+        self.store = SQLiteStore(path)
+        # (message count, creation time of the last message) already on disk per
+        # conversation; only the tail past it is written
+        self._persisted: Dict[str, Tuple[int, float]] = {}
+        self._graph_saver = None
+        self.stats = {"saves": 0, "messages_written": 0, "save_ms": 0.0}
+    
+    @property
+    def graph_saver(self) -> Optional["SQLiteGraphSaver"]:
+        """LangGraph checkpointer on the same database, if langgraph is installed"""
+        if self._graph_saver is None and BaseCheckpointSaver is not None:
+            self._graph_saver = SQLiteGraphSaver(self.store)
+        return self._graph_saver
+    
+    def _persisted_count(self, conversation_id: str, messages: MessageStore) -> int:
+        """Messages already stored for a conversation that are still a prefix of its history"""
+        if conversation_id not in self._persisted:
+            row = self.store.connection.execute(
+                "SELECT s.message_count, m.created_at FROM sessions s LEFT JOIN messages m "
+                "ON m.conversation_id = s.conversation_id AND m.seq = s.message_count - 1 "
+                "WHERE s.conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            self._persisted[conversation_id] = (row[0], row[1] or 0.0) if row else (0, 0.0)
+        count, last_created_at = self._persisted[conversation_id]
+        # A cleared (and possibly regrown) history no longer matches what is stored
+        if count and (len(messages) < count or messages[count - 1].created_at != last_created_at):
+            return -1
+        return count
+    
+    def save(self, conversation: Conversation) -> int:
+        """Write messages added since the last save; returns how many were written"""
+        start = time.perf_counter()
+        conversation_id = conversation.conversation_id
+        # Snapshot the length once; the event loop may append while this runs in a thread
+        messages = conversation.messages
+        count = len(messages)
+        with self.store.lock:
+            connection = self.store.connection
+            persisted = self._persisted_count(conversation_id, messages)
+            connection.execute("BEGIN")
+            try:
+                if persisted < 0:
+                    # History was cleared; start the stored copy over
+                    connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                    persisted = 0
+                rows = [
+                    (conversation_id, seq, msg.role, msg.content,
+                     json.dumps(msg.metadata, default=str) if msg.metadata else None, msg.created_at)
+                    for seq, msg in enumerate(messages[persisted:count], start=persisted)
+                ]
+                connection.executemany(
+                    "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                    (conversation_id, conversation.summary, conversation.summarized_count,
+                     count, time.time())
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            self._persisted[conversation_id] = (count, messages[count - 1].created_at if count else 0.0)
+        
+        self.stats["saves"] += 1
+        self.stats["messages_written"] += len(rows)
+        self.stats["save_ms"] += (time.perf_counter() - start) * 1000
+        return len(rows)
+    
+    def load(self, conversation_id: str) -> Optional[Conversation]:
+        """Restore a conversation by ID, or None if it was never saved"""
+        with self.store.lock:
+            connection = self.store.connection
+            session = connection.execute(
+                "SELECT summary, summarized_count, message_count FROM sessions WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+            if session is None:
+                return None
+            rows = connection.execute(
+                "SELECT role, content, metadata, created_at FROM messages "
+                "WHERE conversation_id = ? ORDER BY seq", (conversation_id,)
+            ).fetchall()
+        
+        summary, summarized_count, message_count = session
+        messages = MessageStore(
+            Message(role=role, content=content,
+                    metadata=json.loads(metadata) if metadata else None, created_at=created_at)
+            for role, content, metadata, created_at in rows[:message_count]
+        )
+        self._persisted[conversation_id] = (len(messages), messages[-1].created_at if messages else 0.0)
+        return Conversation(
+            messages=messages,
+            conversation_id=conversation_id,
+            summary=summary,
+            summarized_count=min(summarized_count, len(messages))
+        )
+    
+    async def asave(self, conversation: Conversation) -> int:
+        """Save without blocking the event loop"""
+        return await asyncio.to_thread(self.save, conversation)
+    
+    async def aload(self, conversation_id: str) -> Optional[Conversation]:
+        """Load without blocking the event loop"""
+        return await asyncio.to_thread(self.load, conversation_id)
+    
+    def list_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently updated sessions"""
+        with self.store.lock:
+            rows = self.store.connection.execute(
+                "SELECT conversation_id, message_count, updated_at FROM sessions "
+                "ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"conversation_id": conversation_id, "message_count": count, "updated_at": updated_at}
+            for conversation_id, count, updated_at in rows
+        ]
+    
+    def delete(self, conversation_id: str):
+        """Remove a stored conversation"""
+        with self.store.lock:
+            connection = self.store.connection
+            connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            connection.execute("DELETE FROM sessions WHERE conversation_id = ?", (conversation_id,))
+        self._persisted.pop(conversation_id, None)
+    
+    def close(self):
+        """Close the database"""
+        self.store.close()
+
+class SQLiteGraphSaver(BaseCheckpointSaver or object):
+    """LangGraph checkpoint saver storing graph state in the conversation database"""
+    
+    def __init__(self, store: SQLiteStore):
+        super().__init__()
+        self.store = store
+    
+    def get_next_version(self, current: Optional[Union[str, int]], channel: Any) -> str:
+        # Zero-padded versions sort correctly as text
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+    
+    def _load_tuple(self, thread_id: str, checkpoint_ns: str, row) -> "CheckpointTuple":
+        """Assemble a checkpoint tuple with channel values and pending writes"""
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+        connection = self.store.connection
+        
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = connection.execute(
+                "SELECT type, blob FROM graph_blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?", (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchone()
+            if blob and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        
+        writes = connection.execute(
+            "SELECT task_id, channel, type, blob FROM graph_writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, blob)))
+                for task_id, channel, type_, blob in writes
+            ],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                  "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id else None
+            )
+        )
+    
+    def get_tuple(self, config: Dict[str, Any]) -> Optional["CheckpointTuple"]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self.store.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.store.connection.execute(
+                    f"SELECT {columns} FROM graph_checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self.store.connection.execute(
+                    f"SELECT {columns} FROM graph_checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)
+                ).fetchone()
+            return self._load_tuple(thread_id, checkpoint_ns, row) if row else None
+    
+    def list(self, config: Optional[Dict[str, Any]], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> Iterator["CheckpointTuple"]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM graph_checkpoints")
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        
+        with self.store.lock:
+            rows = self.store.connection.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                checkpoint_tuple = self._load_tuple(thread_id, checkpoint_ns, row)
+                if filter and not all(checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                results.append(checkpoint_tuple)
+        yield from results
+    
+    def put(self, config: Dict[str, Any], checkpoint: Dict[str, Any], metadata: Dict[str, Any],
+            new_versions: Dict[str, Any]) -> Dict[str, Any]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        
+        # Only channels that changed in this step are written
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+        type_, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        
+        with self.store.lock:
+            connection = self.store.connection
+            connection.execute("BEGIN")
+            try:
+                connection.executemany("INSERT OR REPLACE INTO graph_blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+                connection.execute(
+                    "INSERT OR REPLACE INTO graph_checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     type_, checkpoint_blob, metadata_type, metadata_blob)
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+    
+    def put_writes(self, config: Dict[str, Any], writes: Sequence[tuple], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for index, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id,
+                         WRITES_IDX_MAP.get(channel, index), channel, type_, blob, task_path))
+        # Special writes (errors, interrupts) are replaced; regular ones are stored once
+        with self.store.lock:
+            connection = self.store.connection
+            connection.executemany(
+                "INSERT OR REPLACE INTO graph_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] < 0]
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO graph_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] >= 0]
+            )
+    
+    def delete_thread(self, thread_id: str) -> None:
+        with self.store.lock:
+            for table in ("graph_checkpoints", "graph_blobs", "graph_writes"):
+                self.store.connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+    
+    # The async API runs statements on a worker thread, like asave/aload, so a wait for the lock
+    # or the disk does not stall the event loop
+    async def aget_tuple(self, config: Dict[str, Any]) -> Optional["CheckpointTuple"]:
+        return await asyncio.to_thread(self.get_tuple, config)
+    
+    async def alist(self, config: Optional[Dict[str, Any]], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> AsyncIterator["CheckpointTuple"]:
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+    
+    async def aput(self, config: Dict[str, Any], checkpoint: Dict[str, Any], metadata: Dict[str, Any],
+                   new_versions: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+    
+    async def aput_writes(self, config: Dict[str, Any], writes: Sequence[tuple], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+    
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Optional
+from config.settings import DeadlineConfig
+from services.metrics import registry
+from services.tool_registry import ToolCall, ToolHandler
+from services.tracing import current_span
+
+try:
+    from langchain_core.tools import ToolException
+except ImportError:
+    ToolException = RuntimeError
+
+DEADLINES = registry.counter("mcp_client_deadlines_exceeded_total",
+                             "Queries and single calls stopped by their time budget", ["scope"])
+
+class DeadlineExceeded(TimeoutError):
+    """The query used up its time budget; work still in flight was cancelled"""
+
+class Deadline:
+    """Absolute expiry of the query being handled, on the event loop clock"""
+    
+    __slots__ = ("budget_s", "expires_at")
+    
+    def __init__(self, budget_s: float, expires_at: float):
+        self.budget_s = budget_s
+        self.expires_at = expires_at
+    
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - asyncio.get_running_loop().time())
+
+# Deadline of the query running in this context; tasks started for the query inherit it
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+_config = DeadlineConfig()
+
+def configure_deadlines(config: DeadlineConfig):
+    """Set the default query budget and the per-call caps"""
+    global _config
+    _config = config
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the running query, if it has one"""
+    return _current.get()
+
+@asynccontextmanager
+async def deadline_scope(budget_s: Optional[float] = None) -> AsyncIterator[Optional[Deadline]]:
+    """Cancel the enclosed work when the budget runs out and raise DeadlineExceeded; never outlives an outer scope"""
+    budget_s = _config.query_timeout_s if budget_s is None else budget_s
+    if budget_s <= 0:
+        yield None
+        return
+    
+    expires_at = asyncio.get_running_loop().time() + budget_s
+    outer = _current.get()
+    if outer is not None:
+        expires_at = min(expires_at, outer.expires_at)
+    deadline = Deadline(budget_s, expires_at)
+    token = _current.set(deadline)
+    timeout = asyncio.timeout_at(expires_at)
+    try:
+        async with timeout:
+            yield deadline
+    except TimeoutError as e:
+        if not timeout.expired() or isinstance(e, DeadlineExceeded):
+            raise
+        DEADLINES.labels("query").inc()
+        raise DeadlineExceeded(f"Deadline of {budget_s:.1f}s exceeded") from None
+    finally:
+        _current.reset(token)
+
+def call_timeout(cap_s: float):
+    """Timeout for one LLM or tool call: its cap, unless the query's remaining budget is shorter"""
+    deadline = _current.get()
+    if cap_s > 0 and (deadline is None or cap_s < deadline.remaining()):
+        return asyncio.timeout(cap_s)
+    # Otherwise the query's deadline_scope cancels the call at expiry; a second timer for the same instant would race it
+    return nullcontext()
+
+@asynccontextmanager
+async def llm_call_timeout() -> AsyncIterator[None]:
+    """Bound one model call by LLM_CALL_TIMEOUT and the query's remaining budget"""
+    timeout = call_timeout(_config.llm_timeout_s)
+    try:
+        async with timeout:
+            yield
+    except TimeoutError:
+        if isinstance(timeout, asyncio.Timeout) and timeout.expired():
+            DEADLINES.labels("llm").inc()
+            raise TimeoutError(f"LLM call timed out after {_config.llm_timeout_s:.0f}s") from None
+        raise
+
+async def deadline_middleware(call: ToolCall, next_handler: ToolHandler) -> Any:
+    """Tool middleware bounding each MCP tool call by TOOL_CALL_TIMEOUT and the query's remaining budget"""
+    timeout = call_timeout(_config.tool_timeout_s)
+    deadline = _current.get()
+    if deadline is not None:
+        current_span().set_attribute("deadline.remaining_s", round(deadline.remaining(), 3))
+    try:
+        async with timeout:
+            return await next_handler(call)
+    except TimeoutError:
+        if isinstance(timeout, asyncio.Timeout) and timeout.expired():
+            DEADLINES.labels("tool").inc()
+            # A ToolException goes back to the agent as an error result instead of failing the whole query
+            raise ToolException(f"Tool {call.tool} timed out after {_config.tool_timeout_s:.0f}s") from None
+        raise
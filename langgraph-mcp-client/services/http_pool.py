@@ -0,0 +1,45 @@
+from config.settings import HTTPPoolConfig
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+class SharedHTTPPool:
+    """Keepalive HTTP connection pool shared by LLM providers"""
+    
+    def __init__(self, config: HTTPPoolConfig):
+        if httpx is None:
+            raise ImportError("httpx not installed")
+        
+        self.config = config
+        self.limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry
+        )
+        self._client = None
+        self._async_client = None
+    
+    @property
+    def client(self) -> "httpx.Client":
+        """Shared synchronous client"""
+        if self._client is None:
+            self._client = httpx.Client(limits=self.limits, timeout=self.config.timeout)
+        return self._client
+    
+    @property
+    def async_client(self) -> "httpx.AsyncClient":
+        """Shared asynchronous client"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(limits=self.limits, timeout=self.config.timeout)
+        return self._async_client
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
@@ -1,11 +1,23 @@
 import os
-from typing import Dict, List
+import time
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from interfaces.llm_interface import ILLMProvider, ILLMService
 from models.message import Message
-from config.settings import LLMConfig
+from models.stream_event import emit, is_streaming
+from config.settings import LLMConfig, TieringConfig
+from services.deadline import DeadlineExceeded, current_deadline, llm_call_timeout
+from services.http_pool import SharedHTTPPool
+from services.metrics import LLM_LATENCY, record_cache, timed
+from services.tracing import current_span, span
 
 try:
     from langchain_google_genai import ChatGoogleGenerativeAI
+    from google.ai.generativelanguage_v1beta.types import Content, Part
 except ImportError:
     ChatGoogleGenerativeAI = None
 
@@ -14,9 +26,93 @@ try:
 except ImportError:
     ChatOpenAI = None
 
+def llm_span(operation: str, provider: str, model: str, messages: List[Any], tools: Optional[List[Any]] = None):
+    """Tracing span for one model call"""
+    return span(f"llm.{operation}", {
+        "gen_ai.system": provider,
+        "gen_ai.request.model": model,
+        "llm.messages": len(messages),
+        "llm.tools": len(tools) if tools is not None else None
+    })
+
+# Set by collect_usage() for callers that need the token counts of calls returning plain text
+_usage_totals: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_usage", default=None)
+
+def record_usage(current: Any, usage: Optional[dict]):
+    """Token counts reported by the provider, on the given span and any collect_usage() in progress"""
+    if usage:
+        current.set_attributes({
+            "gen_ai.usage.input_tokens": usage.get("input_tokens"),
+            "gen_ai.usage.output_tokens": usage.get("output_tokens")
+        })
+        totals = _usage_totals.get()
+        if totals is not None:
+            for key in totals:
+                totals[key] += usage.get(key) or 0
+
+@contextmanager
+def collect_usage() -> Iterator[Dict[str, int]]:
+    """Sum of the token counts reported by model calls made in this context"""
+    totals = {"input_tokens": 0, "output_tokens": 0}
+    token = _usage_totals.set(totals)
+    try:
+        yield totals
+    finally:
+        _usage_totals.reset(token)
+
+async def invoke_text(llm: Any, formatted_messages: List[dict]) -> str:
+    """Invoke a chat model for text, streaming tokens when an event stream is listening"""
+    current = current_span()
+    if not is_streaming():
+        response = await llm.ainvoke(formatted_messages)
+        record_usage(current, getattr(response, 'usage_metadata', None))
+        return response.content if hasattr(response, 'content') else str(response)
+    
+    start = time.perf_counter()
+    parts = []
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    async for chunk in llm.astream(formatted_messages):
+        if isinstance(chunk.content, str) and chunk.content:
+            if not parts:
+                # Time to first token separates prompt processing from generation
+                current.set_attribute("llm.time_to_first_token_ms", round((time.perf_counter() - start) * 1000, 3))
+            parts.append(chunk.content)
+            emit("token", content=chunk.content)
+        for key, value in (getattr(chunk, 'usage_metadata', None) or {}).items():
+            if key in usage:
+                usage[key] += value
+    record_usage(current, usage if any(usage.values()) else None)
+    return "".join(parts)
+
+@dataclass
+class LatencyStats:
+    """First-call and steady-state latency of a provider"""
+    first_call_ms: Optional[float] = None
+    warmed_before_first_call: bool = False
+    steady_calls: int = 0
+    steady_total_ms: float = 0.0
+    
+    def record(self, latency_ms: float):
+        """Record a call latency"""
+        if self.first_call_ms is None:
+            self.first_call_ms = latency_ms
+        else:
+            self.steady_calls += 1
+            self.steady_total_ms += latency_ms
+    
+    def to_dict(self) -> dict:
+        return {
+            "first_call_ms": self.first_call_ms,
+            "warmed_before_first_call": self.warmed_before_first_call,
+            "steady_calls": self.steady_calls,
+            "steady_avg_ms": self.steady_total_ms / self.steady_calls if self.steady_calls else None
+        }
+
 class GoogleLLMProvider(ILLMProvider):
     """Google Gemini LLM Provider"""
     
+    PROVIDER = "google"
+    
     def __init__(self, config: LLMConfig):
         if ChatGoogleGenerativeAI is None:
             raise ImportError("langchain_google_genai not installed")
@@ -27,53 +123,138 @@ class GoogleLLMProvider(ILLMProvider):
             google_api_key=os.getenv(config.api_key_env),
             temperature=config.temperature
         )
+        self.latency = LatencyStats()
+        self._bound_models: Dict[Tuple[str, ...], Any] = {}
+    
+    async def warmup(self):
+        """Open the gRPC channel with a free count_tokens call"""
+        await self.llm.async_client.count_tokens(
+            model=self.llm.model, contents=[Content(parts=[Part(text="ping")])]
+        )
+        self.latency.warmed_before_first_call = self.latency.first_call_ms is None
     
     async def generate_response(self, messages: List[Message]) -> str:
         """Generate response using Google Gemini"""
         # Convert messages to LangChain format
         formatted_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
-        response = await self.llm.ainvoke(formatted_messages)
-        return response.content if hasattr(response, 'content') else str(response)
+        with (llm_span("generate_response", self.PROVIDER, self.config.model_name, messages),
+              timed(LLM_LATENCY.labels(self.config.name, "generate_response"), "llm")):
+            start = time.perf_counter()
+            async with llm_call_timeout():
+                response = await invoke_text(self.llm, formatted_messages)
+            self.latency.record((time.perf_counter() - start) * 1000)
+        return response
+    
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        """Generate a tool-calling response using Google Gemini"""
+        key = tuple(tool.name for tool in tools)
+        record_cache("llm_bound_model", key in self._bound_models)
+        if key not in self._bound_models:
+            self._bound_models[key] = self.llm.bind_tools(tools) if tools else self.llm
+        with (llm_span("generate_with_tools", self.PROVIDER, self.config.model_name, messages, tools) as current,
+              timed(LLM_LATENCY.labels(self.config.name, "generate_with_tools"), "llm")):
+            start = time.perf_counter()
+            async with llm_call_timeout():
+                response = await self._bound_models[key].ainvoke(messages)
+            self.latency.record((time.perf_counter() - start) * 1000)
+            record_usage(current, getattr(response, 'usage_metadata', None))
+            current.set_attribute("llm.tool_calls", len(getattr(response, 'tool_calls', None) or []))
+        return response
     
     def get_model_info(self) -> dict:
         return {
             "provider": "Google",
             "model": self.config.model_name,
-            "temperature": self.config.temperature
+            "temperature": self.config.temperature,
+            "context_budget_tokens": self.config.context_budget_tokens,
+            "latency": self.latency.to_dict()
         }
 
 class OpenAILLMProvider(ILLMProvider):
     """OpenAI LLM Provider"""
     
-    def __init__(self, config: LLMConfig):
+    PROVIDER = "openai"
+    
+    def __init__(self, config: LLMConfig, http_pool: Optional[SharedHTTPPool] = None):
         if ChatOpenAI is None:
             raise ImportError("langchain_openai not installed")
             
         self.config = config
+        self.http_pool = http_pool
+        client_kwargs = {}
+        if http_pool:
+            client_kwargs = {
+                "http_client": http_pool.client,
+                "http_async_client": http_pool.async_client
+            }
         self.llm = ChatOpenAI(
             model=config.model_name,
             api_key=os.getenv(config.api_key_env),
-            temperature=config.temperature
+            temperature=config.temperature,
+            **client_kwargs
         )
+        self.latency = LatencyStats()
+        self._bound_models: Dict[Tuple[str, ...], Any] = {}
+    
+    async def warmup(self):
+        """Open a pooled connection to the OpenAI API"""
+        await self.llm.root_async_client.models.list()
+        self.latency.warmed_before_first_call = self.latency.first_call_ms is None
     
     async def generate_response(self, messages: List[Message]) -> str:
         """Generate response using OpenAI"""
         formatted_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
-        response = await self.llm.ainvoke(formatted_messages)
-        return response.content if hasattr(response, 'content') else str(response)
+        with (llm_span("generate_response", self.PROVIDER, self.config.model_name, messages),
+              timed(LLM_LATENCY.labels(self.config.name, "generate_response"), "llm")):
+            start = time.perf_counter()
+            async with llm_call_timeout():
+                response = await invoke_text(self.llm, formatted_messages)
+            self.latency.record((time.perf_counter() - start) * 1000)
+        return response
+    
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        """Generate a tool-calling response using OpenAI"""
+        key = tuple(tool.name for tool in tools)
+        record_cache("llm_bound_model", key in self._bound_models)
+        if key not in self._bound_models:
+            self._bound_models[key] = self.llm.bind_tools(tools) if tools else self.llm
+        with (llm_span("generate_with_tools", self.PROVIDER, self.config.model_name, messages, tools) as current,
+              timed(LLM_LATENCY.labels(self.config.name, "generate_with_tools"), "llm")):
+            start = time.perf_counter()
+            async with llm_call_timeout():
+                response = await self._bound_models[key].ainvoke(messages)
+            self.latency.record((time.perf_counter() - start) * 1000)
+            record_usage(current, getattr(response, 'usage_metadata', None))
+            current.set_attribute("llm.tool_calls", len(getattr(response, 'tool_calls', None) or []))
+        return response
     
     def get_model_info(self) -> dict:
         return {
             "provider": "OpenAI",
             "model": self.config.model_name,
-            "temperature": self.config.temperature
+            "temperature": self.config.temperature,
+            "context_budget_tokens": self.config.context_budget_tokens,
+            "latency": self.latency.to_dict()
         }
 
+@dataclass
+class TierDecision:
+    """Record of a single model tier selection"""
+    tier: str
+    provider_name: str
+    complexity: float
+    reasons: List[str] = field(default_factory=list)
+    escalated: bool = False
+    confidence: Optional[float] = None
+    latency_ms: float = 0.0
+
 class LLMService(ILLMService):
     """Service for managing multiple LLM providers"""
     
-    def __init__(self):
+    def __init__(self, tiering: Optional[TieringConfig] = None):
         self._providers: Dict[str, ILLMProvider] = {}
+        self.tiering = tiering or TieringConfig()
+        self.tier_log: deque = deque(maxlen=1000)
     
     def register_llm(self, name: str, provider: ILLMProvider):
         """Register a new LLM provider"""
@@ -88,21 +269,187 @@ class LLMService(ILLMService):
     def list_providers(self) -> List[str]:
         """List all available providers"""
         return list(self._providers.keys())
+    
+    async def warmup(self):
+        """Warm connections for every provider that supports it"""
+        providers = {name: provider for name, provider in self._providers.items() if hasattr(provider, 'warmup')}
+        results = await asyncio.gather(*(provider.warmup() for provider in providers.values()), return_exceptions=True)
+        for name, result in zip(providers, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Warmup failed for LLM {name}: {result}")
+            else:
+                print(f"🔥 Warmed LLM connection: {name}")
+    
+    def get_latency_report(self) -> Dict[str, dict]:
+        """First-query and steady-state latency per provider"""
+        return {
+            name: provider.latency.to_dict()
+            for name, provider in self._providers.items() if hasattr(provider, 'latency')
+        }
+    
+    def select_tier(self, query: str, tool_count: int = 0, conversation_depth: int = 0) -> TierDecision:
+        """Pick a model tier from a cheap complexity estimate of the request"""
+        tiering = self.tiering
+        # Ratios above 1.0 mean the request exceeds what the small tier handles well
+        ratios = {
+            "query_length": len(query) / max(tiering.max_simple_query_chars, 1),
+            "tools": tool_count / max(tiering.max_simple_tools, 1),
+            "depth": conversation_depth / max(tiering.max_simple_depth, 1)
+        }
+        reasons = [f"{signal}={ratio:.2f}" for signal, ratio in ratios.items() if ratio > 1.0]
+        complexity = max(ratios.values())
+        
+        if reasons or tiering.small_llm not in self._providers:
+            return TierDecision(tier="large", provider_name=tiering.large_llm, complexity=complexity, reasons=reasons)
+        return TierDecision(tier="small", provider_name=tiering.small_llm, complexity=complexity, reasons=reasons)
+    
+    def record_tier_decision(self, decision: TierDecision):
+        """Log a completed tier decision for latency and cost analysis"""
+        self.tier_log.append(decision)
+        current_span().set_attributes({
+            "llm.tier": decision.tier,
+            "llm.provider": decision.provider_name,
+            "llm.escalated": decision.escalated,
+            "llm.complexity": round(decision.complexity, 3)
+        })
+        escalation = " (escalated)" if decision.escalated else ""
+        print(f"🎚️ Tier: {decision.tier} [{decision.provider_name}]{escalation} "
+              f"complexity={decision.complexity:.2f} latency={decision.latency_ms:.0f}ms")
+    
+    def get_tier_stats(self) -> Dict[str, Dict]:
+        """Aggregate logged tier decisions per tier"""
+        stats: Dict[str, Dict] = {}
+        for decision in self.tier_log:
+            tier_stats = stats.setdefault(decision.tier, {"requests": 0, "escalations": 0, "total_latency_ms": 0.0})
+            tier_stats["requests"] += 1
+            tier_stats["escalations"] += int(decision.escalated)
+            tier_stats["total_latency_ms"] += decision.latency_ms
+        for tier_stats in stats.values():
+            tier_stats["avg_latency_ms"] = tier_stats["total_latency_ms"] / tier_stats["requests"]
+        return stats
+
+class TieredLLMProvider(ILLMProvider):
+    """LLM provider that picks a small or large model per request"""
+    
+    LOW_CONFIDENCE_MARKERS = [
+        "i'm not sure", "i am not sure", "i don't know", "i do not know",
+        "i cannot", "i can't", "unable to", "not able to"
+    ]
+    
+    def __init__(self, llm_service: LLMService):
+        self.llm_service = llm_service
+        self.tiering = llm_service.tiering
+    
+    def estimate_confidence(self, response: str) -> float:
+        """Cheap heuristic confidence score for a model response"""
+        text = response.strip().lower()
+        if not text:
+            return 0.0
+        confidence = 1.0
+        if any(marker in text for marker in self.LOW_CONFIDENCE_MARKERS):
+            confidence -= 0.6
+        if len(text) < 20:
+            confidence -= 0.3
+        return max(confidence, 0.0)
+    
+    def _response_confidence(self, response: Any) -> float:
+        """Confidence of a text or tool-calling response"""
+        if getattr(response, 'tool_calls', None):
+            return 1.0
+        content = response.content if hasattr(response, 'content') else response
+        return self.estimate_confidence(content if isinstance(content, str) else str(content))
+    
+    async def _generate_tiered(self, query: str, tool_count: int, depth: int, call) -> Any:
+        """Run call(provider) on the selected tier, escalating to the large tier"""
+        with span("llm.tiered"):
+            return await self._generate_on_tier(query, tool_count, depth, call)
+    
+    async def _generate_on_tier(self, query: str, tool_count: int, depth: int, call) -> Any:
+        """Tier selection and escalation inside the llm.tiered span"""
+        decision = self.llm_service.select_tier(query, tool_count, depth)
+        start = time.perf_counter()
+        
+        if decision.tier == "small":
+            try:
+                response = await call(self.llm_service.get_llm(decision.provider_name))
+                decision.confidence = self._response_confidence(response)
+                if decision.confidence >= self.tiering.min_confidence:
+                    decision.latency_ms = (time.perf_counter() - start) * 1000
+                    self.llm_service.record_tier_decision(decision)
+                    return response
+                decision.reasons.append(f"low_confidence={decision.confidence:.2f}")
+            except Exception as e:
+                # A per-call cap or a provider error is worth a try on the large tier; a spent query budget is not
+                deadline = current_deadline()
+                if isinstance(e, DeadlineExceeded) or (isinstance(e, TimeoutError) and deadline is not None
+                                                       and deadline.remaining() <= 0):
+                    decision.reasons.append("deadline_exceeded")
+                    decision.latency_ms = (time.perf_counter() - start) * 1000
+                    self.llm_service.record_tier_decision(decision)
+                    raise
+                decision.reasons.append(f"small_tier_error={type(e).__name__}")
+            
+            decision.tier = "large"
+            decision.provider_name = self.tiering.large_llm
+            decision.escalated = True
+            # Streamed small-tier tokens are superseded by the large tier's answer
+            emit("discard", reason="escalated")
+        
+        try:
+            response = await call(self.llm_service.get_llm(decision.provider_name))
+            decision.confidence = self._response_confidence(response)
+            return response
+        finally:
+            decision.latency_ms = (time.perf_counter() - start) * 1000
+            self.llm_service.record_tier_decision(decision)
+    
+    async def generate_response(self, messages: List[Message], tool_count: int = 0,
+                                conversation_depth: Optional[int] = None) -> str:
+        """Generate with the small tier when possible, escalating to the large tier"""
+        query = next((msg.content for msg in reversed(messages) if msg.role == "user"), "")
+        depth = conversation_depth if conversation_depth is not None else len(messages)
+        return await self._generate_tiered(
+            query, tool_count, depth, lambda provider: provider.generate_response(messages)
+        )
+    
+    async def generate_with_tools(self, messages: List[Any], tools: List[Any]) -> Any:
+        """Tool-calling generation on the selected tier"""
+        query = next((msg.content for msg in reversed(messages) if getattr(msg, 'type', None) == "human"), "")
+        return await self._generate_tiered(
+            str(query), len(tools), len(messages), lambda provider: provider.generate_with_tools(messages, tools)
+        )
+    
+    def get_model_info(self) -> dict:
+        return {
+            "provider": "Tiered",
+            "small": self.tiering.small_llm,
+            "large": self.tiering.large_llm,
+            # Contexts must fit whichever tier ends up answering
+            "context_budget_tokens": min(
+                self.llm_service.get_llm(name).get_model_info().get("context_budget_tokens", 8000)
+                for name in [self.tiering.small_llm, self.tiering.large_llm]
+                if name in self.llm_service.list_providers()
+            ),
+            "tier_stats": self.llm_service.get_tier_stats()
+        }
 
 class LLMServiceFactory:
     """Factory for creating LLM services"""
     
     @staticmethod
-    def create_llm_service(llm_configs: List[LLMConfig]) -> LLMService:
+    def create_llm_service(llm_configs: List[LLMConfig], tiering: Optional[TieringConfig] = None,
+                           http_pool: Optional[SharedHTTPPool] = None) -> LLMService:
         """Create and configure LLM service with providers"""
-        service = LLMService()
+        service = LLMService(tiering)
         
         for config in llm_configs:
             try:
                 if config.model_type == "google":
+                    # The async Gemini client is gRPC-only, so it keeps its own persistent
+                    # HTTP/2 channel instead of joining the shared httpx pool
                     provider = GoogleLLMProvider(config)
                 elif config.model_type == "openai":
-                    provider = OpenAILLMProvider(config)
+                    provider = OpenAILLMProvider(config, http_pool)
                 else:
                     print(f"Unknown LLM type: {config.model_type}")
                     continue
@@ -113,4 +460,11 @@ class LLMServiceFactory:
             except Exception as e:
                 print(f"❌ Failed to register {config.name}: {e}")
         
+        if tiering and tiering.enabled:
+            if tiering.large_llm in service.list_providers():
+                service.register_llm(tiering.name, TieredLLMProvider(service))
+                print(f"✅ Registered tiered LLM: {tiering.name} ({tiering.small_llm} → {tiering.large_llm})")
+            else:
+                print(f"⚠️ Tiering disabled: large LLM '{tiering.large_llm}' not registered")
+        
         return service
@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 from interfaces.mcp_interface import IMCPServer, IMCPService
 from config.settings import MCPServerConfig
+from services.tool_registry import ToolMiddleware, ToolRegistry
 
 try:
     from langchain_mcp_adapters.client import MultiServerMCPClient
@@ -51,20 +52,22 @@ class MCPService(IMCPService):
     
     def __init__(self):
         self._servers: Dict[str, IMCPServer] = {}
+        self.registry = ToolRegistry()
     
     async def add_server(self, name: str, server: IMCPServer):
         """Add MCP server"""
         success = await server.connect()
         if success:
             self._servers[name] = server
+            self.registry.register(name, await server.get_tools())
     
     async def get_all_tools(self) -> List[Any]:
         """Get tools from all connected servers"""
-        all_tools = []
-        for server in self._servers.values():
-            tools = await server.get_tools()
-            all_tools.extend(tools)
-        return all_tools
+        return self.registry.tools
+    
+    def add_middleware(self, middleware: ToolMiddleware):
+        """Run middleware around every tool call on every server"""
+        self.registry.add_middleware(middleware)
     
     def list_servers(self) -> List[str]:
         """List all connected servers"""
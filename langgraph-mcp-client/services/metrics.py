@@ -0,0 +1,249 @@
+import asyncio
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from services.tool_registry import ToolCall, ToolHandler
+
+# Prometheus buckets (seconds) reported for every histogram; percentiles use the finer internal buckets
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Log-bucketed histogram in the HDR style: fixed relative error at any scale and O(1) observe"""
+    
+    SUB_BUCKETS = 32  # per power of two, so a bucket spans about 2.2%
+    LOWEST = 1e-6
+    
+    __slots__ = ("counts", "count", "sum", "min", "max")
+    
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    def observe(self, value: float):
+        index = int(math.log2(value / self.LOWEST) * self.SUB_BUCKETS) if value > self.LOWEST else 0
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    @classmethod
+    def upper_bound(cls, index: int) -> float:
+        return cls.LOWEST * 2 ** ((index + 1) / cls.SUB_BUCKETS)
+    
+    def percentile(self, fraction: float) -> float:
+        """Value below which the given fraction of observations fall, to bucket resolution"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+    
+    def cumulative(self, bounds: Sequence[float]) -> List[int]:
+        """Observations at or below each bound, for Prometheus le buckets"""
+        totals = [0] * len(bounds)
+        for index, count in self.counts.items():
+            upper = self.upper_bound(index)
+            for position, bound in enumerate(bounds):
+                if upper <= bound * 1.0001:
+                    totals[position] += count
+        return totals
+
+class Counter:
+    """Monotonic count"""
+    
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class MetricFamily:
+    """A named metric and its children, one per combination of label values"""
+    
+    def __init__(self, name: str, help_text: str, kind: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.children: Dict[Tuple[str, ...], Any] = {}
+    
+    def labels(self, *values: str):
+        """Child for these label values, created on first use"""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            child = self.children[values] = Histogram() if self.kind == "histogram" else Counter()
+        return child
+    
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+    
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+class MetricsRegistry:
+    """Process-wide metrics with Prometheus text exposition and a terminal summary"""
+    
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+    
+    def _family(self, name: str, help_text: str, kind: str, label_names: Sequence[str]) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, help_text, kind, label_names)
+        elif family.kind != kind:
+            raise ValueError(f"Metric {name} is already registered as a {family.kind}")
+        return family
+    
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "counter", label_names)
+    
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "histogram", label_names)
+    
+    @staticmethod
+    def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for family in self.families.values():
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in family.children.items():
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{self._labels(family.label_names, values)} {child.value:g}")
+                    continue
+                for bound, total in zip(PROMETHEUS_BUCKETS, child.cumulative(PROMETHEUS_BUCKETS)):
+                    labels = self._labels(family.label_names, values, f'le="{bound:g}"')
+                    lines.append(f"{family.name}_bucket{labels} {total}")
+                labels = self._labels(family.label_names, values, 'le="+Inf"')
+                lines.append(f"{family.name}_bucket{labels} {child.count}")
+                lines.append(f"{family.name}_sum{self._labels(family.label_names, values)} {child.sum:.6f}")
+                lines.append(f"{family.name}_count{self._labels(family.label_names, values)} {child.count}")
+        return "\n".join(lines) + "\n"
+    
+    def format_stats(self) -> str:
+        """Human-readable summary: latency percentiles, counters and cache hit rates"""
+        lines = []
+        for family in self.families.values():
+            if not family.children:
+                continue
+            lines.append(f"{family.name}:")
+            for values, child in sorted(family.children.items()):
+                label = ", ".join(f"{name}={value}" for name, value in zip(family.label_names, values)) or "all"
+                if family.kind == "counter":
+                    lines.append(f"   {label}: {child.value:g}")
+                else:
+                    lines.append(f"   {label}: n={child.count} p50={child.percentile(0.5) * 1000:.1f}ms "
+                                 f"p90={child.percentile(0.9) * 1000:.1f}ms p99={child.percentile(0.99) * 1000:.1f}ms "
+                                 f"max={child.max * 1000:.1f}ms")
+        for cache, (hits, misses) in sorted(self.cache_hit_counts().items()):
+            lines.append(f"cache {cache}: {hits / (hits + misses):.0%} hit rate ({hits:g}/{hits + misses:g})")
+        return "\n".join(lines) if lines else "No metrics recorded yet"
+    
+    def cache_hit_counts(self) -> Dict[str, Tuple[float, float]]:
+        """(hits, misses) per cache"""
+        family = self.families.get("mcp_client_cache_requests_total")
+        counts: Dict[str, List[float]] = {}
+        for (cache, result), child in (family.children.items() if family else []):
+            counts.setdefault(cache, [0.0, 0.0])[0 if result == "hit" else 1] += child.value
+        return {cache: (hits, misses) for cache, (hits, misses) in counts.items()}
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+registry = MetricsRegistry()
+
+QUERY_LATENCY = registry.histogram("mcp_client_query_duration_seconds", "Latency of ReactWorkflow.execute")
+LLM_LATENCY = registry.histogram("mcp_client_llm_duration_seconds", "Latency of LLM calls",
+                                 ["provider", "operation"])
+TOOL_LATENCY = registry.histogram("mcp_client_tool_duration_seconds", "Latency of MCP tool calls", ["server", "tool"])
+ROUTES = registry.counter("mcp_client_routes_total", "Routing decisions", ["agent", "source"])
+CACHE_REQUESTS = registry.counter("mcp_client_cache_requests_total", "Cache lookups", ["cache", "result"])
+ERRORS = registry.counter("mcp_client_errors_total", "Errors by component and exception type", ["component", "type"])
+
+class timed:
+    """Observe the elapsed seconds of a block in a histogram, counting exceptions it raises as errors"""
+    
+    __slots__ = ("histogram", "component", "start")
+    
+    def __init__(self, histogram: Histogram, component: str):
+        self.histogram = histogram
+        self.component = component
+        self.start = 0.0
+    
+    def __enter__(self) -> "timed":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        self.histogram.observe(time.perf_counter() - self.start)
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            ERRORS.labels(self.component, exc_type.__name__).inc()
+        return False
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+async def metrics_middleware(call: ToolCall, next_handler: ToolHandler) -> Any:
+    """Tool middleware recording latency and errors per server and tool"""
+    with timed(TOOL_LATENCY.labels(call.server, call.tool), "tool"):
+        return await next_handler(call)
+
+class MetricsServer:
+    """Minimal asyncio HTTP server exposing GET /metrics for Prometheus scrapes"""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, metrics: Optional[MetricsRegistry] = None):
+        self.host = host
+        self.port = port
+        self.metrics = metrics or registry
+        self.server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.metrics.render_prometheus()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "Not found\n"
+            payload = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
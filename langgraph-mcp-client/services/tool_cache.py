@@ -0,0 +1,110 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+from config.settings import ToolCacheConfig
+from services.metrics import record_cache, registry
+from services.tool_registry import ToolCall, ToolHandler, is_read_only, read_only_patterns
+
+TRACKED_REQUESTS = 1000  # request times kept per call for demand estimates
+
+CACHE_EVICTIONS = registry.counter("mcp_client_tool_cache_evictions_total",
+                                   "Tool results dropped from the cache to stay within its size", ["tool"])
+
+def cache_key(tool: str, arguments: Dict[str, Any]) -> str:
+    """Exact identity of a call: arguments differing only in case or spacing may mean different results"""
+    return f"{tool}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+class CacheEntry:
+    """A tool result and when it stops being served"""
+    __slots__ = ("result", "expires_at")
+    
+    def __init__(self, result: Any, expires_at: float):
+        self.result = result
+        self.expires_at = expires_at
+
+class ToolResultCache:
+    """Results of read-only tool calls, shared by every conversation for a TTL and kept fresh by the cache warmer"""
+    
+    def __init__(self, config: ToolCacheConfig, tools: List[Any]):
+        self.ttl_s = config.ttl_s
+        self.max_entries = config.max_entries
+        patterns = read_only_patterns(config.read_only_tools)
+        self.cacheable = {tool.name for tool in tools if is_read_only(tool, patterns)}
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._requests: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=TRACKED_REQUESTS))
+        self.stats = {"hits": 0, "misses": 0, "joined": 0, "evictions": 0}
+        print(f"🗃️ Caching results of {len(self.cacheable)} read-only tools for {self.ttl_s:g}s")
+    
+    def is_cacheable(self, tool: str) -> bool:
+        return tool in self.cacheable
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Entry still within its TTL"""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: str, result: Any):
+        self._entries[key] = CacheEntry(result, time.monotonic() + self.ttl_s)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._requests.pop(evicted, None)
+            self.stats["evictions"] += 1
+            CACHE_EVICTIONS.labels(evicted.split(":", 1)[0]).inc()
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def demand(self, key: str, window_s: float) -> int:
+        """Queries that asked for this call in the last window_s seconds, answered from the cache or not"""
+        since = time.monotonic() - window_s
+        requests = self._requests.get(key, ())
+        return sum(1 for requested_at in reversed(requests) if requested_at >= since)
+    
+    async def middleware(self, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Tool middleware answering read-only calls from the cache; warming calls always refresh their entry"""
+        if call.tool not in self.cacheable:
+            return await next_handler(call)
+        key = cache_key(call.tool, call.arguments)
+        if call.metadata.get("warming"):
+            return await self._load(key, call, next_handler)
+        self._requests[key].append(time.monotonic())
+        entry = self.get(key)
+        record_cache("tool_result", entry is not None)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry.result
+        self.stats["misses"] += 1
+        return await self._load(key, call, next_handler)
+    
+    async def _load(self, key: str, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Fetch and store a result; callers asking for the same call meanwhile share the one request"""
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, call, next_handler))
+            self._loading[key] = task
+            task.add_done_callback(lambda done: self._loaded(key, done))
+        else:
+            self.stats["joined"] += 1
+        # Shielded, so one caller's deadline does not cancel the request the others are waiting for
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, key: str, call: ToolCall, next_handler: ToolHandler) -> Any:
+        result = await next_handler(call)
+        self.put(key, result)
+        return result
+    
+    def _loaded(self, key: str, task: asyncio.Task):
+        self._loading.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved so a failure nobody waited for is not reported as unhandled
+    
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
@@ -0,0 +1,189 @@
+import fnmatch
+import json
+import time
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+from config.settings import ToolCompressionConfig
+from models.context_window import CHARS_PER_TOKEN, estimate_tokens
+from services.metrics import registry
+from services.tool_registry import ToolCall, ToolHandler
+from services.tracing import current_span
+
+TOOL_OUTPUT_CHARS = registry.counter("mcp_client_tool_output_chars_total",
+                                     "Tool result characters before and after compression", ["tool", "stage"])
+COMPRESSION_LATENCY = registry.histogram("mcp_client_tool_compression_seconds", "Time spent compressing tool results",
+                                         ["tool"])
+
+# Limits are halved at most this many times before falling back to plain truncation
+MAX_TIGHTENING_PASSES = 4
+MIN_STRING_CHARS = 40
+
+@dataclass
+class ReducerRule:
+    """Reductions applied to one tool's results"""
+    drop_keys: List[str] = field(default_factory=list)  # removed from objects at any depth
+    keep_keys: List[str] = field(default_factory=list)  # when set, records in lists keep only these keys
+    max_rows: int = 20
+    max_string_chars: int = 400
+    dedupe: bool = True
+    token_budget: int = 1500
+
+@dataclass
+class CompressionStats:
+    """Running totals for one tool"""
+    calls: int = 0
+    compressed_calls: int = 0
+    original_chars: int = 0
+    compressed_chars: int = 0
+    seconds: float = 0.0
+
+class ToolOutputCompressor:
+    """Shrinks MCP tool results to a token budget before they re-enter the LLM context"""
+    
+    def __init__(self, config: ToolCompressionConfig):
+        self.default_rule = ReducerRule(max_rows=config.max_rows, max_string_chars=config.max_string_chars,
+                                        token_budget=config.token_budget)
+        self.rules: Dict[str, ReducerRule] = self._load_rules(config.rules_path) if config.rules_path else {}
+        self.stats: Dict[str, CompressionStats] = {}
+        self._resolved: Dict[str, Optional[ReducerRule]] = {}
+    
+    def _load_rules(self, path: str) -> Dict[str, ReducerRule]:
+        """Per-tool overrides keyed by tool name or glob; unset fields inherit the defaults"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Could not load tool compression rules from {path}: {e}")
+            return {}
+        known = {item.name for item in fields(ReducerRule)}
+        rules = {}
+        for pattern, overrides in raw.items():
+            unknown = set(overrides) - known
+            if unknown:
+                print(f"⚠️ Ignoring unknown compression settings for {pattern}: {', '.join(sorted(unknown))}")
+            values = {name: getattr(self.default_rule, name) for name in known}
+            values.update({name: value for name, value in overrides.items() if name in known})
+            rules[pattern] = ReducerRule(**values)
+        print(f"🗜️ Loaded {len(rules)} tool compression rules from {path}")
+        return rules
+    
+    def rule_for(self, tool: str) -> Optional[ReducerRule]:
+        """Configured rule for a tool, exact names before globs; None when only the defaults apply"""
+        if tool not in self._resolved:
+            rule = self.rules.get(tool)
+            if rule is None:
+                rule = next((rule for pattern, rule in self.rules.items() if fnmatch.fnmatchcase(tool, pattern)), None)
+            self._resolved[tool] = rule
+        return self._resolved[tool]
+    
+    def compress(self, tool: str, text: str) -> str:
+        """Compressed form of one text result"""
+        rule = self.rule_for(tool)
+        # Small results from tools without their own rule pass through without being parsed
+        if rule is None:
+            rule = self.default_rule
+            if len(text) <= rule.token_budget * CHARS_PER_TOKEN:
+                return text
+        
+        stripped = text.lstrip()
+        if stripped[:1] in ("{", "["):
+            try:
+                data = json.loads(stripped)
+            except ValueError:
+                data = None
+            if data is not None:
+                text = self._compress_json(data, rule)
+        
+        if estimate_tokens(text) > rule.token_budget:
+            limit = max(rule.token_budget * CHARS_PER_TOKEN, MIN_STRING_CHARS)
+            text = f"{text[:limit]}… [truncated {len(text) - limit} chars]"
+        return text
+    
+    def _compress_json(self, data: Any, rule: ReducerRule) -> str:
+        """Reduce a parsed result, tightening row and string limits until it fits the budget"""
+        max_rows, max_chars = rule.max_rows, rule.max_string_chars
+        for _ in range(MAX_TIGHTENING_PASSES + 1):
+            text = json.dumps(self._reduce(data, rule, max_rows, max_chars, False),
+                              ensure_ascii=False, separators=(",", ":"))
+            if estimate_tokens(text) <= rule.token_budget:
+                break
+            max_rows, max_chars = max(max_rows // 2, 1), max(max_chars // 2, MIN_STRING_CHARS)
+        return text
+    
+    def _reduce(self, value: Any, rule: ReducerRule, max_rows: int, max_chars: int, is_record: bool) -> Any:
+        if isinstance(value, dict):
+            return {key: self._reduce(item, rule, max_rows, max_chars, False)
+                    for key, item in value.items()
+                    if key not in rule.drop_keys and not (is_record and rule.keep_keys and key not in rule.keep_keys)}
+        if isinstance(value, list):
+            return self._reduce_rows(value, rule, max_rows, max_chars)
+        if isinstance(value, str) and len(value) > max_chars:
+            return f"{value[:max_chars]}… [+{len(value) - max_chars} chars]"
+        return value
+    
+    def _reduce_rows(self, rows: List[Any], rule: ReducerRule, max_rows: int, max_chars: int) -> List[Any]:
+        reduced = [self._reduce(row, rule, max_rows, max_chars, True) for row in rows]
+        notes = []
+        if rule.dedupe and len(reduced) > 1:
+            seen = set()
+            unique = []
+            for row in reduced:
+                key = json.dumps(row, sort_keys=True, default=str)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(row)
+            if len(unique) < len(reduced):
+                notes.append(f"{len(reduced) - len(unique)} duplicate items removed")
+                reduced = unique
+        if len(reduced) > max_rows:
+            notes.append(f"{len(reduced) - max_rows} more of {len(reduced)} items omitted")
+            reduced = reduced[:max_rows]
+        if notes:
+            reduced.append(f"… {'; '.join(notes)}")
+        return reduced
+    
+    def _record(self, tool: str, original: int, compressed: int, seconds: float):
+        stats = self.stats.get(tool)
+        if stats is None:
+            stats = self.stats[tool] = CompressionStats()
+        stats.calls += 1
+        stats.compressed_calls += compressed < original
+        stats.original_chars += original
+        stats.compressed_chars += compressed
+        stats.seconds += seconds
+        TOOL_OUTPUT_CHARS.labels(tool, "original").inc(original)
+        TOOL_OUTPUT_CHARS.labels(tool, "compressed").inc(compressed)
+        COMPRESSION_LATENCY.labels(tool).observe(seconds)
+        current_span().set_attributes({"mcp.original_chars": original, "mcp.compressed_chars": compressed,
+                                       "mcp.compression_ms": round(seconds * 1000, 3)})
+    
+    async def middleware(self, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Tool middleware compressing text content; artifacts pass through untouched"""
+        result = await next_handler(call)
+        # MCP adapter tools return (content, artifacts) where content is a string or a list of strings
+        content, artifact = result if isinstance(result, tuple) else (result, None)
+        start = time.perf_counter()
+        if isinstance(content, str):
+            original = len(content)
+            content = self.compress(call.tool, content)
+            compressed = len(content)
+        elif isinstance(content, list) and all(isinstance(item, str) for item in content):
+            original = sum(len(item) for item in content)
+            content = [self.compress(call.tool, item) for item in content]
+            compressed = sum(len(item) for item in content)
+        else:
+            return result
+        self._record(call.tool, original, compressed, time.perf_counter() - start)
+        return (content, artifact) if isinstance(result, tuple) else content
+    
+    def format_stats(self) -> str:
+        """Per-tool size reduction summary"""
+        if not self.stats:
+            return "No tool results compressed yet"
+        lines = []
+        for tool, stats in sorted(self.stats.items()):
+            ratio = stats.compressed_chars / stats.original_chars if stats.original_chars else 1.0
+            lines.append(f"   {tool}: {stats.compressed_calls}/{stats.calls} compressed, "
+                         f"{stats.original_chars} → {stats.compressed_chars} chars ({ratio:.0%}), "
+                         f"{stats.seconds * 1000:.1f}ms total")
+        return "\n".join(lines)
@@ -1,3 +1,84 @@
-"""Module: tool_registry.py"""
+import fnmatch
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-# TODO: Implement tool_registry.py functionality
+@dataclass
+class ToolCall:
+    """One MCP tool invocation on its way through the middleware chain"""
+    server: str
+    tool: str
+    arguments: Dict[str, Any]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+ToolHandler = Callable[[ToolCall], Awaitable[Any]]
+ToolMiddleware = Callable[[ToolCall, ToolHandler], Awaitable[Any]]
+
+def read_only_patterns(spec: str) -> List[str]:
+    """Tool name globs from a comma-separated setting"""
+    return [pattern.strip() for pattern in spec.split(",") if pattern.strip()]
+
+def is_read_only(tool: Any, patterns: List[str]) -> bool:
+    """MCP readOnlyHint when the server gives one, otherwise the name globs"""
+    read_only_hint = (getattr(tool, "metadata", None) or {}).get("readOnlyHint")
+    if read_only_hint is not None:
+        return bool(read_only_hint)
+    return any(fnmatch.fnmatchcase(tool.name, pattern) for pattern in patterns)
+
+class ToolRegistry:
+    """MCP tools by name, with the server that provides them and middleware around every call"""
+    
+    def __init__(self):
+        self._tools: Dict[str, Any] = {}
+        self._servers: Dict[str, str] = {}
+        self._handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._middleware: List[ToolMiddleware] = []
+        self._chain: Optional[ToolHandler] = None
+    
+    def register(self, server: str, tools: List[Any]):
+        """Take over a server's tools so their calls run through the middleware"""
+        for tool in tools:
+            if tool.name in self._tools:
+                print(f"⚠️ Tool '{tool.name}' from {server} shadows the one from {self._servers[tool.name]}")
+            self._tools[tool.name] = tool
+            self._servers[tool.name] = server
+            self._handlers[tool.name] = tool.coroutine
+            tool.coroutine = self._make_coroutine(server, tool.name)
+    
+    def _make_coroutine(self, server: str, name: str):
+        async def call_tool(**arguments: Any) -> Any:
+            return await self.call(ToolCall(server, name, arguments))
+        return call_tool
+    
+    def add_middleware(self, middleware: ToolMiddleware):
+        """Wrap every tool call; middleware added first sees the call first"""
+        self._middleware.append(middleware)
+        self._chain = None
+    
+    def _build_chain(self) -> ToolHandler:
+        async def invoke(call: ToolCall) -> Any:
+            return await self._handlers[call.tool](**call.arguments)
+        
+        handler = invoke
+        for middleware in reversed(self._middleware):
+            handler = self._bind(middleware, handler)
+        return handler
+    
+    @staticmethod
+    def _bind(middleware: ToolMiddleware, next_handler: ToolHandler) -> ToolHandler:
+        async def handler(call: ToolCall) -> Any:
+            return await middleware(call, next_handler)
+        return handler
+    
+    async def call(self, call: ToolCall) -> Any:
+        """Run a tool call through the middleware chain"""
+        if self._chain is None:
+            self._chain = self._build_chain()
+        return await self._chain(call)
+    
+    @property
+    def tools(self) -> List[Any]:
+        return list(self._tools.values())
+    
+    def server_for(self, tool_name: str) -> Optional[str]:
+        """Server providing a tool"""
+        return self._servers.get(tool_name)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from config.settings import SpeculationConfig
+from services.metrics import registry
+from services.tool_registry import ToolCall, ToolHandler, ToolRegistry, is_read_only, read_only_patterns
+from services.tracing import current_span
+
+SPECULATIONS = registry.counter("mcp_client_tool_speculations_total",
+                                "Speculative tool calls by outcome (hit, wasted, failed)", ["tool", "outcome"])
+UNPREDICTED_CALLS = registry.counter("mcp_client_tool_unpredicted_calls_total",
+                                     "Tool calls made while speculating that no speculation covered", ["tool"])
+
+# Predicted tool calls of one agent turn: (tool name, arguments)
+Prediction = Tuple[str, Dict[str, Any]]
+
+# Speculative calls in flight for the running turn, by call key
+_pending: ContextVar[Optional[Dict[str, asyncio.Task]]] = ContextVar("pending_speculations", default=None)
+
+def call_key(tool: str, arguments: Dict[str, Any]) -> str:
+    """Identity of a call for matching; string arguments compare case- and whitespace-insensitively"""
+    normalized = {name: value.strip().casefold() if isinstance(value, str) else value
+                  for name, value in arguments.items()}
+    return f"{tool}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+class SpeculationScope:
+    """Speculative calls started for one agent turn; unclaimed ones are cancelled when it ends"""
+    
+    def __init__(self, speculator: "ToolSpeculator", predictions: List[Prediction]):
+        self.speculator = speculator
+        self.predictions = predictions
+        self.tasks: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self._token = None
+    
+    def __enter__(self) -> "SpeculationScope":
+        pending = {}
+        for tool, arguments in self.predictions:
+            key = call_key(tool, arguments)
+            if key in pending:
+                continue
+            pending[key] = asyncio.create_task(self.speculator.run(tool, arguments))
+            self.tasks[key] = (tool, pending[key])
+        self._token = _pending.set(pending)
+        if pending:
+            current_span().set_attribute("speculated_tools", [tool for tool, _ in self.tasks.values()])
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        pending = _pending.get()
+        _pending.reset(self._token)
+        for key, task in (pending or {}).items():
+            tool = self.tasks[key][0]
+            if task.done() and not task.cancelled():
+                task.exception()  # retrieved so a failed, unclaimed speculation is not reported as unhandled
+            task.cancel()
+            SPECULATIONS.labels(tool, "wasted").inc()
+            self.speculator.stats["wasted"] += 1
+        return False
+
+class ToolSpeculator:
+    """Starts likely read-only tool calls while the LLM is still planning and hands matching results to the tool loop"""
+    
+    def __init__(self, tool_registry: ToolRegistry, config: SpeculationConfig):
+        self.tool_registry = tool_registry
+        self.max_calls = config.max_calls
+        self.read_only_patterns = read_only_patterns(config.read_only_tools)
+        self.stats = {"started": 0, "hit": 0, "wasted": 0, "failed": 0, "unpredicted": 0}
+    
+    def is_read_only(self, tool: Any) -> bool:
+        """MCP readOnlyHint when the server gives one, otherwise the configured name patterns"""
+        return is_read_only(tool, self.read_only_patterns)
+    
+    def read_only(self, tools: List[Any]) -> List[Any]:
+        """Tools safe to call speculatively"""
+        return [tool for tool in tools if self.is_read_only(tool)]
+    
+    def scope(self, predictions: List[Prediction], tools: List[Any]) -> SpeculationScope:
+        """Speculate on the predictions that name a read-only tool among the given ones"""
+        allowed = {tool.name for tool in self.read_only(tools)}
+        selected = [(name, arguments) for name, arguments in predictions if name in allowed][:self.max_calls]
+        return SpeculationScope(self, selected)
+    
+    async def run(self, tool: str, arguments: Dict[str, Any]) -> Any:
+        """One speculative call through the full middleware chain"""
+        self.stats["started"] += 1
+        server = self.tool_registry.server_for(tool)
+        return await self.tool_registry.call(ToolCall(server, tool, dict(arguments), {"speculative": True}))
+    
+    async def middleware(self, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Tool middleware answering calls that match a speculation of the running turn"""
+        pending = _pending.get()
+        if pending is None or call.metadata.get("speculative"):
+            return await next_handler(call)
+        task = pending.pop(call_key(call.tool, call.arguments), None)
+        if task is None:
+            UNPREDICTED_CALLS.labels(call.tool).inc()
+            self.stats["unpredicted"] += 1
+            return await next_handler(call)
+        try:
+            result = await task
+        except Exception as e:
+            # The real call gets its own chance; speculation must never change the outcome
+            print(f"⚠️ Speculative {call.tool} call failed, retrying it: {e}")
+            SPECULATIONS.labels(call.tool, "failed").inc()
+            self.stats["failed"] += 1
+            return await next_handler(call)
+        SPECULATIONS.labels(call.tool, "hit").inc()
+        self.stats["hit"] += 1
+        return result
+    
+    def hit_rate(self) -> float:
+        """Share of finished speculations whose result the model used"""
+        finished = self.stats["hit"] + self.stats["wasted"] + self.stats["failed"]
+        return self.stats["hit"] / finished if finished else 0.0
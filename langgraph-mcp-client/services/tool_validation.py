@@ -0,0 +1,340 @@
+import difflib
+import json
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.metrics import registry
+from services.tool_registry import ToolCall, ToolHandler
+
+try:
+    from langchain_core.tools import ToolException
+except ImportError:
+    ToolException = ValueError
+
+TOOL_VALIDATIONS = registry.counter("mcp_client_tool_validations_total",
+                                    "Tool argument checks by outcome (ok, coerced, invalid)", ["tool", "outcome"])
+VALIDATION_LATENCY = registry.histogram("mcp_client_tool_validation_duration_seconds",
+                                        "Time spent checking tool arguments", ["tool"])
+
+# value, path, problems, coerce -> the value, converted where coercion applied
+Check = Callable[[Any, str, List[Dict[str, str]], bool], Any]
+
+INTEGER_TEXT = re.compile(r"\s*[+-]?\d+\s*")
+NUMBER_TEXT = re.compile(r"\s*[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\s*")
+_INVALID = object()
+
+def _parse_json(value: str, kind: type) -> Any:
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return _INVALID
+    return parsed if isinstance(parsed, kind) else _INVALID
+
+def _as_string(value: Any, coerce: bool) -> Any:
+    if isinstance(value, str):
+        return value
+    if coerce and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return _INVALID
+
+def _as_integer(value: Any, coerce: bool) -> Any:
+    if isinstance(value, bool):
+        return _INVALID
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if coerce and isinstance(value, str) and INTEGER_TEXT.fullmatch(value):
+        return int(value)
+    return _INVALID
+
+def _as_number(value: Any, coerce: bool) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if coerce and isinstance(value, str) and NUMBER_TEXT.fullmatch(value):
+        return float(value)
+    return _INVALID
+
+def _as_boolean(value: Any, coerce: bool) -> Any:
+    if isinstance(value, bool):
+        return value
+    if coerce and isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    return _INVALID
+
+def _as_null(value: Any, coerce: bool) -> Any:
+    return value if value is None else _INVALID
+
+def _as_array(value: Any, coerce: bool) -> Any:
+    if isinstance(value, list):
+        return value
+    # Models sometimes send a list JSON-encoded as a string
+    if coerce and isinstance(value, str) and value.lstrip().startswith("["):
+        return _parse_json(value, list)
+    return _INVALID
+
+def _as_object(value: Any, coerce: bool) -> Any:
+    if isinstance(value, dict):
+        return value
+    if coerce and isinstance(value, str) and value.lstrip().startswith("{"):
+        return _parse_json(value, dict)
+    return _INVALID
+
+TYPES = {"string": _as_string, "integer": _as_integer, "number": _as_number, "boolean": _as_boolean,
+         "null": _as_null, "array": _as_array, "object": _as_object}
+
+def _join(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+def _describe(value: Any) -> str:
+    text = json.dumps(value, default=str)
+    return f"{type(value).__name__} {text[:40]}{'…' if len(text) > 40 else ''}"
+
+def _problem(problems: List[Dict[str, str]], path: str, message: str):
+    problems.append({"path": path or "(arguments)", "problem": message})
+
+class SchemaCompiler:
+    """Turns a JSON schema into nested closures once, so each call only runs the checks that apply"""
+    
+    def __init__(self, root: Dict[str, Any]):
+        self.definitions = {**root.get("definitions", {}), **root.get("$defs", {})}
+        self._refs: Dict[str, Check] = {}
+    
+    def compile(self, schema: Any) -> Check:
+        if schema is True or not isinstance(schema, dict):
+            return lambda value, path, problems, coerce: value
+        if "$ref" in schema:
+            return self._ref(schema["$ref"])
+        
+        steps: List[Check] = []
+        if "anyOf" in schema or "oneOf" in schema:
+            steps.append(self._any_of([self.compile(option) for option in schema.get("anyOf", schema.get("oneOf"))]))
+        for part in schema.get("allOf", []):
+            steps.append(self.compile(part))
+        if "type" in schema:
+            steps.append(self._type(schema["type"]))
+        if "enum" in schema or "const" in schema:
+            steps.append(self._enum(schema["enum"] if "enum" in schema else [schema["const"]]))
+        if any(key in schema for key in ("properties", "required", "additionalProperties")):
+            steps.append(self._object(schema))
+        if "items" in schema or "minItems" in schema or "maxItems" in schema:
+            steps.append(self._array(schema))
+        if any(key in schema for key in ("minLength", "maxLength", "pattern")):
+            steps.append(self._string(schema))
+        if any(key in schema for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")):
+            steps.append(self._range(schema))
+        
+        if len(steps) == 1:
+            return steps[0]
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            found = len(problems)
+            for step in steps:
+                value = step(value, path, problems, coerce)
+                if len(problems) > found:
+                    break
+            return value
+        return check
+    
+    def _ref(self, ref: str) -> Check:
+        name = ref.rsplit("/", 1)[-1]
+        if name not in self._refs:
+            if name not in self.definitions:
+                raise KeyError(f"unresolved $ref {ref}")
+            # Registered before compiling, so recursive definitions refer to themselves
+            compiled: List[Check] = []
+            self._refs[name] = lambda value, path, problems, coerce: compiled[0](value, path, problems, coerce)
+            compiled.append(self.compile(self.definitions[name]))
+            self._refs[name] = compiled[0]
+        return self._refs[name]
+    
+    @staticmethod
+    def _type(kind: Any) -> Check:
+        kinds = kind if isinstance(kind, list) else [kind]
+        converters = [TYPES[name] for name in kinds]
+        expected = " or ".join(kinds)
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            # An exact match wins over a conversion, so ["integer", "string"] keeps "5" a string
+            for convert in converters:
+                if convert(value, False) is not _INVALID:
+                    return value
+            if coerce:
+                for convert in converters:
+                    converted = convert(value, True)
+                    if converted is not _INVALID:
+                        return converted
+            _problem(problems, path, f"expected {expected}, got {_describe(value)}")
+            return value
+        return check
+    
+    @staticmethod
+    def _enum(allowed: List[Any]) -> Check:
+        by_text = {str(option).casefold(): option for option in allowed}
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            if value in allowed:
+                return value
+            if coerce and isinstance(value, str) and value.strip().casefold() in by_text:
+                return by_text[value.strip().casefold()]
+            _problem(problems, path, f"must be one of {json.dumps(allowed, default=str)}, got {_describe(value)}")
+            return value
+        return check
+    
+    def _any_of(self, options: List[Check]) -> Check:
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            closest: Optional[List[Dict[str, str]]] = None
+            for attempt in ([False, True] if coerce else [False]):
+                for option in options:
+                    found: List[Dict[str, str]] = []
+                    converted = option(value, path, found, attempt)
+                    if not found:
+                        return converted
+                    if closest is None or len(found) < len(closest):
+                        closest = found
+            problems.extend(closest or [])
+            return value
+        return check
+    
+    def _object(self, schema: Dict[str, Any]) -> Check:
+        properties = {name: self.compile(item) for name, item in schema.get("properties", {}).items()}
+        required = list(schema.get("required", []))
+        additional = schema.get("additionalProperties", True)
+        extra = self.compile(additional) if isinstance(additional, dict) else None
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            if not isinstance(value, dict):
+                return value
+            result = value
+            unknown = [name for name in value if name not in properties]
+            for name in required:
+                if name not in value:
+                    # Usually a misspelt argument name, which the model fixes best when told which one
+                    close = difflib.get_close_matches(name, unknown, n=1)
+                    hint = f" (got unexpected '{close[0]}')" if close else ""
+                    _problem(problems, _join(path, name), f"is required{hint}")
+            for name, item in value.items():
+                item_check = properties.get(name, extra)
+                if item_check is None:
+                    if additional is False:
+                        _problem(problems, _join(path, name), f"is not a parameter; expected {', '.join(properties)}")
+                    continue
+                converted = item_check(item, _join(path, name), problems, coerce)
+                if converted is not item:
+                    if result is value:
+                        result = dict(value)
+                    result[name] = converted
+            return result
+        return check
+    
+    def _array(self, schema: Dict[str, Any]) -> Check:
+        items = self.compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            if not isinstance(value, list):
+                return value
+            if min_items is not None and len(value) < min_items:
+                _problem(problems, path, f"needs at least {min_items} items, got {len(value)}")
+            if max_items is not None and len(value) > max_items:
+                _problem(problems, path, f"allows at most {max_items} items, got {len(value)}")
+            if items is None:
+                return value
+            result = value
+            for index, item in enumerate(value):
+                converted = items(item, _join(path, index), problems, coerce)
+                if converted is not item:
+                    if result is value:
+                        result = list(value)
+                    result[index] = converted
+            return result
+        return check
+    
+    @staticmethod
+    def _string(schema: Dict[str, Any]) -> Check:
+        min_length = schema.get("minLength")
+        max_length = schema.get("maxLength")
+        pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            if not isinstance(value, str):
+                return value
+            if min_length is not None and len(value) < min_length:
+                _problem(problems, path, f"needs at least {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                _problem(problems, path, f"allows at most {max_length} characters")
+            if pattern is not None and not pattern.search(value):
+                _problem(problems, path, f"must match {pattern.pattern}")
+            return value
+        return check
+    
+    @staticmethod
+    def _range(schema: Dict[str, Any]) -> Check:
+        bounds = [(schema.get("minimum"), lambda value, bound: value >= bound, "at least"),
+                  (schema.get("maximum"), lambda value, bound: value <= bound, "at most"),
+                  (schema.get("exclusiveMinimum"), lambda value, bound: value > bound, "greater than"),
+                  (schema.get("exclusiveMaximum"), lambda value, bound: value < bound, "less than")]
+        bounds = [bound for bound in bounds if isinstance(bound[0], (int, float))]
+        
+        def check(value: Any, path: str, problems: List[Dict[str, str]], coerce: bool) -> Any:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                for bound, holds, wording in bounds:
+                    if not holds(value, bound):
+                        _problem(problems, path, f"must be {wording} {bound}, got {value}")
+            return value
+        return check
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """Validator for one tool's argument schema"""
+    return SchemaCompiler(schema).compile(schema)
+
+class ToolArgumentValidator:
+    """Checks and coerces tool arguments against their compiled schemas before any network call"""
+    
+    def __init__(self, tools: List[Any]):
+        self.validators: Dict[str, Check] = {}
+        self.build_ms = 0.0
+        self.stats = {"ok": 0, "coerced": 0, "invalid": 0}
+        self.compile(tools)
+    
+    def compile(self, tools: List[Any]):
+        """Build a validator per tool; a tool whose schema cannot be compiled goes unchecked"""
+        start = time.perf_counter()
+        for tool in tools:
+            schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+            try:
+                self.validators[tool.name] = compile_schema(schema)
+            except (KeyError, TypeError, re.error) as e:
+                print(f"⚠️ Arguments of {tool.name} will not be checked locally: {e}")
+        self.build_ms = (time.perf_counter() - start) * 1000
+        print(f"🧩 Compiled argument validators for {len(self.validators)} tools in {self.build_ms:.1f}ms")
+    
+    def validate(self, tool: str, arguments: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+        """Arguments after coercion, and the problems found; unknown tools pass unchecked"""
+        validator = self.validators.get(tool)
+        problems: List[Dict[str, str]] = []
+        if validator is None:
+            return arguments, problems
+        return validator(arguments, "", problems, True), problems
+    
+    async def middleware(self, call: ToolCall, next_handler: ToolHandler) -> Any:
+        """Outermost tool middleware: malformed calls fail here, before any round trip to the server"""
+        if call.tool not in self.validators:
+            return await next_handler(call)
+        start = time.perf_counter()
+        arguments, problems = self.validate(call.tool, call.arguments)
+        VALIDATION_LATENCY.labels(call.tool).observe(time.perf_counter() - start)
+        if problems:
+            self._count(call.tool, "invalid")
+            # The agent gets this back as the tool result and can repair the call in its next turn
+            raise ToolException(json.dumps({"error": "invalid_arguments", "tool": call.tool, "problems": problems}))
+        self._count(call.tool, "coerced" if arguments is not call.arguments else "ok")
+        call.arguments = arguments
+        return await next_handler(call)
+    
+    def _count(self, tool: str, outcome: str):
+        self.stats[outcome] += 1
+        TOOL_VALIDATIONS.labels(tool, outcome).inc()
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from config.settings import TracingConfig
+from services.tool_registry import ToolCall, ToolHandler
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+class Span:
+    """A timed operation with attributes, nested under the span that was current when it started"""
+    
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "status", "status_message", "_token")
+    
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = {}
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = "ok"
+        self.status_message = ""
+        self._token = None
+        if attributes:
+            self.set_attributes(attributes)
+    
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+    
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+    
+    def record_error(self, error: BaseException):
+        """Mark the span failed"""
+        self.status = "error"
+        self.status_message = str(error)[:500]
+        self.attributes["error.type"] = type(error).__name__
+    
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+    
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if isinstance(exc, asyncio.CancelledError):
+            self.attributes["cancelled"] = True
+        elif exc is not None:
+            self.record_error(exc)
+        self.tracer.finish(self)
+        return False
+    
+    def to_dict(self) -> dict:
+        """Flat record for the JSON file exporter"""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "status_message": self.status_message or None,
+            "attributes": self.attributes
+        }
+
+class NoopSpan:
+    """Stand-in returned while tracing is disabled"""
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+    
+    def record_error(self, error: BaseException):
+        pass
+    
+    def __enter__(self) -> "NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        return False
+
+NOOP_SPAN = NoopSpan()
+
+# The innermost open span of the running task; tasks started inside a span inherit it as their parent
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class JSONFileExporter:
+    """Appends one JSON object per span to a file for offline analysis"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def export(self, spans: List[Span]):
+        self._file.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+        self._file.flush()
+    
+    def shutdown(self):
+        self._file.close()
+
+class OTLPHTTPExporter:
+    """Posts spans to an OpenTelemetry collector using the OTLP/HTTP JSON encoding"""
+    
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        if httpx is None:
+            raise ImportError("httpx not installed")
+        
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+    
+    @staticmethod
+    def _value(value: Any) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        if isinstance(value, (list, tuple)):
+            return {"arrayValue": {"values": [OTLPHTTPExporter._value(item) for item in value]}}
+        return {"stringValue": str(value)}
+    
+    def _span(self, span: Span) -> dict:
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.status_message} if span.status == "error" else {"code": 1}
+        }
+        if span.parent_id:
+            record["parentSpanId"] = span.parent_id
+        return record
+    
+    def export(self, spans: List[Span]):
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "langgraph-mcp-client"}, "spans": [self._span(span) for span in spans]}]
+        }]}
+        response = self._client.post(self.endpoint, json=payload)
+        response.raise_for_status()
+    
+    def shutdown(self):
+        self._client.close()
+
+class BatchSpanProcessor:
+    """Exports finished spans in batches from a background thread, keeping I/O off the event loop"""
+    
+    def __init__(self, exporter: Any, max_queue: int = 4096, batch_size: int = 256, interval_s: float = 1.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval_s = interval_s
+        self.stats = {"exported": 0, "dropped": 0, "failed_batches": 0}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+    
+    def on_end(self, span: Span):
+        """Queue a finished span; when the exporter falls behind, spans are dropped rather than blocking"""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.stats["dropped"] += 1
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.interval_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    span = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._export(batch)
+    
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+            self.stats["exported"] += len(batch)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            print(f"⚠️ Span export failed ({len(batch)} spans): {e}")
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Export what is queued and release the exporter"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self.exporter.shutdown()
+
+class Tracer:
+    """Creates spans and hands finished ones to the processor; without one, spans cost next to nothing"""
+    
+    def __init__(self, processor: Optional[BatchSpanProcessor] = None):
+        self.processor = processor
+    
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+    
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Context manager for a span nested under the current one"""
+        if self.processor is None:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            return Span(self, name, f"{random.getrandbits(128):032x}", None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+    
+    def finish(self, span: Span):
+        """Export a finished span; spans still open at shutdown() are dropped"""
+        processor = self.processor
+        if processor is not None:
+            processor.on_end(span)
+    
+    def shutdown(self):
+        """Flush and stop exporting"""
+        if self.processor is not None:
+            self.processor.shutdown()
+            self.processor = None
+
+_tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Span on the process-wide tracer"""
+    return _tracer.span(name, attributes)
+
+def current_span():
+    """Innermost open span, for adding attributes discovered along the way"""
+    return _current_span.get() or NOOP_SPAN
+
+def configure_tracing(config: TracingConfig) -> Tracer:
+    """Point the process-wide tracer at the configured exporter"""
+    _tracer.shutdown()
+    if not config.exporter:
+        return _tracer
+    try:
+        if config.exporter == "json":
+            exporter = JSONFileExporter(config.json_path)
+            target = config.json_path
+        elif config.exporter == "otlp":
+            exporter = OTLPHTTPExporter(config.otlp_endpoint, config.service_name)
+            target = config.otlp_endpoint
+        else:
+            print(f"⚠️ Unknown tracing exporter: {config.exporter}")
+            return _tracer
+    except (ImportError, OSError) as e:
+        print(f"⚠️ Tracing disabled: {e}")
+        return _tracer
+    _tracer.processor = BatchSpanProcessor(exporter)
+    print(f"🔭 Tracing to {config.exporter} ({target})")
+    return _tracer
+
+async def tracing_middleware(call: ToolCall, next_handler: ToolHandler) -> Any:
+    """Tool middleware recording each MCP tool call as a span"""
+    with span("mcp.tool", {"mcp.server": call.server, "mcp.tool": call.tool}) as current:
+        result = await next_handler(call)
+        # MCP adapter tools return (content, artifacts)
+        content = result[0] if isinstance(result, tuple) else result
+        current.set_attribute("mcp.result_chars", len(str(content)))
+        return result
@@ -0,0 +1,67 @@
+"""AsyncLineReader against a real pipe standing in for stdin.
+
+Run from the langgraph-mcp-client directory:
+    python -m pytest tests
+"""
+import asyncio
+import os
+import threading
+import time
+import unittest
+from clients.async_input import AsyncLineReader
+
+TICK_S = 0.01
+
+def type_lines(fd: int, lines: list, delay: float):
+    """Write each line into the pipe after the delay, as a user would, then close it"""
+    def write():
+        for line in lines:
+            time.sleep(delay)
+            os.write(fd, line.encode() + b"\n")
+        os.close(fd)
+    threading.Thread(target=write, daemon=True).start()
+
+class AsyncLineReaderTest(unittest.IsolatedAsyncioTestCase):
+    
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        self.stream = os.fdopen(read_fd, "r")
+        self.reader = AsyncLineReader(self.stream)
+    
+    def tearDown(self):
+        self.stream.close()
+    
+    async def test_loop_keeps_ticking_while_waiting_for_a_line(self):
+        ticks = []
+        
+        async def tick():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(TICK_S)
+        
+        ticker = asyncio.create_task(tick())
+        type_lines(self.write_fd, ["show available flights"], 0.3)
+        line = await self.reader.readline()
+        ticker.cancel()
+        
+        self.assertEqual(line, "show available flights")
+        self.assertGreater(len(ticks), 10)
+        self.assertLess(max(later - earlier for earlier, later in zip(ticks, ticks[1:])), 0.2)
+    
+    async def test_cancelled_read_hands_its_line_to_the_next(self):
+        type_lines(self.write_fd, ["first", "second"], 0.1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.reader.readline(), 0.01)
+        self.assertEqual(await self.reader.readline(), "first")
+        self.assertEqual(await self.reader.readline(), "second")
+    
+    async def test_end_of_input_raises_eof(self):
+        type_lines(self.write_fd, ["only"], 0.0)
+        self.assertEqual(await self.reader.readline(), "only")
+        with self.assertRaises(EOFError):
+            await self.reader.readline()
+        with self.assertRaises(EOFError):
+            await self.reader.readline()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from models.conversation import Conversation
+from models.stream_event import emit
+from services.metrics import registry, record_cache
+from services.tracing import span
+
+# A captured value spanning a conjunction usually means a second request rode along with the first
+CLAUSE_SEPARATOR = re.compile(r"[,;]|\b(?:and|then|also|plus)\b", re.IGNORECASE)
+
+FAST_PATH = registry.counter("mcp_client_fast_path_total", "Fast-path outcomes by template", ["template", "outcome"])
+FAST_PATH_LATENCY = registry.histogram("mcp_client_fast_path_duration_seconds", "Latency of fast-path answers",
+                                       ["template"])
+
+@dataclass
+class IntentTemplate:
+    """A query pattern answered by one tool call and a rendering template"""
+    name: str
+    pattern: str  # matched against the whole query, case-insensitively; named groups become arguments
+    tool: str
+    args: Dict[str, str] = field(default_factory=dict)  # values are format strings over the named groups
+    render: str = "{result}"  # format string over the groups, result, items and count
+    render_item: str = ""  # format string for each row of a list result, joined into {items}
+    items_key: str = ""  # key of the row list inside an object result; empty for a top-level list
+    max_items: int = 20
+    empty: str = "Nothing found."
+    compiled: Pattern = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.compiled = re.compile(self.pattern, re.IGNORECASE)
+
+class FastPathMiss(Exception):
+    """The fast path cannot answer confidently; the query goes to the agents"""
+    
+    def __init__(self, outcome: str, detail: str = ""):
+        super().__init__(detail or outcome)
+        self.outcome = outcome
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and drop trailing punctuation"""
+    return " ".join(query.split()).rstrip("?.! ")
+
+class FastPath:
+    """Answers template-matching lookups with a direct tool call, skipping the LLM"""
+    
+    def __init__(self, templates: List[IntentTemplate]):
+        self.templates = templates
+        self._tools: Dict[str, Any] = {}
+        self._active: List[IntentTemplate] = []
+    
+    @classmethod
+    def from_file(cls, path: str) -> "FastPath":
+        """Load templates from a JSON list"""
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        templates = [IntentTemplate(**item) for item in raw]
+        print(f"⚡ Loaded {len(templates)} fast-path templates from {path}")
+        return cls(templates)
+    
+    def set_tools(self, tools: List[Any]):
+        """Enable the templates whose tool is available"""
+        self._tools = {tool.name: tool for tool in tools}
+        self._active = []
+        for template in self.templates:
+            if template.tool in self._tools:
+                self._active.append(template)
+            else:
+                print(f"⚠️ Fast-path template '{template.name}' disabled: tool {template.tool} not available")
+    
+    def match(self, query: str) -> Optional[Tuple[IntentTemplate, Dict[str, str]]]:
+        """The one template matching the query with its captured groups; raises when several match"""
+        normalized = normalize_query(query)
+        matches = []
+        for template in self._active:
+            found = template.compiled.fullmatch(normalized)
+            if found:
+                matches.append((template, {key: value.strip() for key, value in found.groupdict().items() if value}))
+        if len(matches) > 1:
+            raise FastPathMiss("ambiguous", ", ".join(template.name for template, _ in matches))
+        if matches and any(CLAUSE_SEPARATOR.search(value) for value in matches[0][1].values()):
+            raise FastPathMiss("ambiguous", "several requests in one query")
+        return matches[0] if matches else None
+    
+    async def answer(self, conversation: Conversation, query: str) -> Optional[str]:
+        """Response for a matching query, or None to take the normal agent path"""
+        start = time.perf_counter()
+        template = None
+        try:
+            matched = self.match(query)
+            if matched is None:
+                record_cache("fast_path", False)
+                return None
+            template, groups = matched
+            with span("fast_path", {"template": template.name, "tool": template.tool}):
+                response = await self._run(template, groups)
+        except FastPathMiss as e:
+            print(f"↪️ Fast path skipped ({e.outcome}: {e})")
+            FAST_PATH.labels(template.name if template else "-", e.outcome).inc()
+            record_cache("fast_path", False)
+            return None
+        
+        elapsed = time.perf_counter() - start
+        FAST_PATH.labels(template.name, "hit").inc()
+        FAST_PATH_LATENCY.labels(template.name).observe(elapsed)
+        record_cache("fast_path", True)
+        print(f"⚡ Fast path: {template.name} ({elapsed * 1000:.0f}ms)")
+        emit("route", agents=["fast_path"], template=template.name)
+        conversation.add_message("user", query)
+        conversation.add_message("assistant", response, metadata={"fast_path": template.name})
+        return response
+    
+    async def _run(self, template: IntentTemplate, groups: Dict[str, str]) -> str:
+        tool = self._tools[template.tool]
+        arguments = self._arguments(template, tool, groups)
+        try:
+            output = await tool.ainvoke(arguments)
+        except Exception as e:
+            raise FastPathMiss("tool_error", str(e)) from e
+        return self._render(template, groups, output)
+    
+    @staticmethod
+    def _arguments(template: IntentTemplate, tool: Any, groups: Dict[str, str]) -> Dict[str, Any]:
+        """Template arguments filled from the groups and converted to the tool's parameter types"""
+        schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+        properties = schema.get("properties", {})
+        arguments = {}
+        try:
+            for name, value in template.args.items():
+                text = value.format_map(groups)
+                kind = properties.get(name, {}).get("type")
+                arguments[name] = int(text) if kind == "integer" else float(text) if kind == "number" else text
+        except (KeyError, ValueError) as e:
+            raise FastPathMiss("bad_arguments", str(e)) from e
+        missing = [name for name in schema.get("required", []) if name not in arguments]
+        if missing:
+            raise FastPathMiss("bad_arguments", f"missing {', '.join(missing)}")
+        return arguments
+    
+    @staticmethod
+    def _render(template: IntentTemplate, groups: Dict[str, str], output: Any) -> str:
+        text = output if isinstance(output, str) else "\n".join(str(item) for item in output)
+        try:
+            result = json.loads(text)
+        except ValueError:
+            result = text
+        
+        values: Dict[str, Any] = {**groups, "result": result, "items": "", "count": 0}
+        try:
+            if template.render_item:
+                rows = result[template.items_key] if template.items_key else result
+                if not isinstance(rows, list):
+                    raise FastPathMiss("render_error", "result has no row list")
+                # Rows that are not records (such as notes added by tool compression) are shown as they are
+                lines = [template.render_item.format_map(row) if isinstance(row, dict) else str(row)
+                         for row in rows[:template.max_items]]
+                if len(rows) > template.max_items:
+                    lines.append(f"… and {len(rows) - template.max_items} more")
+                if not rows:
+                    return template.empty.format_map(values)
+                values.update(items="\n".join(lines), count=len(rows))
+            return template.render.format_map(values)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            raise FastPathMiss("render_error", f"{type(e).__name__}: {e}") from e
@@ -0,0 +1,335 @@
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from workflows.base_workflow import BaseWorkflow
+from models.conversation import Conversation
+from models.message import Message
+from models.stream_event import StreamEvent, emit, stream_execution, streaming_to
+from interfaces.llm_interface import ILLMService
+from config.settings import WorkflowConfig
+from services.metrics import ERRORS, QUERY_LATENCY, timed
+from services.tracing import current_span, span
+
+PLANNER_PROMPT = """You are the planner of a tool-using assistant. Turn the user's request into MCP tool calls and reply with JSON only, in this shape:
+{"steps": [{"id": "s1", "tool": "<tool name>", "args": {"<parameter>": "<value>"}, "depends_on": []}], "answer": ""}
+
+Rules:
+- Steps without a dependency between them run in parallel, so list only real data dependencies in depends_on.
+- To use an earlier step's output in an argument write "${s1}" for the whole output or "${s1.field.0.name}" for part of a JSON output, and list that step in depends_on.
+- Use only the tools below with their exact parameter names.
+- If no tool is needed, return an empty steps list and put the reply in "answer".
+
+Available tools:
+"""
+
+ANSWER_PROMPT = """Answer the user's request using the results of the tool calls made for it. Be concise, mention anything that failed, and do not invent data that is not in the results."""
+
+# "${s1}" or "${s1.path.to.value}" inside a step argument
+REFERENCE = re.compile(r"\$\{([A-Za-z0-9_-]+)((?:\.[^.}]+)*)\}")
+JSON_BLOCK = re.compile(r"\{.*\}", re.DOTALL)
+
+# Characters of each tool result shown to the planner when replanning and to the final answer
+RESULT_PREVIEW_CHARS = 4000
+HISTORY_MESSAGES = 6
+
+class PlanError(ValueError):
+    """The planner's reply is not a usable plan"""
+
+@dataclass
+class PlanStep:
+    """One tool call of a plan"""
+    id: str
+    tool: str
+    args: Dict[str, Any]
+    depends_on: List[str] = field(default_factory=list)
+
+@dataclass
+class StepResult:
+    """Outcome of one executed step"""
+    step: PlanStep
+    output: Any = None
+    error: str = ""
+    skipped: bool = False
+    elapsed_ms: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        return not self.error
+    
+    def describe(self) -> str:
+        """Line for the replanning and answer prompts"""
+        call = f"{self.step.id}: {self.step.tool}({json.dumps(self.step.args, ensure_ascii=False, default=str)})"
+        if self.error:
+            return f"{call} -> FAILED: {self.error}"
+        text = self.output if isinstance(self.output, str) else json.dumps(self.output, ensure_ascii=False, default=str)
+        if len(text) > RESULT_PREVIEW_CHARS:
+            text = f"{text[:RESULT_PREVIEW_CHARS]}… [truncated]"
+        return f"{call} -> {text}"
+
+def parse_plan(text: str, tool_names: List[str], completed: List[str]) -> Tuple[List[PlanStep], str]:
+    """Steps in dependency order and the direct answer from a planner reply"""
+    match = JSON_BLOCK.search(text)
+    if not match:
+        raise PlanError("no JSON object in the planner reply")
+    try:
+        raw = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise PlanError(f"invalid JSON: {e}") from e
+    
+    steps: Dict[str, PlanStep] = {}
+    for index, item in enumerate(raw.get("steps") or []):
+        step_id = str(item.get("id") or f"s{index + 1}")
+        if step_id in steps or step_id in completed:
+            raise PlanError(f"duplicate step id {step_id}")
+        if item.get("tool") not in tool_names:
+            raise PlanError(f"unknown tool {item.get('tool')!r} in step {step_id}")
+        args = item.get("args") or {}
+        if not isinstance(args, dict):
+            raise PlanError(f"args of step {step_id} must be an object")
+        # References imply dependencies even when the planner forgot to list them
+        listed = [str(dep) for dep in item.get("depends_on") or []]
+        referenced = [step_ref for step_ref, _ in REFERENCE.findall(json.dumps(args))]
+        depends_on = list(dict.fromkeys(listed + referenced))
+        steps[step_id] = PlanStep(step_id, item["tool"], args, depends_on)
+    
+    for step in steps.values():
+        unknown = [dep for dep in step.depends_on if dep not in steps and dep not in completed]
+        if unknown:
+            raise PlanError(f"step {step.id} depends on unknown steps {', '.join(unknown)}")
+    return _topological_order(steps), str(raw.get("answer") or "")
+
+def _topological_order(steps: Dict[str, PlanStep]) -> List[PlanStep]:
+    """Steps ordered so each comes after its dependencies; raises on cycles"""
+    pending = {step_id: {dep for dep in step.depends_on if dep in steps} for step_id, step in steps.items()}
+    ordered = []
+    while pending:
+        ready = [step_id for step_id, deps in pending.items() if not deps]
+        if not ready:
+            raise PlanError(f"dependency cycle between steps {', '.join(sorted(pending))}")
+        for step_id in ready:
+            ordered.append(steps[step_id])
+            del pending[step_id]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return ordered
+
+def _lookup(output: Any, path: str) -> Any:
+    """Value at a dotted path inside a step output, parsing JSON text on the way"""
+    value = output
+    for key in [part for part in path.split(".") if part]:
+        if isinstance(value, str):
+            value = json.loads(value)
+        if isinstance(value, list):
+            value = value[int(key)]
+        elif isinstance(value, dict):
+            value = value[key]
+        else:
+            raise KeyError(key)
+    return value
+
+def substitute(value: Any, results: Dict[str, StepResult]) -> Any:
+    """Replace ${step.path} references in arguments with step outputs"""
+    if isinstance(value, dict):
+        return {key: substitute(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [substitute(item, results) for item in value]
+    if not isinstance(value, str) or "${" not in value:
+        return value
+    
+    def resolve(match: re.Match) -> Any:
+        step_id, path = match.group(1), match.group(2)
+        try:
+            return _lookup(results[step_id].output, path)
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise ValueError(f"cannot resolve {match.group(0)}: {e}") from e
+    
+    # A whole-string reference keeps the referenced value's type
+    whole = REFERENCE.fullmatch(value)
+    if whole:
+        return resolve(whole)
+    return REFERENCE.sub(lambda match: _as_text(resolve(match)), value)
+
+def _as_text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+class PlanExecuteWorkflow(BaseWorkflow):
+    """Plans all tool calls in one LLM pass, runs them as a parallel DAG and replans only on failure"""
+    
+    def __init__(self, llm_service: ILLMService, llm_name: str, config: Optional[WorkflowConfig] = None):
+        super().__init__()
+        config = config or WorkflowConfig()
+        self.llm_service = llm_service
+        self.llm_provider = llm_service.get_llm(llm_name)
+        self.max_replans = config.max_replans
+        self.max_parallel_steps = config.max_parallel_steps
+        self.checkpointer = None
+        self._tools_by_name: Dict[str, Any] = {}
+        self._tool_catalog = ""
+    
+    def set_tools(self, tools: List[Any]):
+        """Set tools and precompute the catalog shown to the planner"""
+        super().set_tools(tools)
+        self._tools_by_name = {tool.name: tool for tool in tools}
+        self._tool_catalog = "\n".join(self._describe_tool(tool) for tool in tools)
+    
+    @staticmethod
+    def _describe_tool(tool: Any) -> str:
+        schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+        required = set(schema.get("required", []))
+        parameters = ", ".join(
+            f"{name}: {spec.get('type', 'any')}{'' if name in required else '?'}"
+            for name, spec in schema.get("properties", {}).items()
+        )
+        return f"- {tool.name}({parameters}): {tool.description}"
+    
+    def set_checkpointer(self, checkpointer):
+        """Persist each turn"""
+        self.checkpointer = checkpointer
+    
+    async def execute(self, conversation: Conversation, query: str) -> str:
+        """Plan, execute the plan and answer from its results"""
+        attributes = {"conversation_id": conversation.conversation_id, "query_chars": len(query),
+                      "workflow": "plan_execute"}
+        with span("workflow.execute", attributes) as current, timed(QUERY_LATENCY.labels(), "workflow"):
+            try:
+                response = await self._plan_and_execute(conversation, query)
+            except Exception as e:
+                current_span().record_error(e)
+                ERRORS.labels("workflow", type(e).__name__).inc()
+                response = f"Error in plan-and-execute workflow: {e}"
+                conversation.add_message("user", query)
+                conversation.add_message("assistant", response)
+            if self.checkpointer:
+                try:
+                    await self.checkpointer.asave(conversation)
+                except Exception as e:
+                    print(f"⚠️ Checkpoint failed for conversation {conversation.conversation_id}: {e}")
+            current.set_attribute("response_chars", len(response))
+            return response
+    
+    def stream(self, conversation: Conversation, query: str) -> AsyncIterator[StreamEvent]:
+        """Execute the query, yielding plan and tool events and finally the response"""
+        return stream_execution(lambda: self.execute(conversation, query))
+    
+    async def _plan_and_execute(self, conversation: Conversation, query: str) -> str:
+        start = time.perf_counter()
+        history = list(conversation.messages[-HISTORY_MESSAGES:])
+        results: Dict[str, StepResult] = {}
+        llm_calls = 0
+        replans = 0
+        feedback = ""
+        answer = ""
+        
+        while True:
+            messages = self._planner_messages(history, query, results, feedback)
+            # The plan is JSON for this workflow, not text for the user; only the answer below streams
+            with streaming_to(None):
+                planner_reply = await self.llm_provider.generate_response(messages)
+            llm_calls += 1
+            try:
+                steps, answer = parse_plan(planner_reply, list(self._tools_by_name),
+                                           [step_id for step_id, result in results.items() if result.ok])
+            except PlanError as e:
+                print(f"⚠️ Unusable plan: {e}")
+                if replans >= self.max_replans:
+                    break
+                replans += 1
+                feedback = f"Your previous reply was not a valid plan ({e}). Reply with the JSON plan only."
+                continue
+            
+            if not steps:
+                break
+            print(f"🗺️ Plan: {' | '.join(f'{step.id}={step.tool}' for step in steps)}")
+            emit("plan", steps=[{"id": step.id, "tool": step.tool, "depends_on": step.depends_on} for step in steps])
+            failures = await self._run_steps(steps, results)
+            if not failures or replans >= self.max_replans:
+                break
+            replans += 1
+            feedback = "Some steps failed. Plan only the remaining work; finished steps can be referenced by id."
+            print(f"🔁 Replanning after {len(failures)} failed steps")
+        
+        if results or not answer:
+            answer = await self.llm_provider.generate_response(self._answer_messages(history, query, results))
+            llm_calls += 1
+        else:
+            # Answered by the planner itself, whose tokens were held back
+            emit("token", content=answer)
+        
+        total_ms = (time.perf_counter() - start) * 1000
+        current_span().set_attributes({"plan.steps": len(results), "plan.replans": replans, "plan.llm_calls": llm_calls})
+        print(f"   ⏱️ Plan-and-execute: {len(results)} steps, {llm_calls} LLM calls, {total_ms:.0f}ms")
+        conversation.add_message("user", query)
+        conversation.add_message("assistant", answer, metadata={
+            "plan": [{"id": result.step.id, "tool": result.step.tool, "ok": result.ok,
+                      "elapsed_ms": round(result.elapsed_ms, 1)} for result in results.values()],
+            "llm_calls": llm_calls,
+            "replans": replans,
+            "total_ms": total_ms
+        })
+        return answer
+    
+    def _planner_messages(self, history: List[Message], query: str, results: Dict[str, StepResult],
+                          feedback: str) -> List[Message]:
+        messages = [Message(role="system", content=PLANNER_PROMPT + self._tool_catalog)]
+        messages.extend(history)
+        request = query
+        if results:
+            request += "\n\nSteps already run:\n" + "\n".join(result.describe() for result in results.values())
+        if feedback:
+            request += f"\n\n{feedback}"
+        messages.append(Message(role="user", content=request))
+        return messages
+    
+    def _answer_messages(self, history: List[Message], query: str, results: Dict[str, StepResult]) -> List[Message]:
+        messages = [Message(role="system", content=ANSWER_PROMPT)]
+        messages.extend(history)
+        tool_results = "\n".join(result.describe() for result in results.values()) or "No tools were called."
+        messages.append(Message(role="user", content=f"{query}\n\nTool results:\n{tool_results}"))
+        return messages
+    
+    async def _run_steps(self, steps: List[PlanStep], results: Dict[str, StepResult]) -> List[StepResult]:
+        """Run steps as soon as their dependencies finish; returns the failed ones"""
+        semaphore = asyncio.Semaphore(self.max_parallel_steps)
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def run(step: PlanStep) -> StepResult:
+            for dep in step.depends_on:
+                if dep in tasks:
+                    await tasks[dep]
+            failed = [dep for dep in step.depends_on if not results[dep].ok]
+            if failed:
+                result = StepResult(step, error=f"skipped because {', '.join(failed)} failed", skipped=True)
+            else:
+                async with semaphore:
+                    result = await self._run_step(step, results)
+            results[step.id] = result
+            return result
+        
+        # Steps come in dependency order, so every dependency's task exists before it is awaited
+        for step in steps:
+            tasks[step.id] = asyncio.create_task(run(step))
+        finished = await asyncio.gather(*tasks.values())
+        # Prompts list results in plan order rather than in the order parallel steps happened to finish,
+        # so the same plan always yields the same prompt
+        for result in finished:
+            results[result.step.id] = results.pop(result.step.id)
+        return [result for result in finished if not result.ok and not result.skipped]
+    
+    async def _run_step(self, step: PlanStep, results: Dict[str, StepResult]) -> StepResult:
+        start = time.perf_counter()
+        with span("plan.step", {"step": step.id, "tool": step.tool, "depends_on": step.depends_on}) as current:
+            try:
+                arguments = substitute(step.args, results)
+                emit("tool_start", tool=step.tool, args=arguments, step=step.id)
+                output = await self._tools_by_name[step.tool].ainvoke(arguments)
+                result = StepResult(step, output=output)
+            except Exception as e:
+                current.record_error(e)
+                result = StepResult(step, error=str(e) or type(e).__name__)
+            result.elapsed_ms = (time.perf_counter() - start) * 1000
+            emit("tool_end", tool=step.tool, step=step.id, status="success" if result.ok else "error",
+                 chars=len(_as_text(result.output)) if result.ok else 0)
+            return result
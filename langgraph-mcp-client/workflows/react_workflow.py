@@ -1,35 +1,91 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from workflows.base_workflow import BaseWorkflow
 from models.conversation import Conversation
+from models.stream_event import StreamEvent, emit, stream_execution
+from agents.base_agent import BaseAgent
 from interfaces.llm_interface import ILLMService
 from agents.agent_manager import AgentFactory, AgentManager
+from config.settings import RoutingConfig
+from services.metrics import ERRORS, QUERY_LATENCY, timed
+from services.tracing import current_span, span
 
 class ReactWorkflow(BaseWorkflow):
     """ReAct workflow with agent routing"""
     
-    def __init__(self, llm_service: ILLMService, llm_name: str):
+    def __init__(self, llm_service: ILLMService, llm_name: str, routing: Optional[RoutingConfig] = None):
         super().__init__()
         self.llm_service = llm_service
         self.llm_name = llm_name
-        self.agent_manager: AgentManager = AgentFactory.create_agent_manager(llm_service, llm_name)
+        self.agent_manager: AgentManager = AgentFactory.create_agent_manager(llm_service, llm_name, routing)
         self.use_agent_routing = True
+        self.use_fan_out = True
+        self.checkpointer = None
+        self.fast_path = None
     
     def set_tools(self, tools: List[Any]):
         """Set tools and distribute to agents"""
         super().set_tools(tools)
         
+        if self.fast_path:
+            self.fast_path.set_tools(tools)
+        
         # Distribute tools to all agents
         for agent in self.agent_manager.agents.values():
             agent.set_tools(tools)
         
         print(f"✅ Distributed tools to {len(self.agent_manager.list_agents())} agents")
     
+    def set_checkpointer(self, checkpointer):
+        """Persist each turn and let agent graphs resume interrupted runs"""
+        self.checkpointer = checkpointer
+        graph_saver = checkpointer.graph_saver if checkpointer else None
+        for agent in self.agent_manager.agents.values():
+            agent.set_graph_checkpointer(graph_saver)
+    
+    def set_fast_path(self, fast_path):
+        """Answer template-matching queries with a direct tool call before routing to agents"""
+        self.fast_path = fast_path
+        fast_path.set_tools(self.tools)
+    
+    def set_speculator(self, speculator):
+        """Let agents prefetch their likely tool calls while the LLM plans"""
+        for agent in self.agent_manager.agents.values():
+            agent.speculator = speculator
+    
     async def execute(self, conversation: Conversation, query: str) -> str:
         """Execute workflow with agent routing"""
+        attributes = {"conversation_id": conversation.conversation_id, "query_chars": len(query)}
+        with span("workflow.execute", attributes) as current, timed(QUERY_LATENCY.labels(), "workflow"):
+            response = await self.fast_path.answer(conversation, query) if self.fast_path else None
+            if response is None:
+                response = await self._dispatch(conversation, query)
+            if self.checkpointer:
+                try:
+                    await self.checkpointer.asave(conversation)
+                except Exception as e:
+                    print(f"⚠️ Checkpoint failed for conversation {conversation.conversation_id}: {e}")
+            current.set_attribute("response_chars", len(response))
+            return response
+    
+    def stream(self, conversation: Conversation, query: str) -> AsyncIterator[StreamEvent]:
+        """Execute the query, yielding routing, token and tool events and finally the response"""
+        return stream_execution(lambda: self.execute(conversation, query))
+    
+    async def _dispatch(self, conversation: Conversation, query: str) -> str:
+        """Route the query to one or several agents"""
         try:
             if self.use_agent_routing:
-                # Route to appropriate agent
-                selected_agent = self.agent_manager.route_query(query)
+                intents = self.agent_manager.split_intents(query) if self.use_fan_out else []
+                if len(intents) > 1:
+                    current_span().set_attribute("intents", len(intents))
+                    return await self._execute_fan_out(conversation, query, intents)
+                
+                # A single intent was already routed by split_intents; routing again would log it twice
+                selected_agent = intents[0][0] if intents else self.agent_manager.route_query(query)
                 print(f"🎯 Routing to: {selected_agent.name}")
+                emit("route", agents=[selected_agent.name])
                 return await selected_agent.process_query(conversation, query)
             else:
                 # Use default agent
@@ -40,10 +96,48 @@ class ReactWorkflow(BaseWorkflow):
                     return "No agents available to process the query."
                     
         except Exception as e:
+            current_span().record_error(e)
+            ERRORS.labels("workflow", type(e).__name__).inc()
             error_msg = f"Error in agent workflow: {e}"
             conversation.add_message("assistant", error_msg)
             return error_msg
     
+    async def _execute_fan_out(self, conversation: Conversation, query: str,
+                               intents: List[Tuple[BaseAgent, str]]) -> str:
+        """Run sub-queries on their agents concurrently and merge the answers"""
+        print(f"🔀 Fan-out to: {', '.join(f'{agent.name} ({sub_query!r})' for agent, sub_query in intents)}")
+        emit("route", agents=[agent.name for agent, _ in intents], sub_queries=[sub_query for _, sub_query in intents])
+        
+        async def run_intent(agent: BaseAgent, sub_query: str):
+            # Each agent works on its own fork so concurrent turns don't interleave
+            start = time.perf_counter()
+            response = await agent.process_query(conversation.fork(), sub_query)
+            return response, (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_intent(agent, sub_query) for agent, sub_query in intents), return_exceptions=True
+        )
+        total_ms = (time.perf_counter() - start) * 1000
+        
+        sections = []
+        timings = {}
+        for (agent, sub_query), result in zip(intents, results):
+            if isinstance(result, Exception):
+                response, elapsed_ms = f"Error: {result}", None
+            else:
+                response, elapsed_ms = result
+            label = f"{agent.name}:{sub_query}" if agent.name in timings else agent.name
+            timings[label] = elapsed_ms
+            sections.append(f"**{agent.name}** — {sub_query}\n{response}")
+            print(f"   ⏱️ {agent.name}: {elapsed_ms:.0f}ms" if elapsed_ms is not None else f"   ❌ {agent.name} failed")
+        print(f"   ⏱️ Fan-out total: {total_ms:.0f}ms")
+        
+        merged = "\n\n".join(sections)
+        conversation.add_message("user", query)
+        conversation.add_message("assistant", merged, metadata={"agent_timings_ms": timings, "total_ms": total_ms})
+        return merged
+    
     def toggle_agent_routing(self, enabled: bool):
         """Enable/disable intelligent agent routing"""
         self.use_agent_routing = enabled
@@ -1,12 +1,23 @@
 import os
 import asyncio
+import sys
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_core.messages import trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
 from langgraph.prebuilt import create_react_agent
 
+# The stdin reader is shared with the langgraph-mcp-client app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "langgraph-mcp-client"))
+from clients.async_input import AsyncLineReader
+
 load_dotenv()
 
+# Token budget for the history sent to the model on each turn
+CONTEXT_BUDGET_TOKENS = int(os.getenv("CONTEXT_BUDGET_TOKENS", "8000"))
+
+
 async def connect_to_mcp(name, url):
     """Helper function to test connection to an MCP server and get tools."""
     try:
@@ -145,10 +156,15 @@ async def run_enhanced_interactive_client():
     
     # Initialize conversation history
     conversation_state = {"messages": []}
+    stdin = AsyncLineReader()
     
     try:
         while True:
-            query = input("🔍 Enter your query (or 'quit', 'clear' to clear history): ")
+            try:
+                query = await stdin.readline("🔍 Enter your query (or 'quit', 'clear' to clear history): ")
+            except EOFError:
+                print("\n👋 Goodbye!")
+                break
             
             if query.lower() in ['quit', 'exit', 'q']:
                 print("👋 Goodbye!")
@@ -169,6 +185,17 @@ async def run_enhanced_interactive_client():
             
             try:
                 conversation_state["messages"].append({"role": "user", "content": query})
+                # Keep only the newest turns that fit the budget, starting on a user turn
+                conversation_state["messages"] = trim_messages(
+                    conversation_state["messages"],
+                    max_tokens=CONTEXT_BUDGET_TOKENS,
+                    token_counter=count_tokens_approximately,
+                    strategy="last",
+                    start_on="human",
+                    include_system=True
+                )
+                used_tokens = count_tokens_approximately(conversation_state["messages"])
+                print(f"📏 Context: {used_tokens}/{CONTEXT_BUDGET_TOKENS} tokens")
                 result = await agent.ainvoke(conversation_state)
                 
                 if hasattr(result, 'content'):
@@ -1,11 +1,19 @@
 import os
 import asyncio
 import subprocess
+import tempfile
+import sys
+from datetime import timedelta
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 
+# The stdin reader is shared with the langgraph-mcp-client app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "langgraph-mcp-client"))
+from clients.async_input import AsyncLineReader
+
 load_dotenv()
 
 # --------------------------------
@@ -15,108 +23,387 @@ MS365_MODE = os.getenv("MS365_MODE", "device")  # device | http | byot
 MS365_PORT = int(os.getenv("MS365_PORT", "3000"))
 MS365_TOKEN = os.getenv("MS365_MCP_OAUTH_TOKEN")  # Used in BYOT or HTTP
 MS365_SERVER_PATH = os.getenv("MS365_SERVER_PATH", "@softeria/ms-365-mcp-server")
+MS365_LOGIN = os.getenv("MS365_LOGIN", "false").lower() == "true"  # run the device code login before connecting
+
+# Process supervision
+MS365_READY_TIMEOUT = float(os.getenv("MS365_READY_TIMEOUT", "90"))  # npx may need to download the package
+MS365_MAX_RESTARTS = int(os.getenv("MS365_MAX_RESTARTS", "3"))
+MS365_CALL_TIMEOUT = float(os.getenv("MS365_CALL_TIMEOUT", "120"))  # backstop for requests to a hung server
+MS365_KEEP_WARM = os.getenv("MS365_KEEP_WARM", "false").lower() == "true"  # leave the HTTP server running on exit
+MS365_PIDFILE = os.getenv("MS365_PIDFILE", os.path.join(tempfile.gettempdir(), f"ms365-mcp-{MS365_PORT}.pid"))
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 
 
-async def start_ms365_server():
+def pid_alive(pid):
     """
-    Starts the ms-365-mcp-server in the chosen mode.
+    Whether a process with this PID exists.
     """
-    env = os.environ.copy()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+async def probe_http(port, timeout=2.0):
+    """
+    Readiness probe: the server accepts a connection and answers an HTTP request on /mcp.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        writer.write(f"GET /mcp HTTP/1.1\r\nHost: localhost:{port}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        return status_line.startswith(b"HTTP/")
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        writer.close()
 
-    if MS365_MODE == "device":
-        print("🚀 Starting ms-365-mcp-server in DEVICE CODE mode (stdio transport)")
-        proc = subprocess.Popen(
-            ["npx", "-y", MS365_SERVER_PATH, "--login"],
-            env=env
-        )
-        return {"transport": "sse", "url": "stdio"}  # not a real URL, handled internally
-
-    elif MS365_MODE == "http":
-        print(f"🚀 Starting ms-365-mcp-server in HTTP mode on port {MS365_PORT}")
-        args = ["npx", "-y", MS365_SERVER_PATH, "--http", str(MS365_PORT)]
-        proc = subprocess.Popen(args, env=env)
-        return {
-            "transport": "streamable-http",
-            "url": f"http://localhost:{MS365_PORT}/mcp",
-            "headers": {"Authorization": f"Bearer {MS365_TOKEN}"}
-        }
 
-    elif MS365_MODE == "byot":
-        if not MS365_TOKEN:
+class MS365Supervisor:
+    """
+    Owns the ms-365-mcp-server process and one long-lived MCP session to it.
+
+    HTTP/BYOT: the server is started once, polled until ready, restarted if it
+    crashes, and with MS365_KEEP_WARM left running (tracked by a pidfile) so the
+    next run skips npx resolution and startup.
+    Device: the server speaks stdio, so the MCP client spawns it as its child and
+    reaps it when the session closes.
+    """
+
+    def __init__(self, mode=MS365_MODE):
+        if mode not in ("device", "http", "byot"):
+            raise ValueError(f"Invalid MS365_MODE: {mode}")
+        if mode == "byot" and not MS365_TOKEN:
             raise ValueError("❌ MS365_MCP_OAUTH_TOKEN must be set for BYOT mode.")
-        print(f"🚀 Starting ms-365-mcp-server in BYOT mode on port {MS365_PORT}")
-        env["MS365_MCP_OAUTH_TOKEN"] = MS365_TOKEN
-        args = ["npx", "-y", MS365_SERVER_PATH, "--http", str(MS365_PORT)]
-        proc = subprocess.Popen(args, env=env)
-        return {
-            "transport": "streamable-http",
+        self.mode = mode
+        self.proc = None  # server process started by this run
+        self.warm_pid = None  # server left running by an earlier run
+        self.restarts = 0
+        self.tools = []
+        self._session_task = None
+        self._close_requested = None
+        self._watcher = None
+        self._stopping = False
+        self.lost = asyncio.Event()  # set when the server dies under an open session
+
+    def server_env(self):
+        env = os.environ.copy()
+        if self.mode == "byot":
+            env["MS365_MCP_OAUTH_TOKEN"] = MS365_TOKEN
+        return env
+
+    def connection(self):
+        """
+        Connection settings for MultiServerMCPClient.
+        """
+        session_kwargs = {"read_timeout_seconds": timedelta(seconds=MS365_CALL_TIMEOUT)}
+        if self.mode == "device":
+            return {
+                "transport": "stdio",
+                "command": "npx",
+                "args": ["-y", MS365_SERVER_PATH],
+                "env": self.server_env(),
+                "session_kwargs": session_kwargs
+            }
+        connection = {
+            "transport": "streamable_http",
             "url": f"http://localhost:{MS365_PORT}/mcp",
-            "headers": {"Authorization": f"Bearer {MS365_TOKEN}"}
+            "session_kwargs": session_kwargs
         }
+        if MS365_TOKEN:
+            connection["headers"] = {"Authorization": f"Bearer {MS365_TOKEN}"}
+        return connection
+
+    async def start(self):
+        """
+        Make sure a server is running and ready, then open the MCP session.
+        """
+        if self.mode == "device" and MS365_LOGIN:
+            print("🔑 Running ms-365-mcp-server device code login...")
+            login = await asyncio.create_subprocess_exec("npx", "-y", MS365_SERVER_PATH, "--login",
+                                                         env=self.server_env())
+            await login.wait()
+        if self.mode != "device":
+            if not await self._reuse_warm_server():
+                await self._spawn_http_server()
+            self._watcher = asyncio.create_task(self._watch())
+        return await self.connect()
 
-    else:
-        raise ValueError(f"Invalid MS365_MODE: {MS365_MODE}")
+    async def _reuse_warm_server(self):
+        """
+        Adopt a server left running by an earlier run, if its pidfile is still valid.
+        """
+        if not MS365_KEEP_WARM or not os.path.exists(MS365_PIDFILE):
+            return False
+        try:
+            with open(MS365_PIDFILE) as f:
+                pid, port = (int(value) for value in f.read().split())
+        except (OSError, ValueError):
+            pid, port = 0, 0
+        if pid and port == MS365_PORT and pid_alive(pid) and await probe_http(MS365_PORT):
+            self.warm_pid = pid
+            print(f"♨️ Reusing warm ms-365-mcp-server (pid {pid}) on port {MS365_PORT}")
+            return True
+        os.remove(MS365_PIDFILE)
+        return False
+
+    async def _spawn_http_server(self):
+        """
+        Start the HTTP server and wait for it to pass the readiness probe.
+        """
+        print(f"🚀 Starting ms-365-mcp-server in {self.mode.upper()} mode on port {MS365_PORT}")
+        # Popen rather than an asyncio subprocess, whose transport kills the child when the loop closes.
+        # A warm server outlives this process: its own session keeps Ctrl-C away from it and
+        # its output goes to a log file instead of this terminal
+        output = open(MS365_PIDFILE + ".log", "ab") if MS365_KEEP_WARM else None
+        self.proc = subprocess.Popen(
+            ["npx", "-y", MS365_SERVER_PATH, "--http", str(MS365_PORT)],
+            env=self.server_env(),
+            stdin=subprocess.DEVNULL,
+            stdout=output,
+            stderr=subprocess.STDOUT if output else None,
+            start_new_session=MS365_KEEP_WARM
+        )
+        if output:
+            output.close()
+        if MS365_KEEP_WARM:
+            with open(MS365_PIDFILE, "w") as f:
+                f.write(f"{self.proc.pid} {MS365_PORT}")
+        await self._wait_ready()
 
+    async def _wait_ready(self):
+        """
+        Poll the readiness probe with exponential backoff instead of racing the server.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + MS365_READY_TIMEOUT
+        delay = 0.1
+        while True:
+            if self.proc and self.proc.poll() is not None:
+                raise RuntimeError(f"ms-365-mcp-server exited with code {self.proc.returncode} during startup")
+            if await probe_http(MS365_PORT):
+                print(f"✅ ms-365-mcp-server ready on port {MS365_PORT}")
+                return
+            if loop.time() + delay > deadline:
+                raise TimeoutError(f"ms-365-mcp-server not ready after {MS365_READY_TIMEOUT:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 2.0)
 
-async def connect_ms365_client(server_info):
+    async def _watch(self):
+        """
+        Restart the HTTP server if it dies, with backoff and a restart limit.
+        """
+        while not self._stopping:
+            while not self._stopping and self._server_alive():
+                await asyncio.sleep(0.5)
+            if self._stopping:
+                return
+            self.lost.set()
+            if self.restarts >= MS365_MAX_RESTARTS:
+                print(f"❌ ms-365-mcp-server crashed {self.restarts + 1} times; giving up")
+                return
+            self.restarts += 1
+            print(f"⚠️ ms-365-mcp-server stopped; restarting ({self.restarts}/{MS365_MAX_RESTARTS})")
+            self.proc, self.warm_pid = None, None
+            await asyncio.sleep(min(2 ** self.restarts, 10))
+            try:
+                await self._spawn_http_server()
+            except (OSError, RuntimeError, TimeoutError) as e:
+                print(f"❌ Restart failed: {e}")
+
+    def _server_alive(self):
+        if self.proc is not None:
+            return self.proc.poll() is None
+        return self.warm_pid is not None and pid_alive(self.warm_pid)
+
+    async def guard(self, coro):
+        """
+        Run work that uses the session, failing fast if the server dies meanwhile;
+        a request to a dead HTTP server would otherwise wait for the read timeout.
+        """
+        work = asyncio.ensure_future(coro)
+        lost = asyncio.ensure_future(self.lost.wait())
+        try:
+            await asyncio.wait([work, lost], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            raise ConnectionError("ms-365-mcp-server stopped")
+        return work.result()
+
+    async def connect(self):
+        """
+        Open one MCP session reused by every tool call, and load its tools.
+        """
+        self.lost.clear()
+        self._close_requested = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        self._session_task = asyncio.create_task(self._hold_session(ready))
+        try:
+            async with asyncio.timeout(MS365_READY_TIMEOUT):
+                self.tools = await ready
+        except BaseException:
+            await self._close_session()
+            raise
+        print(f"✅ Connected to MS-365 MCP Server with {len(self.tools)} tools.")
+        for t in self.tools:
+            print(f" • {t.name}: {t.description}")
+        return self.tools
+
+    async def _hold_session(self, ready):
+        """
+        Keep the session open in a task of its own: the MCP client's task group
+        cancels the task that entered it when the connection breaks.
+        """
+        client = MultiServerMCPClient({"ms365": self.connection()})
+        try:
+            async with client.session("ms365") as session:
+                ready.set_result(await load_mcp_tools(session))
+                await self._close_requested.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e if isinstance(e, Exception) else ConnectionError("MS-365 session closed"))
+            if not self._close_requested.is_set():
+                self.lost.set()
+            if not isinstance(e, (Exception, asyncio.CancelledError)):
+                raise
+
+    async def reconnect(self):
+        """
+        Replace a broken session, waiting for a restarted server first.
+        """
+        await self._close_session()
+        if self.mode != "device":
+            await self._wait_ready()
+        return await self.connect()
+
+    async def _close_session(self):
+        if self._session_task is None:
+            return
+        self._close_requested.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._session_task), 5)
+        except asyncio.TimeoutError:
+            self._session_task.cancel()
+            await asyncio.gather(self._session_task, return_exceptions=True)
+        except Exception as e:
+            print(f"⚠️ Error closing MS-365 session: {e}")
+        self._session_task = None
+
+    async def stop(self):
+        """
+        Close the session and stop the server unless it is kept warm.
+        """
+        self._stopping = True
+        if self._watcher is not None:
+            self._watcher.cancel()
+        await self._close_session()
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        if MS365_KEEP_WARM:
+            print(f"♨️ Leaving ms-365-mcp-server running (pid {self.proc.pid}) for the next run")
+            return
+        # Terminate and reap the child so no zombie is left behind
+        self.proc.terminate()
+        try:
+            await asyncio.to_thread(self.proc.wait, 5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            await asyncio.to_thread(self.proc.wait)
+        print("🧹 ms-365-mcp-server stopped")
+
+
+async def run_turn(agent, state, progress):
     """
-    Connects to the running ms-365-mcp-server and retrieves tools.
+    One agent turn, keeping the latest graph state in progress so a failed turn shows how far it got.
     """
-    client_config = {
-        "ms365": {
-            "url": server_info["url"],
-            "transport": server_info["transport"]
-        }
-    }
-    if "headers" in server_info:
-        client_config["ms365"]["headers"] = server_info["headers"]
+    async for values in agent.astream(state, stream_mode="values"):
+        progress.update(values)
+    return progress
+
 
-    client = MultiServerMCPClient(client_config)
-    tools = await client.get_tools()
-    print(f"✅ Connected to MS-365 MCP Server with {len(tools)} tools.")
-    for t in tools:
-        print(f" • {t.name}: {t.description}")
-    return client, tools
+def ran_tools(progress, sent):
+    """
+    Whether the turn got tool results back, i.e. tools ran, after the first `sent` messages.
+    """
+    return any(getattr(message, "type", None) == "tool" for message in progress.get("messages", [])[sent:])
 
 
 async def run_langgraph_with_ms365():
     """
     Full flow: start server, connect, run LangGraph agent loop.
     """
-    # Start server
-    server_info = await start_ms365_server()
-
-    # Connect client
-    client, tools = await connect_ms365_client(server_info)
-
-    # Init Gemini LLM
-    llm = ChatGoogleGenerativeAI(
-        model=GEMINI_MODEL,
-        google_api_key=GOOGLE_API_KEY,
-        temperature=0.3
-    )
-
-    # Create LangGraph agent
-    agent = create_react_agent(llm, tools)
-
-    # Interactive loop
-    state = {"messages": []}
-    while True:
-        user_in = input("\n💬 You: ")
-        if user_in.lower() in ["quit", "exit", "q"]:
-            print("👋 Exiting.")
-            break
-        state["messages"].append({"role": "user", "content": user_in})
-        result = await agent.ainvoke(state)
-        if isinstance(result, dict) and "messages" in result:
-            state = result
-            reply = result["messages"][-1]["content"]
-        else:
-            reply = str(result)
-        print(f"🤖 {reply}")
+    supervisor = MS365Supervisor()
+    try:
+        # Start server and connect client
+        tools = await supervisor.start()
+
+        # Init Gemini LLM
+        llm = ChatGoogleGenerativeAI(
+            model=GEMINI_MODEL,
+            google_api_key=GOOGLE_API_KEY,
+            temperature=0.3
+        )
+
+        # Create LangGraph agent
+        agent = create_react_agent(llm, tools)
+
+        # Interactive loop
+        state = {"messages": []}
+        stdin = AsyncLineReader()
+        while True:
+            try:
+                user_in = await stdin.readline("\n💬 You: ")
+            except EOFError:
+                print("\n👋 Exiting.")
+                break
+            if user_in.lower() in ["quit", "exit", "q"]:
+                print("👋 Exiting.")
+                break
+            state["messages"].append({"role": "user", "content": user_in})
+            sent = len(state["messages"])
+            progress = {}
+            try:
+                result = await supervisor.guard(run_turn(agent, state, progress))
+            except Exception as e:
+                if not (supervisor.lost.is_set() or isinstance(e, ConnectionError)):
+                    # LLM, rate limit and tool errors are not fixed by a new session
+                    state["messages"].pop()
+                    print(f"❌ {e}")
+                    continue
+                print(f"⚠️ Lost the MS-365 server ({e}); reconnecting...")
+                try:
+                    agent = create_react_agent(llm, await supervisor.reconnect())
+                    if ran_tools(progress, sent):
+                        # A tool may have sent mail or created an event already; running the turn again would repeat it
+                        state["messages"].pop()
+                        print("⚠️ Tools had already run for this request, so it is not retried. "
+                              "Check what was done before asking again.")
+                        continue
+                    result = await supervisor.guard(run_turn(agent, state, {}))
+                except Exception as e:
+                    state["messages"].pop()
+                    print(f"❌ {e}")
+                    continue
+            if isinstance(result, dict) and "messages" in result:
+                state = result
+                reply = result["messages"][-1].content
+            else:
+                reply = str(result)
+            print(f"🤖 {reply}")
+    finally:
+        await supervisor.stop()
 
 
 if __name__ == "__main__":